@@ -10,6 +10,7 @@ CREATE TABLE IF NOT EXISTS `usuario` (
 `saltKDF` varchar(1024) NOT NULL,
 `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 `armazenamento_total` bigint NOT NULL DEFAULT 5368709120,
+`armazenamento_usado` bigint NOT NULL DEFAULT 0,
 PRIMARY KEY (`id`),
 UNIQUE KEY `email` (`email`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -55,6 +56,7 @@ CREATE TABLE IF NOT EXISTS `dados` (
 `criado_em` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 PRIMARY KEY (`id`),
 KEY `idx_dados_usuario_tipo` (`usuario_id`,`tipo`),
+KEY `idx_dados_usuario_criado` (`usuario_id`,`criado_em`,`id`),
 CONSTRAINT `dados_ibfk_1` FOREIGN KEY (`usuario_id`) REFERENCES `usuario` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -64,29 +66,39 @@ CREATE TABLE IF NOT EXISTS `arquivos` (
 `iv_arquivo` VARCHAR(64) DEFAULT NULL,
 `extensao` varchar(50) DEFAULT NULL,
 `nome_arquivo` varchar(255) DEFAULT NULL,
+`tamanho` bigint NOT NULL DEFAULT 0,
+`blob_ref` char(64) DEFAULT NULL,
+`hash_conteudo` char(64) DEFAULT NULL,
 PRIMARY KEY (`id`),
+KEY `idx_arquivos_blob_ref` (`blob_ref`),
 CONSTRAINT `arquivos_ibfk_1` FOREIGN KEY (`id`) REFERENCES `dados` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE IF NOT EXISTS `senhas` (
 `id` int(11) NOT NULL,
+`usuario_id` int(11) DEFAULT NULL,
 `email` varchar(255),
 `senha_cripto` varchar(1024) NOT NULL,
 `iv_senha_cripto` VARCHAR(64) NOT NULL,
 `host_url` varchar(1024) DEFAULT NULL,
+`host_normalizado` varchar(255) DEFAULT NULL,
 PRIMARY KEY (`id`),
-CONSTRAINT `senhas_ibfk_1` FOREIGN KEY (`id`) REFERENCES `dados` (`id`) ON DELETE CASCADE
+KEY `idx_senhas_usuario_host` (`usuario_id`,`host_normalizado`),
+CONSTRAINT `senhas_ibfk_1` FOREIGN KEY (`id`) REFERENCES `dados` (`id`) ON DELETE CASCADE,
+CONSTRAINT `senhas_ibfk_2` FOREIGN KEY (`usuario_id`) REFERENCES `usuario` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE IF NOT EXISTS `dados_compartilhados` (
 `id` int(11) NOT NULL AUTO_INCREMENT,
 `compartilhamento_id` int(11) NOT NULL,
 `dado_origem_id` int(11) DEFAULT NULL,
-`dado_criptografado` longblob NOT NULL,
+`dado_criptografado` longblob DEFAULT NULL,
+`blob_ref` char(64) DEFAULT NULL,
 `iv_dado` VARCHAR(64) NOT NULL,
 `meta` longtext DEFAULT NULL,
 `criado_em` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 PRIMARY KEY (`id`),
+KEY `idx_dados_compartilhados_blob_ref` (`blob_ref`),
 KEY `compartilhamento_id` (`compartilhamento_id`),
 KEY `dado_origem_id` (`dado_origem_id`),
 CONSTRAINT `dados_compartilhados_ibfk_1` FOREIGN KEY (`compartilhamento_id`) REFERENCES `compartilhamento` (`id`) ON DELETE CASCADE,
@@ -128,3 +140,54 @@ KEY `logs_dados_FK` (`id_dado`),
 CONSTRAINT `logs_dados_FK` FOREIGN KEY (`id_dado`) REFERENCES `dados` (`id`) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+CREATE TABLE IF NOT EXISTS `sessoes_upload` (
+`id` varchar(64) NOT NULL,
+`usuario_id` int(11) NOT NULL,
+`nome_aplicacao` varchar(255) NOT NULL,
+`descricao` text DEFAULT NULL,
+`iv_arquivo` varchar(64) NOT NULL,
+`extensao` varchar(50) NOT NULL,
+`nome_arquivo` varchar(255) NOT NULL,
+`id_pasta` int(11) DEFAULT NULL,
+`id_tags` json NOT NULL,
+`tamanho_total` bigint NOT NULL,
+`tamanho_chunk` int(11) NOT NULL,
+`criado_em` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+`expira_em` datetime NOT NULL,
+PRIMARY KEY (`id`),
+KEY `ix_sessoes_upload_usuario_id` (`usuario_id`),
+KEY `ix_sessoes_upload_expira_em` (`expira_em`),
+CONSTRAINT `sessoes_upload_ibfk_1` FOREIGN KEY (`usuario_id`) REFERENCES `usuario` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `sessoes` (
+`id` int(11) NOT NULL AUTO_INCREMENT,
+`usuario_id` int(11) NOT NULL,
+`token_hash` char(64) NOT NULL,
+`token_anterior_hash` char(64) DEFAULT NULL,
+`dispositivo` varchar(255) DEFAULT NULL,
+`ip` varchar(45) DEFAULT NULL,
+`criado_em` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+`ultimo_uso_em` datetime NOT NULL,
+`expira_em` datetime NOT NULL,
+`revogada_em` datetime DEFAULT NULL,
+PRIMARY KEY (`id`),
+UNIQUE KEY `token_hash` (`token_hash`),
+KEY `ix_sessoes_usuario_id` (`usuario_id`),
+KEY `ix_sessoes_token_anterior_hash` (`token_anterior_hash`),
+KEY `ix_sessoes_expira_em` (`expira_em`),
+KEY `ix_sessoes_revogada_em` (`revogada_em`),
+CONSTRAINT `sessoes_ibfk_1` FOREIGN KEY (`usuario_id`) REFERENCES `usuario` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `tokens_revogados` (
+`jti` varchar(64) NOT NULL,
+`usuario_id` int(11) DEFAULT NULL,
+`expira_em` datetime NOT NULL,
+`revogado_em` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+PRIMARY KEY (`jti`),
+KEY `usuario_id` (`usuario_id`),
+KEY `ix_tokens_revogados_expira_em` (`expira_em`),
+KEY `ix_tokens_revogados_revogado_em` (`revogado_em`),
+CONSTRAINT `tokens_revogados_ibfk_1` FOREIGN KEY (`usuario_id`) REFERENCES `usuario` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,234 @@
+"""
+Gravação em lote dos logs de auditoria não críticos.
+
+Os eventos críticos (schemas.EVENTOS_CRITICOS) continuam sendo gravados na
+transação da requisição, pois geram notificação e precisam do id do Log. Os
+demais (criar/editar dados, pastas, tags...) não precisam: em vez de um INSERT
+por ação, o Log fica guardado na sessão e, quando ela faz commit, vai para um
+buffer deste worker. Uma thread grava o buffer com um único INSERT em lote a
+cada AUDIT_LOG_FLUSH_SECONDS ou ao juntar AUDIT_LOG_FLUSH_SIZE registros.
+
+- Se a transação da requisição for desfeita, os logs dela são descartados.
+- O buffer tem no máximo AUDIT_LOG_BUFFER_SIZE registros (acima disso,
+  com o banco fora do ar, os novos são descartados e contados).
+- Ao desligar a API o buffer é gravado (shutdown).
+- Com AUDIT_LOG_FLUSH_SECONDS=0 o buffer é desligado e todo Log é gravado na
+  própria transação.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+from .core import settings
+from .database import SessionLocal
+from .repository import repository_log
+
+logger = logging.getLogger(__name__)
+
+# Chave em Session.info com os logs que esperam o commit da sessão
+PENDING_KEY = "logs_pendentes"
+
+_COLUMNS = (
+    "usuario_id",
+    "dispositivo",
+    "ip",
+    "tipo_acesso",
+    "id_dado",
+    "nome_aplicacao",
+    "data_hora",
+)
+
+
+def buffer_enabled() -> bool:
+    return settings.AUDIT_LOG_FLUSH_SECONDS > 0
+
+
+def _insert_rows(rows: List[dict]) -> int:
+    """
+    Grava 'rows' em um INSERT só. Se o dado de algum log foi apagado enquanto ele
+    esperava no buffer, o log é gravado sem 'id_dado' (o nome da aplicação fica);
+    só os logs de um usuário já apagado são descartados (como os logs apagados
+    junto com a conta).
+    """
+    db = SessionLocal()
+    try:
+        try:
+            repository_log.bulk_create_log_entries(db, rows)
+            db.commit()
+            return len(rows)
+        except IntegrityError:
+            db.rollback()
+        usuarios, dados = repository_log.get_existing_log_references(
+            db,
+            usuario_ids={r["usuario_id"] for r in rows if r["usuario_id"]},
+            dado_ids={r["id_dado"] for r in rows if r["id_dado"]},
+        )
+        validos = []
+        for r in rows:
+            if r["usuario_id"] is not None and r["usuario_id"] not in usuarios:
+                continue
+            if r["id_dado"] is not None and r["id_dado"] not in dados:
+                r = {**r, "id_dado": None}
+            validos.append(r)
+        if validos:
+            repository_log.bulk_create_log_entries(db, validos)
+            db.commit()
+        return len(validos)
+    finally:
+        db.close()
+
+
+class AuditLogBuffer:
+    """Logs já commitados pela requisição, esperando a gravação em lote."""
+
+    def __init__(self, max_size: int, flush_size: int, flush_seconds: float):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self._rows: List[dict] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def add_many(self, rows: List[dict]) -> None:
+        with self._cond:
+            espaco = max(self.max_size - len(self._rows), 0)
+            if len(rows) > espaco:
+                descartados = len(rows) - espaco
+                self.dropped += descartados
+                logger.error(
+                    f"Buffer de logs de auditoria cheio: {descartados} log(s) descartado(s)."
+                )
+                rows = rows[:espaco]
+            self._rows.extend(rows)
+            if len(self._rows) >= self.flush_size:
+                self._cond.notify()
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        # A thread não sobrevive a um fork: cada processo inicia a sua
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="audit-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._rows) >= self.flush_size or self._stopping,
+                    timeout=self.flush_seconds,
+                )
+                if self._stopping:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Grava tudo o que está no buffer. Se o banco falhar, os logs voltam para o buffer."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            try:
+                gravados = _insert_rows(rows)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Falha ao gravar {len(rows)} log(s) de auditoria: {e}")
+                with self._cond:
+                    # Os que não couberem de volta são descartados
+                    devolvidos = rows[: max(self.max_size - len(self._rows), 0)]
+                    self.dropped += len(rows) - len(devolvidos)
+                    self._rows[:0] = devolvidos
+                return 0
+            with self._cond:
+                self.written += gravados
+                self.dropped += len(rows) - gravados
+            return gravados
+
+    def shutdown(self) -> None:
+        """Para a thread e grava o que restou no buffer."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread if self._pid == os.getpid() else None
+            self._thread = None
+        if thread is not None:
+            thread.join(timeout=self.flush_seconds + 5)
+        self.flush()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "pendentes": len(self._rows),
+                "gravados": self.written,
+                "descartados": self.dropped,
+                "falhas": self.failures,
+            }
+
+
+_buffer = AuditLogBuffer(
+    max_size=settings.AUDIT_LOG_BUFFER_SIZE,
+    flush_size=settings.AUDIT_LOG_FLUSH_SIZE,
+    flush_seconds=settings.AUDIT_LOG_FLUSH_SECONDS,
+)
+atexit.register(_buffer.shutdown)
+
+
+def queue_log(db: Session, db_log: models.Log) -> None:
+    """
+    Guarda 'db_log' (ainda não adicionado à sessão) para a gravação em lote,
+    depois do commit de 'db'. Serve para Session e AsyncSession.
+    """
+    # 'data_hora' já vem preenchido: é o horário da ação, não o da gravação do lote
+    db.info.setdefault(PENDING_KEY, []).append(
+        {coluna: getattr(db_log, coluna) for coluna in _COLUMNS}
+    )
+
+
+def flush_audit_logs() -> int:
+    """Grava agora os logs no buffer deste worker (ex: antes de apagar os logs de um usuário)."""
+    return _buffer.flush()
+
+
+def shutdown() -> None:
+    _buffer.shutdown()
+
+
+def get_metrics() -> dict:
+    return _buffer.snapshot()
+
+
+@event.listens_for(Session, "after_commit")
+def _move_pending_logs(session: Session) -> None:
+    # Vale também para as AsyncSession (que usam uma Session por baixo)
+    rows = session.info.pop(PENDING_KEY, None)
+    if rows:
+        _buffer.add_many(rows)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_logs(session: Session, transaction) -> None:
+    # Transação principal encerrada sem commit (rollback/close): os logs não valem
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
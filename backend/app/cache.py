@@ -0,0 +1,73 @@
+"""
+Cache em memória (por processo) com limite de tamanho (LRU) e validade (TTL).
+
+Cada worker tem o seu próprio cache: uma invalidação feita em um worker não
+chega aos outros, então o TTL é o limite de tempo em que um valor pode ficar
+desatualizado nos demais.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Dicionário LRU em que cada item expira 'ttl_seconds' depois de salvo.
+    Seguro para uso por várias threads (rotas síncronas rodam no threadpool).
+    Com 'ttl_seconds' ou 'max_size' igual a 0, o cache fica desativado.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, key: K) -> Optional[V]:
+        """Retorna o valor salvo para 'key', ou None se não existir ou tiver expirado."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expira_em, value = item
+            if expira_em <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Salva 'value' com o TTL padrão (ou 'ttl_seconds').
+        Se o cache lotar, remove o item usado há mais tempo.
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """Remove 'key' do cache (invalidação)."""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
@@ -1,10 +1,15 @@
 from datetime import datetime, timedelta
+from typing import Literal, Optional
 from passlib.context import CryptContext
 from jose import jwt
 from pydantic_settings import BaseSettings
+import hashlib
 import secrets
+import time
 from zoneinfo import ZoneInfo
 
+from .cache import TTLCache
+
 # Configurações do JWT
 
 
@@ -17,10 +22,112 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # Validade da sessão (refresh token); renovada a cada uso
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # Pool de conexões do banco (por worker; ver /internal/metrics para dimensionar).
+    # Com DB_POOL_RECYCLE_SECONDS abaixo do wait_timeout do MySQL, o pre-ping
+    # (uma ida ao banco a cada checkout) pode ser desligado.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Após uma escrita do usuário, por quanto tempo as leituras dele ignoram a
+    # réplica (deve cobrir o atraso da replicação)
+    REPLICA_STICKY_SECONDS: int = 10
 
     # Configurações de Email
     EMAIL_HOST_USER: str
     EMAIL_HOST_PASSWORD: str
+    # Servidor SMTP: "ssl" (porta 465), "starttls" (porta 587) ou "none" (ex: teste local)
+    EMAIL_SMTP_HOST: str = "smtp.gmail.com"
+    EMAIL_SMTP_PORT: int = 465
+    EMAIL_SMTP_SECURITY: Literal["ssl", "starttls", "none"] = "ssl"
+    EMAIL_SMTP_TIMEOUT_SECONDS: float = 10
+    # Envio em background (ver app/mailer.py): conexões persistentes, tamanho da
+    # fila, NOOP antes de reutilizar uma conexão parada e fechamento das ociosas
+    EMAIL_POOL_SIZE: int = 2
+    EMAIL_QUEUE_SIZE: int = 1000
+    EMAIL_HEALTH_CHECK_SECONDS: float = 30
+    EMAIL_CONNECTION_MAX_IDLE_SECONDS: float = 120
+
+    # Onde o conteúdo criptografado dos arquivos é salvo:
+    # "database" (coluna LONGBLOB) ou "filesystem" (pasta BLOB_STORAGE_PATH)
+    BLOB_STORAGE_BACKEND: Literal["database", "filesystem"] = "database"
+    BLOB_STORAGE_PATH: str = "blobs"
+
+    # Uploads em partes: pasta temporária, tamanho de cada parte e validade da sessão
+    UPLOAD_SESSION_PATH: str = "uploads"
+    UPLOAD_CHUNK_SIZE: int = 5 * 1024 * 1024
+    UPLOAD_SESSION_TTL_HOURS: int = 24
+    # Tamanho máximo do corpo enviado de uma vez (ex: substituir o conteúdo de um arquivo)
+    MAX_REQUEST_BODY_BYTES: int = 1024 * 1024 * 1024
+
+    # Cache em memória do usuário autenticado (0 desativa)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # Cache dos tokens JWT já validados (0 desativa)
+    JWT_CACHE_MAX_SIZE: int = 10000
+    # Intervalo de sincronização dos tokens revogados (logout) entre os workers
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 5
+
+    # Custo do Argon2 (medir com 'python manage.py bench-argon2').
+    # Hashes salvos com outros parâmetros são refeitos no próximo login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    # Pool de processos do Argon2: processos, vagas na fila e espera máxima
+    ARGON2_POOL_WORKERS: int = 2
+    ARGON2_POOL_QUEUE_SIZE: int = 8
+    ARGON2_POOL_TIMEOUT_SECONDS: float = 10
+
+    # Limite de tentativas de login (janela deslizante de falhas por email e por IP)
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+    LOGIN_FREE_ATTEMPTS: int = 3
+    LOGIN_MAX_DELAY_SECONDS: int = 60
+    LOGIN_MAX_FAILURES_PER_EMAIL: int = 10
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+
+    # Token (header X-Internal-Token) exigido pelas rotas /internal (vazio: fechadas)
+    INTERNAL_API_TOKEN: Optional[str] = None
+    # Libera /internal sem token para conexões de localhost. Só ligue se nenhum
+    # proxy reverso local repassar requisições externas para a API
+    INTERNAL_ALLOW_LOOPBACK: bool = False
+
+    # Região dos IPs nos eventos críticos (ver app/geoip.py): "ip-api" (rede),
+    # "offline" (arquivo CSV do DB-IP em GEOIP_DATABASE_PATH) ou "none"
+    GEOIP_BACKEND: Literal["ip-api", "offline", "none"] = "ip-api"
+    GEOIP_DATABASE_PATH: str = "geoip/dbip-city-lite.csv"
+    GEOIP_TIMEOUT_SECONDS: float = 5
+    GEOIP_CACHE_TTL_SECONDS: int = 86400
+    GEOIP_CACHE_MAX_SIZE: int = 10000
+    GEOIP_NEGATIVE_TTL_SECONDS: int = 300
+
+    # Logs de auditoria não críticos, gravados em lote (ver app/audit_log.py):
+    # máximo no buffer, tamanho e intervalo do lote (0 grava na própria transação)
+    AUDIT_LOG_BUFFER_SIZE: int = 10000
+    AUDIT_LOG_FLUSH_SIZE: int = 200
+    AUDIT_LOG_FLUSH_SECONDS: float = 2
+
+    # Servidor de produção ('python manage.py serve'): workers (0: um por núcleo)
+    SERVER_WORKERS: int = 0
+
+    # Logs (ver app/logging_config.py): nível geral, níveis por módulo, formato,
+    # tamanho da fila e amostragem de avisos/erros repetidos (0 desativa)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = (
+        "sqlalchemy=WARNING,app.db_pool=WARNING,httpx=WARNING,httpcore=WARNING,"
+        "passlib=WARNING"
+    )
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_WINDOW_SECONDS: int = 60
+    LOG_SAMPLE_MAX_PER_WINDOW: int = 10
 
     class Config:
         env_file = ".env"
@@ -29,7 +136,12 @@ class Settings(BaseSettings):
 settings = Settings()  # type: ignore [reportCallIssue]
 
 # Hashing de Senhas
-pwd_context = CryptContext(schemes=["argon2"])
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST_KIB,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -37,6 +149,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_rehash_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verifica a senha e, se ela estiver correta mas o hash tiver sido gerado com
+    parâmetros antigos (pwd_context.needs_update), gera um novo hash.
+    Retorna (senha correta, novo hash ou None).
+    """
+    if not pwd_context.verify(plain_password, hashed_password):
+        return False, None
+    if pwd_context.needs_update(hashed_password):
+        return True, pwd_context.hash(plain_password)
+    return True, None
+
+
 def get_password_hash(password: str) -> str:
     """Gera o hash de uma senha."""
     return pwd_context.hash(password)
@@ -61,12 +188,12 @@ def generate_crypto_salt(num_bytes: int = 16) -> str:
 
 
 def create_access_token(data: dict) -> str:
-    """Cria um novo token de acesso JWT."""
+    """Cria um novo token de acesso JWT (com um 'jti' único, usado na revogação)."""
     to_encode = data.copy()
     expire = datetime.now(ZoneInfo("America/Sao_Paulo")) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -74,5 +201,29 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
+# Tokens já validados (hash do token -> claims), cada um válido até o seu 'exp'
+_token_cache: TTLCache[bytes, dict] = TTLCache(
+    max_size=settings.JWT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
 def decode_access_token(token: str) -> dict:
-    return jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
+    """
+    Decodifica e valida um token JWT (assinatura e 'exp').
+    Um token já validado é lido do cache até expirar, sem refazer o HMAC.
+    Tokens inválidos nunca entram no cache.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = _token_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)) and exp > time.time():
+            _token_cache.set(key, claims, ttl_seconds=exp - time.time())
+    return dict(claims)
+
+
+def clear_token_cache() -> None:
+    """Esvazia o cache de tokens validados."""
+    _token_cache.clear()
@@ -1,23 +1,102 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
+from .core import settings
+from .db_pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_pool,
+)
+
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Réplica de leitura (opcional): usada pelas rotas só de leitura (ver app.replica)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+
+# Configuração do pool de conexões (a mesma para todas as engines)
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    # Fecha conexões mais velhas que isso no checkout (antes do MySQL derrubá-las)
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    # O argumento 'pool_pre_ping' verifica a conexão antes de cada checkout.
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
 
 if DATABASE_URL:
     engine = create_engine(
-        DATABASE_URL,
-        # O argumento 'pool_pre_ping' verifica a conexão antes de cada checkout.
-        pool_pre_ping=True,
+        DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS
     )
+    instrument_pool(engine)
 else:
     raise Exception("Variável DATABASE_URL não foi definida")
 # Cria uma fábrica de sessões. Cada instância de SessionLocal será uma sessão de banco de dados.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# Driver assíncrono de cada banco. O SQLite (requer 'pip install aiosqlite')
+# serve como banco ou réplica local para desenvolvimento e testes
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def _async_database_url(url: str, variavel: str) -> str:
+    """Mesma URL do banco com o driver assíncrono (mysql+pymysql -> mysql+aiomysql)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise Exception(
+            f"Defina {variavel} (driver assíncrono) para este banco de dados"
+        )
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Engine assíncrona, usada pelas rotas 'async def' (as mais acessadas): enquanto
+# esperam o banco elas não ocupam uma thread do threadpool
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(
+    DATABASE_URL, "ASYNC_DATABASE_URL"
+)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncAdaptedQueuePool, **POOL_OPTIONS
+)
+instrument_pool(async_engine.sync_engine)
+# 'expire_on_commit=False': depois do commit os objetos continuam legíveis sem
+# nova consulta (numa sessão assíncrona não existe carregamento sob demanda)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Engines da réplica. Sem DATABASE_REPLICA_URL, as sessões "de leitura" usam o primário.
+replica_engine = None
+async_replica_engine = None
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(
+        DATABASE_REPLICA_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS
+    )
+    instrument_pool(replica_engine)
+    async_replica_engine = create_async_engine(
+        os.getenv("ASYNC_DATABASE_REPLICA_URL")
+        or _async_database_url(DATABASE_REPLICA_URL, "ASYNC_DATABASE_REPLICA_URL"),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **POOL_OPTIONS,
+    )
+    instrument_pool(async_replica_engine.sync_engine)
+
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine or engine
+)
+AsyncReplicaSessionLocal = async_sessionmaker(
+    bind=async_replica_engine or async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base para as classes de modelo do SQLAlchemy.
 Base = declarative_base()
 
@@ -34,3 +113,27 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Versão assíncrona de get_db, para as rotas 'async def'.
+    Relacionamentos usados depois da consulta precisam ser carregados nela
+    (joinedload/selectinload).
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dispose_engines_after_fork() -> None:
+    """
+    Descarta os pools herdados do processo pai, para uso logo após um fork
+    (ex: workers do gunicorn com preload). As conexões do pai não podem ser
+    compartilhadas entre processos: 'close=False' apenas as abandona no filho,
+    sem fechar os sockets que o pai ainda usa.
+    """
+    for eng in (engine, async_engine.sync_engine):
+        eng.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+        async_replica_engine.sync_engine.dispose(close=False)
@@ -0,0 +1,133 @@
+"""
+Pool de conexões do banco instrumentado (usado em /internal/metrics).
+
+As classes abaixo são o QueuePool do SQLAlchemy (e a versão para a engine
+assíncrona) medindo cada checkout: quanto tempo a requisição esperou por uma
+conexão (inclui abrir uma nova e o pre-ping), quantas esperas estouraram
+DB_POOL_TIMEOUT_SECONDS e quantas conexões foram descartadas pelo pre-ping.
+Os números de ocupação (em uso, livres, overflow) são lidos do próprio pool.
+"""
+
+import bisect
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Limites (ms) das faixas do histograma de espera por conexão
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Contadores de um pool, atualizados pelas threads das requisições."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.pre_ping_failures = 0
+        self.invalidations = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        # Uma faixa a mais para as esperas acima do último limite
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_checkout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_invalidation(self, exception: Optional[BaseException]) -> None:
+        with self._lock:
+            # O pre-ping que falha invalida a conexão com um DisconnectionError
+            if isinstance(exception, exc.DisconnectionError):
+                self.pre_ping_failures += 1
+            else:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            faixas = {
+                f"ate_{limite}ms": n
+                for limite, n in zip(WAIT_BUCKETS_MS, self.wait_buckets)
+            }
+            faixas[f"acima_{WAIT_BUCKETS_MS[-1]}ms"] = self.wait_buckets[-1]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "falhas_pre_ping": self.pre_ping_failures,
+                "invalidacoes": self.invalidations,
+                "espera_media_ms": (
+                    round(self.wait_total_ms / self.checkouts, 3)
+                    if self.checkouts
+                    else 0.0
+                ),
+                "espera_max_ms": round(self.wait_max_ms, 3),
+                "espera_histograma": faixas,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Mede o checkout de conexões de um QueuePool."""
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout((time.perf_counter() - inicio) * 1000)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() troca o pool por um novo: os contadores continuam
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(
+    _InstrumentedPoolMixin, AsyncAdaptedQueuePool
+):
+    pass
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Liga os contadores ao pool de 'engine' (criada com um dos pools acima)."""
+    engine.pool.metrics = PoolMetrics()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        engine.pool.metrics.record_invalidation(exception)
+
+
+def get_pool_metrics(engine: Engine) -> dict:
+    """Ocupação atual e contadores do pool de 'engine'."""
+    pool = engine.pool
+    tamanho = pool.size()
+    return {
+        "tamanho": tamanho,
+        "max_overflow": pool._max_overflow,
+        "capacidade": tamanho + max(pool._max_overflow, 0),
+        "em_uso": pool.checkedout(),
+        "livres": pool.checkedin(),
+        # Conexões abertas além do 'tamanho' (negativo: o pool ainda não encheu)
+        "overflow": pool.overflow(),
+        **pool.metrics.snapshot(),
+    }
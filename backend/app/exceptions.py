@@ -34,6 +34,32 @@ class StorageLimitExceededError(Exception):
     pass
 
 
+class RangeNotSatisfiableError(Exception):
+    """Lançada quando o header 'Range' pede bytes fora do conteúdo (HTTP 416)."""
+
+    pass
+
+
+class UploadSessionConflictError(Exception):
+    """Lançada quando outra requisição finalizou ou cancelou o mesmo upload (HTTP 409)."""
+
+    pass
+
+
+class PasswordHashingBusyError(Exception):
+    """Lançada quando o pool do Argon2 está lotado (HTTP 503)."""
+
+    pass
+
+
+class LoginThrottledError(Exception):
+    """Lançada quando há tentativas de login demais para o IP ou email (HTTP 429)."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class AuthenticationError(Exception):
     """Lançada quando a autenticação (email/senha) falha."""
 
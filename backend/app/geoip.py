@@ -0,0 +1,232 @@
+"""
+Região (cidade, estado, país) de um IP, mostrada no log e no email dos eventos críticos.
+
+Backends (GEOIP_BACKEND):
+- "ip-api": consulta o ip-api.com (rede, limite de 45 consultas/minuto).
+- "offline": arquivo local com faixas de IP (GEOIP_DATABASE_PATH), no formato
+  CSV do DB-IP "IP to City Lite" (ip_inicio, ip_fim, continente, país,
+  estado, cidade, ...). O arquivo é carregado uma vez em listas ordenadas
+  pelo início da faixa e cada consulta é uma busca binária (bisect).
+- "none": não consulta (região sempre desconhecida).
+
+Os resultados ficam num cache LRU com TTL (GEOIP_CACHE_*). Falhas e IPs sem
+região também são guardados, por GEOIP_NEGATIVE_TTL_SECONDS, para que um
+backend fora do ar não seja consultado de novo a cada evento.
+"""
+
+import bisect
+import csv
+import ipaddress
+import logging
+import socket
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .cache import TTLCache
+from .core import settings
+
+logger = logging.getLogger(__name__)
+
+REGIAO_DESCONHECIDA = "Desconhecida"
+
+
+def _parse_ip(texto: str) -> Tuple[int, int]:
+    """(versão, valor inteiro) do IP; bem mais rápido que ipaddress para milhões de linhas."""
+    if ":" in texto:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, texto), "big")
+    return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, texto), "big")
+
+
+def _format_region(cidade: str, estado: str, pais: str) -> Optional[str]:
+    if not (cidade or estado or pais):
+        return None
+    return f"{cidade}, {estado}, {pais}"
+
+
+class GeoIPResolver(ABC):
+    """Busca a região de um IP público."""
+
+    @abstractmethod
+    def lookup(self, ip: str) -> Optional[str]:
+        """Região do IP, ou None se o backend não a conhece. Lança exceção se falhar."""
+
+
+class IpApiResolver(GeoIPResolver):
+    """Consulta o ip-api.com, reaproveitando a conexão HTTP entre as consultas."""
+
+    def __init__(self, timeout_seconds: float):
+        self._client = httpx.Client(
+            base_url="http://ip-api.com", timeout=timeout_seconds
+        )
+
+    def lookup(self, ip: str) -> Optional[str]:
+        response = self._client.get(f"/json/{ip}")
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") == "fail":
+            return None
+        return _format_region(
+            data.get("city", ""), data.get("region", ""), data.get("country", "")
+        )
+
+
+class OfflineResolver(GeoIPResolver):
+    """
+    Faixas de IP de um arquivo local, em listas ordenadas pelo início da faixa.
+    O IPv4 fica em arrays de inteiros (menos memória); o IPv6, em listas.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        # Nomes de região sem repetição; as faixas guardam o índice
+        self._regioes: List[str] = []
+        self._v4_inicio = array("Q")
+        self._v4_fim = array("Q")
+        self._v4_regiao = array("I")
+        self._v6_inicio: List[int] = []
+        self._v6_fim: List[int] = []
+        self._v6_regiao: List[int] = []
+
+    def _load(self) -> None:
+        indices: Dict[str, int] = {}
+        faixas_v4 = []
+        faixas_v6 = []
+        with open(self.path, newline="", encoding="utf-8") as arquivo:
+            for linha in csv.reader(arquivo):
+                if len(linha) < 6:
+                    continue
+                try:
+                    versao, inicio = _parse_ip(linha[0])
+                    _, fim = _parse_ip(linha[1])
+                except OSError:
+                    continue  # cabeçalho ou linha inválida
+                regiao = _format_region(linha[5], linha[4], linha[3])
+                if regiao is None:
+                    continue
+                indice = indices.setdefault(regiao, len(indices))
+                destino = faixas_v4 if versao == 4 else faixas_v6
+                destino.append((inicio, fim, indice))
+
+        faixas_v4.sort()
+        faixas_v6.sort()
+        self._regioes = list(indices)
+        self._v4_inicio = array("Q", (f[0] for f in faixas_v4))
+        self._v4_fim = array("Q", (f[1] for f in faixas_v4))
+        self._v4_regiao = array("I", (f[2] for f in faixas_v4))
+        self._v6_inicio = [f[0] for f in faixas_v6]
+        self._v6_fim = [f[1] for f in faixas_v6]
+        self._v6_regiao = [f[2] for f in faixas_v6]
+        logger.info(
+            f"Base GeoIP carregada: {len(faixas_v4)} faixa(s) IPv4 e "
+            f"{len(faixas_v6)} IPv6 de {self.path}."
+        )
+
+    def _ensure_loaded(self) -> None:
+        # Carrega na primeira consulta (que roda em background), não na subida da API
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def lookup(self, ip: str) -> Optional[str]:
+        self._ensure_loaded()
+        versao, valor = _parse_ip(ip)
+        if versao == 4:
+            inicios, fins, regioes = self._v4_inicio, self._v4_fim, self._v4_regiao
+        else:
+            inicios, fins, regioes = self._v6_inicio, self._v6_fim, self._v6_regiao
+        # Última faixa que começa antes (ou em) 'valor'
+        posicao = bisect.bisect_right(inicios, valor) - 1
+        if posicao < 0 or valor > fins[posicao]:
+            return None
+        return self._regioes[regioes[posicao]]
+
+
+class NullResolver(GeoIPResolver):
+    def lookup(self, ip: str) -> Optional[str]:
+        return None
+
+
+class CachedResolver:
+    """Resolver com cache LRU+TTL, inclusive das falhas (cache negativo)."""
+
+    def __init__(self, resolver: GeoIPResolver, cache: TTLCache[str, str]):
+        self.resolver = resolver
+        self._cache = cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def resolve(self, ip: str) -> str:
+        regiao = self._cache.get(ip)
+        if regiao is not None:
+            with self._lock:
+                self.hits += 1
+            return regiao
+        with self._lock:
+            self.misses += 1
+
+        try:
+            regiao = self.resolver.lookup(ip)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            logger.error(f"Falha ao buscar GeoIP para {ip}: {e}")
+            regiao = None
+        if regiao is None:
+            self._cache.set(
+                ip, REGIAO_DESCONHECIDA, ttl_seconds=settings.GEOIP_NEGATIVE_TTL_SECONDS
+            )
+            return REGIAO_DESCONHECIDA
+        self._cache.set(ip, regiao)
+        return regiao
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "backend": settings.GEOIP_BACKEND,
+                "itens_no_cache": len(self._cache),
+                "acertos_cache": self.hits,
+                "consultas": self.misses,
+                "falhas": self.failures,
+            }
+
+
+@lru_cache
+def get_resolver() -> CachedResolver:
+    if settings.GEOIP_BACKEND == "offline":
+        resolver: GeoIPResolver = OfflineResolver(settings.GEOIP_DATABASE_PATH)
+    elif settings.GEOIP_BACKEND == "ip-api":
+        resolver = IpApiResolver(settings.GEOIP_TIMEOUT_SECONDS)
+    else:
+        resolver = NullResolver()
+    cache: TTLCache[str, str] = TTLCache(
+        max_size=settings.GEOIP_CACHE_MAX_SIZE,
+        ttl_seconds=settings.GEOIP_CACHE_TTL_SECONDS,
+    )
+    return CachedResolver(resolver, cache)
+
+
+def resolve_region(ip: Optional[str]) -> str:
+    """Região do IP, ou "Desconhecida" (IP inválido, local/privado ou não encontrado)."""
+    try:
+        endereco = ipaddress.ip_address(ip or "")
+    except ValueError:
+        return REGIAO_DESCONHECIDA
+    if not endereco.is_global:
+        return REGIAO_DESCONHECIDA
+    return get_resolver().resolve(str(endereco))
+
+
+def get_metrics() -> dict:
+    return get_resolver().snapshot()
@@ -0,0 +1,216 @@
+"""
+Hash e verificação de senhas (Argon2) em um pool de processos dedicado.
+
+O Argon2 é lento de propósito e, rodando nas próprias rotas síncronas, uma
+rajada de logins ocupa todas as threads do servidor. Aqui cada operação vai
+para um ProcessPoolExecutor com um limite de operações simultâneas
+(ARGON2_POOL_WORKERS executando + ARGON2_POOL_QUEUE_SIZE aguardando).
+Acima do limite a operação é recusada na hora com PasswordHashingBusyError
+(a API responde 503), então no máximo esse número de threads fica esperando
+pelo Argon2 e as demais rotas continuam respondendo.
+
+Com ARGON2_POOL_WORKERS=0 o Argon2 roda na própria thread (com o mesmo limite).
+
+As funções '*_async' (rotas assíncronas) aguardam o pool sem bloquear o event loop.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+
+from . import core
+from .core import settings
+from .exceptions import PasswordHashingBusyError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Vagas do pool: operações executando + aguardando na fila
+_capacidade = max(settings.ARGON2_POOL_WORKERS, 1) + settings.ARGON2_POOL_QUEUE_SIZE
+_slots = threading.BoundedSemaphore(_capacidade)
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "em_andamento": 0,
+    "concluidas": 0,
+    "recusadas": 0,
+    "falhas": 0,
+    "tempo_total_ms": 0.0,
+}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # 'spawn': o processo filho não herda conexões do banco nem threads do servidor
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.ARGON2_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Descarta um pool quebrado (ex: processo filho morto); o próximo uso cria outro."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _release(inicio: float, falhou: bool) -> None:
+    with _metrics_lock:
+        _metrics["em_andamento"] -= 1
+        _metrics["falhas" if falhou else "concluidas"] += 1
+        _metrics["tempo_total_ms"] += (time.perf_counter() - inicio) * 1000
+    _slots.release()
+
+
+def _acquire() -> float:
+    """Ocupa uma vaga do pool (ou recusa na hora) e retorna o início da operação."""
+    if not _slots.acquire(blocking=False):
+        with _metrics_lock:
+            _metrics["recusadas"] += 1
+        raise PasswordHashingBusyError(
+            "Servidor ocupado processando outros logins. Tente novamente em instantes."
+        )
+    with _metrics_lock:
+        _metrics["em_andamento"] += 1
+    return time.perf_counter()
+
+
+def _run_inline(inicio: float, func: Callable[..., T], *args) -> T:
+    falhou = True
+    try:
+        result = func(*args)
+        falhou = False
+        return result
+    finally:
+        _release(inicio, falhou)
+
+
+def _submit(
+    inicio: float, func: Callable[..., T], *args
+) -> tuple[ProcessPoolExecutor, Future]:
+    executor = _get_executor()
+    try:
+        future: Future = executor.submit(func, *args)
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        _release(inicio, True)
+        raise
+    except BaseException:
+        _release(inicio, True)
+        raise
+    # A vaga só é liberada quando o processo termina (mesmo se a espera estourar o prazo)
+    future.add_done_callback(
+        lambda f: _release(inicio, f.cancelled() or f.exception() is not None)
+    )
+    return executor, future
+
+
+def _timeout_error() -> PasswordHashingBusyError:
+    return PasswordHashingBusyError(
+        "Tempo esgotado aguardando a verificação da senha. Tente novamente em instantes."
+    )
+
+
+def _run(func: Callable[..., T], *args) -> T:
+    """Executa 'func' no pool, recusando na hora se todas as vagas estiverem ocupadas."""
+    inicio = _acquire()
+    if settings.ARGON2_POOL_WORKERS <= 0:
+        return _run_inline(inicio, func, *args)
+
+    executor, future = _submit(inicio, func, *args)
+    try:
+        return future.result(timeout=settings.ARGON2_POOL_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        raise _timeout_error()
+    except BrokenProcessPool:
+        logger.error("Pool do Argon2 quebrado; um novo será criado.", exc_info=True)
+        _discard_executor(executor)
+        raise
+
+
+async def _run_async(func: Callable[..., T], *args) -> T:
+    """Como _run, mas aguarda o resultado sem bloquear o event loop."""
+    inicio = _acquire()
+    if settings.ARGON2_POOL_WORKERS <= 0:
+        return await asyncio.to_thread(_run_inline, inicio, func, *args)
+
+    executor, future = _submit(inicio, func, *args)
+    try:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future), timeout=settings.ARGON2_POOL_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise _timeout_error()
+    except BrokenProcessPool:
+        logger.error("Pool do Argon2 quebrado; um novo será criado.", exc_info=True)
+        _discard_executor(executor)
+        raise
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha (core.verify_password) no pool do Argon2."""
+    return _run(core.verify_password, plain_password, hashed_password)
+
+
+def verify_and_rehash_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Verifica a senha e refaz hashes desatualizados (ver core) no pool do Argon2."""
+    return _run(core.verify_and_rehash_password, plain_password, hashed_password)
+
+
+async def verify_and_rehash_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Versão assíncrona de verify_and_rehash_password."""
+    return await _run_async(
+        core.verify_and_rehash_password, plain_password, hashed_password
+    )
+
+
+def get_password_hash(password: str) -> str:
+    """Gera o hash da senha (core.get_password_hash) no pool do Argon2."""
+    return _run(core.get_password_hash, password)
+
+
+def get_metrics() -> dict:
+    """Estado atual do pool do Argon2 (usado em /internal/metrics)."""
+    workers = settings.ARGON2_POOL_WORKERS
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    finalizadas = metrics["concluidas"] + metrics["falhas"]
+    em_andamento = metrics.pop("em_andamento")
+    tempo_total_ms = metrics.pop("tempo_total_ms")
+    return {
+        "processos": workers,
+        "capacidade": _capacidade,
+        "executando": min(em_andamento, max(workers, 1)),
+        "na_fila": max(em_andamento - max(workers, 1), 0),
+        "tempo_medio_ms": round(tempo_total_ms / finalizadas, 2) if finalizadas else 0.0,
+        **metrics,
+    }
+
+
+def shutdown() -> None:
+    """Encerra os processos do pool (chamado quando a API é desligada)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,217 @@
+"""
+Configuração dos logs da API e dos comandos do manage.py.
+
+As rotas só colocam o registro numa fila (QueueHandler); uma thread separada
+(QueueListener) formata e escreve no stderr, então a escrita (e a formatação
+de tracebacks dos 'exc_info=True') não acontece durante a requisição. Com a
+fila cheia o registro é descartado em vez de esperar.
+
+Configuração (.env):
+- LOG_LEVEL: nível geral; LOG_LEVELS: níveis por módulo ("httpx=WARNING,...").
+- LOG_FORMAT: "text" (uma linha legível) ou "json" (um objeto por linha).
+- LOG_SAMPLE_*: amostragem de avisos/erros repetidos. Cada ponto do código
+  (arquivo e linha) registra no máximo LOG_SAMPLE_MAX_PER_WINDOW deles por
+  janela; os demais são contados e informados no primeiro registro da janela
+  seguinte (ex: uma consulta de região por IP falhando em toda requisição).
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from .core import settings
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)-8s - %(name)-25s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Acima dessa quantidade de pontos do código acompanhados, as janelas velhas são removidas
+_SAMPLE_SWEEP_THRESHOLD = 10_000
+
+
+def parse_levels(value: str) -> Dict[str, str]:
+    """'sqlalchemy=WARNING,httpx=ERROR' -> {'sqlalchemy': 'WARNING', 'httpx': 'ERROR'}"""
+    niveis = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        nome, _, nivel = item.partition("=")
+        if not nivel.strip():
+            raise ValueError(f"LOG_LEVELS inválido: '{item}' (use modulo=NIVEL)")
+        niveis[nome.strip()] = nivel.strip().upper()
+    return niveis
+
+
+class SamplingFilter(logging.Filter):
+    """Limita os avisos/erros repetidos de um mesmo ponto do código por janela."""
+
+    def __init__(
+        self, window_seconds: float, max_per_window: int, min_level=logging.WARNING
+    ):
+        super().__init__()
+        self.window_seconds = window_seconds
+        self.max_per_window = max_per_window
+        self.min_level = min_level
+        self.suppressed = 0
+        # (logger, arquivo, linha) -> [início da janela, registrados, suprimidos]
+        self._windows: Dict[Tuple[str, str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or self.max_per_window <= 0:
+            return True
+        chave = (record.name, record.pathname, record.lineno)
+        agora = time.monotonic()
+        with self._lock:
+            janela = self._windows.get(chave)
+            if janela is None or agora - janela[0] >= self.window_seconds:
+                if janela is not None and janela[2]:
+                    record.suprimidos = janela[2]
+                self._windows[chave] = [agora, 1, 0]
+                if len(self._windows) > _SAMPLE_SWEEP_THRESHOLD:
+                    self._sweep(agora)
+                return True
+            if janela[1] < self.max_per_window:
+                janela[1] += 1
+                return True
+            janela[2] += 1
+            self.suppressed += 1
+            return False
+
+    def _sweep(self, agora: float) -> None:
+        for chave in [
+            c for c, j in self._windows.items() if agora - j[0] >= self.window_seconds
+        ]:
+            del self._windows[chave]
+
+
+class TextFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        # Antes do traceback (que format() acrescenta depois)
+        texto = super().formatMessage(record)
+        suprimidos = getattr(record, "suprimidos", 0)
+        if suprimidos:
+            texto += f" (+{suprimidos} semelhante(s) suprimido(s) na janela anterior)"
+        return texto
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha (para coletores de log)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "data_hora": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "arquivo": f"{record.module}:{record.lineno}",
+            "processo": record.process,
+        }
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        suprimidos = getattr(record, "suprimidos", 0)
+        if suprimidos:
+            dados["suprimidos"] = suprimidos
+        return json.dumps(dados, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler que descarta o registro com a fila cheia e não formata nada."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só resolve a mensagem (os argumentos podem mudar depois); o traceback
+        # é formatado pela thread do listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_sampler: Optional[SamplingFilter] = None
+
+
+def _build_output_handler() -> logging.Handler:
+    saida = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        saida.setFormatter(JsonFormatter())
+    else:
+        saida.setFormatter(TextFormatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+    return saida
+
+
+def _new_queue() -> queue.Queue:
+    return queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+
+
+def _start_listener(output: logging.Handler) -> None:
+    global _listener
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork() -> None:
+    # A thread do listener não existe no processo filho (ex: gunicorn --preload);
+    # a fila também é trocada, pois seus locks podiam estar presos no fork
+    if _listener is not None:
+        _handler.queue = _new_queue()
+        _start_listener(_listener.handlers[0])
+
+
+def setup_logging() -> None:
+    """Liga a fila de logs no logger raiz. Chamadas repetidas não fazem nada."""
+    global _handler, _sampler
+    if _handler is not None:
+        return
+
+    _handler = NonBlockingQueueHandler(_new_queue())
+    _sampler = SamplingFilter(
+        settings.LOG_SAMPLE_WINDOW_SECONDS, settings.LOG_SAMPLE_MAX_PER_WINDOW
+    )
+    _handler.addFilter(_sampler)
+    _start_listener(_build_output_handler())
+
+    raiz = logging.getLogger()
+    for antigo in list(raiz.handlers):
+        raiz.removeHandler(antigo)
+    raiz.addHandler(_handler)
+    raiz.setLevel(settings.LOG_LEVEL.upper())
+    for nome, nivel in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(nome).setLevel(nivel)
+
+    os.register_at_fork(after_in_child=_restart_after_fork)
+    # Escreve o que ainda estiver na fila ao encerrar o processo
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def get_metrics() -> dict:
+    """Registros descartados (fila cheia) e suprimidos pela amostragem neste worker."""
+    if _handler is None:
+        return {}
+    return {
+        "na_fila": _handler.queue.qsize(),
+        "descartados": _handler.dropped,
+        "suprimidos": _sampler.suppressed,
+    }
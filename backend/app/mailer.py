@@ -0,0 +1,259 @@
+"""
+Envio dos emails de alerta por conexões SMTP persistentes.
+
+Abrir uma conexão por email (TCP + TLS + login) custa mais que o próprio envio
+e, numa rajada de logins, quase todo o tempo ia para os handshakes. Aqui
+send_message só coloca o email numa fila (sem esperar a rede) e
+EMAIL_POOL_SIZE threads enviam, cada uma com a sua conexão já autenticada:
+os emails da fila saem um atrás do outro pela mesma conexão.
+
+- Antes de reutilizar uma conexão parada há mais de EMAIL_HEALTH_CHECK_SECONDS,
+  um NOOP verifica se o servidor ainda a mantém; se não, reconecta.
+- Se a conexão cair no meio do envio, reconecta e tenta mais uma vez.
+- Conexões sem uso por EMAIL_CONNECTION_MAX_IDLE_SECONDS são fechadas.
+- Com a fila cheia (EMAIL_QUEUE_SIZE) o email é descartado e contado.
+
+Para testar localmente, sem o Gmail: 'python -m aiosmtpd -n -l localhost:1025'
+com EMAIL_SMTP_HOST=localhost, EMAIL_SMTP_PORT=1025 e EMAIL_SMTP_SECURITY=none.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import List, Optional
+
+from .core import settings
+
+logger = logging.getLogger(__name__)
+
+# Sinal para uma thread de envio encerrar (depois dos emails já na fila)
+_STOP = object()
+
+
+def _is_connection_error(e: Exception) -> bool:
+    """Erros em que vale reconectar e reenviar (e não, ex: destinatário recusado)."""
+    if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+        return True
+    # 421: o servidor está encerrando a conexão
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code == 421
+
+
+class Mailer:
+    """Fila de emails e as threads de envio, cada uma com a sua conexão SMTP."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        security: str,
+        user: str,
+        password: str,
+        pool_size: int,
+        queue_size: int,
+        timeout_seconds: float,
+        health_check_seconds: float,
+        max_idle_seconds: float,
+    ):
+        self.host = host
+        self.port = port
+        self.security = security
+        self.user = user
+        self.password = password
+        self.pool_size = max(pool_size, 1)
+        self.timeout_seconds = timeout_seconds
+        self.health_check_seconds = health_check_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failures = 0
+        self.dropped = 0
+        # Conexões abertas agora e o total já aberto (reconexões incluídas)
+        self.open_connections = 0
+        self.opened_connections = 0
+
+    def send_message(self, msg: EmailMessage) -> bool:
+        """Coloca o email na fila de envio. False se a fila estiver cheia."""
+        self._ensure_threads()
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.error(f"Fila de emails cheia: email para {msg['To']} descartado.")
+            return False
+        return True
+
+    def _ensure_threads(self) -> None:
+        # As threads não sobrevivem a um fork: cada processo inicia as suas
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"smtp-{i}", daemon=True)
+                for i in range(self.pool_size)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.security == "ssl":
+            smtp: smtplib.SMTP = smtplib.SMTP_SSL(
+                self.host,
+                self.port,
+                timeout=self.timeout_seconds,
+                context=ssl.create_default_context(),
+            )
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout_seconds)
+            if self.security == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+        try:
+            if self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            self._quit(smtp)
+            raise
+        with self._lock:
+            self.open_connections += 1
+            self.opened_connections += 1
+        return smtp
+
+    def _close(self, smtp: Optional[smtplib.SMTP]) -> None:
+        """Fecha uma conexão aberta por _connect."""
+        if smtp is None:
+            return
+        self._quit(smtp)
+        with self._lock:
+            self.open_connections -= 1
+
+    @staticmethod
+    def _quit(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    @staticmethod
+    def _healthy(smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _worker(self) -> None:
+        smtp: Optional[smtplib.SMTP] = None
+        ultimo_uso = 0.0
+        while True:
+            try:
+                msg = self._queue.get(timeout=self.max_idle_seconds)
+            except queue.Empty:
+                # Ociosa: não segura a conexão no servidor
+                self._close(smtp)
+                smtp = None
+                continue
+            try:
+                if msg is _STOP:
+                    self._close(smtp)
+                    return
+                if (
+                    smtp is not None
+                    and time.monotonic() - ultimo_uso > self.health_check_seconds
+                    and not self._healthy(smtp)
+                ):
+                    self._close(smtp)
+                    smtp = None
+                smtp = self._deliver(smtp, msg)
+                ultimo_uso = time.monotonic()
+            finally:
+                self._queue.task_done()
+
+    def _deliver(
+        self, smtp: Optional[smtplib.SMTP], msg: EmailMessage
+    ) -> Optional[smtplib.SMTP]:
+        """Envia 'msg' (reconectando uma vez se a conexão cair). Retorna a conexão a reutilizar."""
+        for tentativa in (1, 2):
+            try:
+                if smtp is None:
+                    smtp = self._connect()
+                smtp.send_message(msg)
+                with self._lock:
+                    self.sent += 1
+                logger.info(f"Email enviado com sucesso para {msg['To']}.")
+                return smtp
+            except Exception as e:
+                if _is_connection_error(e):
+                    self._close(smtp)
+                    smtp = None
+                    if tentativa == 1:
+                        continue
+                with self._lock:
+                    self.failures += 1
+                # Se o envio de email falhar, apenas logamos.
+                logger.error(f"Falha ao enviar email para {msg['To']}: {e}")
+                return smtp
+        return smtp
+
+    def shutdown(self, timeout_seconds: float = 10) -> None:
+        """Envia o que ainda está na fila e encerra as threads e conexões."""
+        if self._pid != os.getpid():
+            return
+        prazo = time.monotonic() + timeout_seconds
+        for _ in self._threads:
+            try:
+                self._queue.put(_STOP, timeout=max(prazo - time.monotonic(), 0.01))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=max(prazo - time.monotonic(), 0))
+        self._pid = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "na_fila": self._queue.qsize(),
+                "enviados": self.sent,
+                "falhas": self.failures,
+                "descartados": self.dropped,
+                "conexoes_abertas": self.open_connections,
+                "conexoes_criadas": self.opened_connections,
+            }
+
+
+@lru_cache
+def get_mailer() -> Mailer:
+    mailer = Mailer(
+        host=settings.EMAIL_SMTP_HOST,
+        port=settings.EMAIL_SMTP_PORT,
+        security=settings.EMAIL_SMTP_SECURITY,
+        user=settings.EMAIL_HOST_USER,
+        password=settings.EMAIL_HOST_PASSWORD,
+        pool_size=settings.EMAIL_POOL_SIZE,
+        queue_size=settings.EMAIL_QUEUE_SIZE,
+        timeout_seconds=settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+        health_check_seconds=settings.EMAIL_HEALTH_CHECK_SECONDS,
+        max_idle_seconds=settings.EMAIL_CONNECTION_MAX_IDLE_SECONDS,
+    )
+    atexit.register(mailer.shutdown)
+    return mailer
+
+
+def shutdown() -> None:
+    if get_mailer.cache_info().currsize:
+        get_mailer().shutdown()
+
+
+def get_metrics() -> dict:
+    return get_mailer().snapshot()
@@ -7,18 +7,38 @@ from sqlalchemy import (
     BigInteger,
     Column,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
     String,
     Table,
     Text,
 )
 from sqlalchemy.dialects.mysql import ENUM as MysqlEnum
 from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from .database import Base
 
+
+# Tipos do MySQL no SQLite, para criar as tabelas (Base.metadata.create_all)
+# num banco ou réplica local de desenvolvimento e testes
+@compiles(LONGBLOB, "sqlite")
+def _longblob_sqlite(type_, compiler, **kw):
+    return "BLOB"
+
+
+@compiles(LONGTEXT, "sqlite")
+def _longtext_sqlite(type_, compiler, **kw):
+    return "TEXT"
+
+
+@compiles(MysqlEnum, "sqlite")
+def _enum_sqlite(type_, compiler, **kw):
+    return "VARCHAR(20)"
+
 # Tabela de Associação (Muitos-para-Muitos)
 dados_separadores_association = Table(
     "dados_separadores",
@@ -59,6 +79,8 @@ class Usuario(Base):
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     saltKDF: Mapped[str] = mapped_column(String(1024))
     armazenamento_total: Mapped[int] = mapped_column(BigInteger, default=5368709120)
+    # Soma de 'arquivos.tamanho' do usuário, mantida a cada criação/edição/remoção
+    armazenamento_usado: Mapped[int] = mapped_column(BigInteger, default=0)
 
     # Relacionamentos tipados
     dados: Mapped[List["Dado"]] = relationship(
@@ -81,6 +103,10 @@ class Usuario(Base):
 
 class Dado(Base):
     __tablename__ = "dados"
+    # Índice usado pela paginação por cursor (criado_em, id) das listagens
+    __table_args__ = (
+        Index("idx_dados_usuario_criado", "usuario_id", "criado_em", "id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     usuario_id: Mapped[int] = mapped_column(
         ForeignKey("usuario.id", ondelete="CASCADE")
@@ -110,25 +136,45 @@ class Dado(Base):
 
 class Arquivo(Base):
     __tablename__ = "arquivos"
+    __table_args__ = (Index("idx_arquivos_blob_ref", "blob_ref"),)
     id: Mapped[int] = mapped_column(
         ForeignKey("dados.id", ondelete="CASCADE"), primary_key=True
     )
-    arquivo: Mapped[bytes] = mapped_column(LONGBLOB)
+    # 'deferred': o conteúdo só é lido do banco quando for acessado explicitamente.
+    # Fica NULL quando o conteúdo está no armazenamento em disco (ver 'blob_ref')
+    arquivo: Mapped[Optional[bytes]] = mapped_column(LONGBLOB, deferred=True)
+    # SHA-256 do conteúdo quando ele está no armazenamento em disco (app/storage.py)
+    blob_ref: Mapped[Optional[str]] = mapped_column(String(64))
     iv_arquivo: Mapped[Optional[str]] = mapped_column(String(64))
     extensao: Mapped[str] = mapped_column(String(50))
     nome_arquivo: Mapped[str] = mapped_column(String(255))
+    # Tamanho (em bytes) do conteúdo criptografado, para não precisar ler o LONGBLOB
+    tamanho: Mapped[int] = mapped_column(BigInteger, default=0)
+    # SHA-256 do conteúdo (em qualquer backend), usado como ETag forte nos downloads
+    hash_conteudo: Mapped[Optional[str]] = mapped_column(String(64))
 
     dado: Mapped["Dado"] = relationship(back_populates="arquivo")
 
 
 class Senha(Base):
     __tablename__ = "senhas"
+    # A busca por host da extensão começa pelas credenciais do próprio usuário
+    __table_args__ = (
+        Index("idx_senhas_usuario_host", "usuario_id", "host_normalizado"),
+    )
     id: Mapped[int] = mapped_column(
         ForeignKey("dados.id", ondelete="CASCADE"), primary_key=True
     )
+    # Cópia de 'dados.usuario_id' (para o índice acima); NULL nas credenciais
+    # antigas até rodar 'manage.py normalize-hosts'
+    usuario_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("usuario.id", ondelete="CASCADE")
+    )
     senha_cripto: Mapped[str] = mapped_column(TEXT)
     iv_senha_cripto: Mapped[str] = mapped_column(String(64))
     host_url: Mapped[Optional[str]] = mapped_column(String(1024))
+    # Domínio registrável (eTLD+1) de 'host_url', usado na busca por host da extensão
+    host_normalizado: Mapped[Optional[str]] = mapped_column(String(255))
     email: Mapped[str] = mapped_column(String(255))
     dado: Mapped["Dado"] = relationship(back_populates="senha")
 
@@ -190,6 +236,7 @@ class Compartilhamento(Base):
 
 class DadosCompartilhados(Base):
     __tablename__ = "dados_compartilhados"
+    __table_args__ = (Index("idx_dados_compartilhados_blob_ref", "blob_ref"),)
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     compartilhamento_id: Mapped[int] = mapped_column(
         ForeignKey("compartilhamento.id", ondelete="CASCADE")
@@ -197,7 +244,9 @@ class DadosCompartilhados(Base):
     dado_origem_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("dados.id", ondelete="SET NULL")
     )
-    dado_criptografado: Mapped[bytes] = mapped_column(LONGBLOB)
+    # NULL quando o conteúdo está no armazenamento em disco (ver 'blob_ref')
+    dado_criptografado: Mapped[Optional[bytes]] = mapped_column(LONGBLOB)
+    blob_ref: Mapped[Optional[str]] = mapped_column(String(64))
     iv_dado: Mapped[str] = mapped_column(String(64))
     meta: Mapped[Optional[str]] = mapped_column(LONGTEXT)
     criado_em: Mapped[datetime] = mapped_column(server_default=func.now())
@@ -237,3 +286,61 @@ class Log(Base):
     )
     usuario: Mapped[Optional["Usuario"]] = relationship(back_populates="logs")
     dado: Mapped[Optional["Dado"]] = relationship(back_populates="logs")
+
+
+class SessaoUpload(Base):
+    """Upload de arquivo em partes (chunks), ainda não finalizado."""
+
+    __tablename__ = "sessoes_upload"
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    usuario_id: Mapped[int] = mapped_column(
+        ForeignKey("usuario.id", ondelete="CASCADE"), index=True
+    )
+    nome_aplicacao: Mapped[str] = mapped_column(String(255))
+    descricao: Mapped[Optional[str]] = mapped_column(Text)
+    iv_arquivo: Mapped[str] = mapped_column(String(64))
+    extensao: Mapped[str] = mapped_column(String(50))
+    nome_arquivo: Mapped[str] = mapped_column(String(255))
+    id_pasta: Mapped[Optional[int]] = mapped_column(Integer)
+    id_tags: Mapped[List[int]] = mapped_column(JSON, default=list)
+    tamanho_total: Mapped[int] = mapped_column(BigInteger)
+    tamanho_chunk: Mapped[int] = mapped_column(Integer)
+    criado_em: Mapped[datetime] = mapped_column(server_default=func.now())
+    expira_em: Mapped[datetime] = mapped_column(index=True)
+
+
+class Sessao(Base):
+    """
+    Sessão de login, identificada pelo refresh token (guardado apenas como hash).
+    O token é trocado a cada uso; o anterior é guardado para detectar reuso.
+    """
+
+    __tablename__ = "sessoes"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    usuario_id: Mapped[int] = mapped_column(
+        ForeignKey("usuario.id", ondelete="CASCADE"), index=True
+    )
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    token_anterior_hash: Mapped[Optional[str]] = mapped_column(String(64), index=True)
+    dispositivo: Mapped[Optional[str]] = mapped_column(String(255))
+    ip: Mapped[Optional[str]] = mapped_column(String(45))
+    criado_em: Mapped[datetime] = mapped_column(server_default=func.now())
+    ultimo_uso_em: Mapped[datetime]
+    expira_em: Mapped[datetime] = mapped_column(index=True)
+    # Indexada para a sincronização das sessões revogadas (ver app.revocation)
+    revogada_em: Mapped[Optional[datetime]] = mapped_column(index=True)
+
+
+class TokenRevogado(Base):
+    """Access token (JWT) revogado antes de expirar, identificado pela claim 'jti'."""
+
+    __tablename__ = "tokens_revogados"
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    usuario_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("usuario.id", ondelete="CASCADE")
+    )
+    # Depois do 'exp' do token a revogação não é mais necessária
+    expira_em: Mapped[datetime] = mapped_column(index=True)
+    revogado_em: Mapped[datetime] = mapped_column(
+        server_default=func.now(), index=True
+    )
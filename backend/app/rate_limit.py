@@ -0,0 +1,212 @@
+"""
+Limite de tentativas de login (janela deslizante por IP e por email).
+
+Cada falha de login é registrada com o seu horário. Antes de verificar a senha
+(Argon2), o login é recusado (HTTP 429 com 'Retry-After') quando:
+- o email passou de LOGIN_FREE_ATTEMPTS falhas na janela: cada nova tentativa
+  precisa esperar um atraso que dobra a cada falha (até LOGIN_MAX_DELAY_SECONDS);
+- o email ou o IP chegaram ao máximo de falhas na janela: bloqueio até a
+  falha mais antiga sair da janela.
+
+O estado fica na memória do processo (RATE_LIMIT_BACKEND=memory) ou em um
+Redis (ou compatível: Valkey, KeyDB...) compartilhado entre os workers
+(RATE_LIMIT_BACKEND=redis).
+"""
+
+import hashlib
+import logging
+import math
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, Optional, Tuple
+
+from .core import settings
+from .exceptions import LoginThrottledError
+
+logger = logging.getLogger(__name__)
+
+# (quantidade de falhas na janela, horário da mais antiga, horário da mais recente)
+WindowState = Tuple[int, Optional[float], Optional[float]]
+
+
+class RateLimitBackend(ABC):
+    """Guarda os horários das falhas de cada chave, numa janela deslizante."""
+
+    @abstractmethod
+    def record(self, key: str, window_seconds: int) -> None:
+        """Registra uma falha agora para 'key'."""
+
+    @abstractmethod
+    def get_window(self, key: str, window_seconds: int) -> WindowState:
+        """Retorna as falhas de 'key' nos últimos 'window_seconds'."""
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Apaga as falhas de 'key' (ex: após um login correto)."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Estado na memória do processo (cada worker tem o seu)."""
+
+    # Acima dessa quantidade de chaves, as janelas vazias são removidas
+    _SWEEP_THRESHOLD = 100_000
+
+    def __init__(self):
+        self._hits: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, key: str, limite: float) -> Optional[Deque[float]]:
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        while hits and hits[0] <= limite:
+            hits.popleft()
+        if not hits:
+            del self._hits[key]
+            return None
+        return hits
+
+    def record(self, key: str, window_seconds: int) -> None:
+        agora = time.time()
+        with self._lock:
+            self._prune(key, agora - window_seconds)
+            self._hits.setdefault(key, deque()).append(agora)
+            if len(self._hits) > self._SWEEP_THRESHOLD:
+                for k in list(self._hits):
+                    self._prune(k, agora - window_seconds)
+
+    def get_window(self, key: str, window_seconds: int) -> WindowState:
+        with self._lock:
+            hits = self._prune(key, time.time() - window_seconds)
+            if not hits:
+                return 0, None, None
+            return len(hits), hits[0], hits[-1]
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Estado em um Redis compartilhado entre os workers.
+    Cada chave é um sorted set com o horário de cada falha como score.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis requer o pacote 'redis' (pip install redis)."
+            ) from e
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def record(self, key: str, window_seconds: int) -> None:
+        agora = time.time()
+        # Membro único por falha (duas falhas no mesmo instante não se sobrescrevem)
+        membro = f"{agora}:{secrets.token_hex(4)}"
+        pipe = self._redis.pipeline()
+        pipe.zremrangebyscore(key, "-inf", agora - window_seconds)
+        pipe.zadd(key, {membro: agora})
+        pipe.expire(key, window_seconds)
+        pipe.execute()
+
+    def get_window(self, key: str, window_seconds: int) -> WindowState:
+        pipe = self._redis.pipeline()
+        pipe.zremrangebyscore(key, "-inf", time.time() - window_seconds)
+        pipe.zcard(key)
+        pipe.zrange(key, 0, 0, withscores=True)
+        pipe.zrange(key, -1, -1, withscores=True)
+        _, count, oldest, newest = pipe.execute()
+        if not count:
+            return 0, None, None
+        return count, oldest[0][1], newest[0][1]
+
+    def reset(self, key: str) -> None:
+        self._redis.delete(key)
+
+
+@lru_cache
+def get_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitBackend()
+
+
+def _email_key(email: str) -> str:
+    # O email entra como hash, para não guardar emails no Redis
+    digest = hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()
+    return f"login:email:{digest[:32]}"
+
+
+def _ip_key(ip: str) -> str:
+    return f"login:ip:{ip}"
+
+
+def _retry_after(email_state: WindowState, ip_state: WindowState) -> float:
+    """Segundos até o próximo login permitido (0 se já pode tentar)."""
+    janela = settings.LOGIN_FAILURE_WINDOW_SECONDS
+    agora = time.time()
+    espera = 0.0
+
+    for (count, oldest, _), maximo in (
+        (email_state, settings.LOGIN_MAX_FAILURES_PER_EMAIL),
+        (ip_state, settings.LOGIN_MAX_FAILURES_PER_IP),
+    ):
+        if count >= maximo and oldest is not None:
+            # Bloqueio: até a falha mais antiga sair da janela
+            espera = max(espera, oldest + janela - agora)
+
+    count, _, newest = email_state
+    excedentes = count - settings.LOGIN_FREE_ATTEMPTS
+    if excedentes > 0 and newest is not None:
+        # Atraso progressivo: 1s, 2s, 4s... após as tentativas livres
+        atraso = min(2 ** (excedentes - 1), settings.LOGIN_MAX_DELAY_SECONDS)
+        espera = max(espera, newest + atraso - agora)
+    return espera
+
+
+def check_login_allowed(ip: str, email: str) -> None:
+    """
+    Lança LoginThrottledError se o IP ou o email devem esperar antes de tentar de novo.
+    Se o backend estiver fora do ar, o login segue normalmente (apenas loga o erro).
+    """
+    janela = settings.LOGIN_FAILURE_WINDOW_SECONDS
+    backend = get_backend()
+    try:
+        espera = _retry_after(
+            backend.get_window(_email_key(email), janela),
+            backend.get_window(_ip_key(ip), janela),
+        )
+    except Exception as e:
+        logger.error(f"Falha ao consultar o limite de tentativas de login: {e}")
+        return
+    if espera > 0:
+        raise LoginThrottledError(
+            "Muitas tentativas de login. Tente novamente mais tarde.",
+            retry_after=math.ceil(espera),
+        )
+
+
+def record_login_failure(ip: str, email: str) -> None:
+    """Registra uma falha de login para o IP e para o email."""
+    janela = settings.LOGIN_FAILURE_WINDOW_SECONDS
+    backend = get_backend()
+    try:
+        backend.record(_email_key(email), janela)
+        backend.record(_ip_key(ip), janela)
+    except Exception as e:
+        logger.error(f"Falha ao registrar tentativa de login: {e}")
+
+
+def record_login_success(email: str) -> None:
+    """Zera as falhas do email após um login correto (as do IP continuam)."""
+    try:
+        get_backend().reset(_email_key(email))
+    except Exception as e:
+        logger.error(f"Falha ao limpar tentativas de login: {e}")
@@ -0,0 +1,119 @@
+"""
+Roteamento das leituras para a réplica (DATABASE_REPLICA_URL), com
+"read-your-writes".
+
+As rotas só de leitura pedem a sessão por get_read_db / get_read_db_async
+(ver routers.dependencies), que escolhe a réplica, a não ser que o próprio
+usuário tenha gravado algo há menos de REPLICA_STICKY_SECONDS: nesse caso a
+réplica pode ainda não ter recebido a escrita e a leitura vai para o primário.
+
+Uma escrita é todo commit de uma sessão do primário marcada com o usuário
+(get_current_user marca a sessão da requisição). A marca fica no backend do
+limite de tentativas de login, e precisa ser vista pelo worker que atender a
+leitura seguinte: com vários workers, só o Redis (RATE_LIMIT_BACKEND=redis)
+serve; o backend em memória só vale com um único processo (SERVER_WORKERS=1,
+ex: desenvolvimento e testes). Fora desses casos o roteamento fica desligado
+(tudo no primário) e um aviso é logado na subida da API. As chamadas ao Redis
+feitas pelas rotas assíncronas rodam fora do event loop.
+"""
+
+import asyncio
+import logging
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import rate_limit
+from .core import settings
+from .database import (
+    AsyncReplicaSessionLocal,
+    AsyncSessionLocal,
+    ReplicaSessionLocal,
+    SessionLocal,
+    replica_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+# Chave em Session.info com o id do usuário da requisição
+SESSION_USER_KEY = "usuario_id"
+
+
+def _write_marks_shared() -> bool:
+    # A marca de escrita precisa valer em todos os workers (ver docstring do módulo)
+    return settings.RATE_LIMIT_BACKEND == "redis" or settings.SERVER_WORKERS == 1
+
+
+def replica_enabled() -> bool:
+    return replica_engine is not None and _write_marks_shared()
+
+
+def check_configuration() -> None:
+    """Avisa, na subida da API, se a réplica está configurada mas sem uso."""
+    if replica_engine is not None and not replica_enabled():
+        logger.warning(
+            "DATABASE_REPLICA_URL configurada, mas o roteamento para a réplica exige "
+            "RATE_LIMIT_BACKEND=redis ou SERVER_WORKERS=1 (a marca de escrita "
+            "precisa valer em todos os workers). Todas as leituras vão para o "
+            "banco principal."
+        )
+
+
+def _write_key(user_id: int) -> str:
+    return f"escrita:{user_id}"
+
+
+def mark_user_write(user_id: int) -> None:
+    """Registra que o usuário acabou de gravar algo no primário."""
+    try:
+        rate_limit.get_backend().record(
+            _write_key(user_id), settings.REPLICA_STICKY_SECONDS
+        )
+    except Exception as e:
+        logger.error(f"Falha ao registrar escrita do usuário {user_id}: {e}")
+
+
+def use_primary(user_id: int) -> bool:
+    """True se as leituras do usuário devem ir para o primário agora."""
+    if not replica_enabled():
+        return True
+    try:
+        count, _, _ = rate_limit.get_backend().get_window(
+            _write_key(user_id), settings.REPLICA_STICKY_SECONDS
+        )
+    except Exception as e:
+        # Sem saber se houve escrita recente, lê do primário (nunca um dado velho)
+        logger.error(f"Falha ao consultar escritas do usuário {user_id}: {e}")
+        return True
+    return count > 0
+
+
+def read_sessionmaker(user_id: int) -> sessionmaker:
+    return SessionLocal if use_primary(user_id) else ReplicaSessionLocal
+
+
+async def async_read_sessionmaker(user_id: int) -> async_sessionmaker:
+    """Versão de read_sessionmaker que consulta o Redis fora do event loop."""
+    if not replica_enabled():
+        return AsyncSessionLocal
+    if await run_in_threadpool(use_primary, user_id):
+        return AsyncSessionLocal
+    return AsyncReplicaSessionLocal
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_session_user_write(session: Session) -> None:
+    # Vale também para as AsyncSession (que usam uma Session por baixo)
+    user_id = session.info.get(SESSION_USER_KEY)
+    if user_id is None or not replica_enabled():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sessão síncrona (rota no threadpool): grava a marca aqui mesmo
+        mark_user_write(user_id)
+        return
+    # AsyncSession: não bloqueia o event loop esperando o Redis
+    loop.run_in_executor(None, mark_user_write, user_id)
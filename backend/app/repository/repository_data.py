@@ -1,7 +1,19 @@
-from typing import Optional, List
-from .. import models, schemas
-from sqlalchemy.orm import Session, joinedload, subqueryload
-from sqlalchemy import func, or_, select, BigInteger, desc, Row
+from datetime import datetime
+from typing import BinaryIO, Optional, List, Union
+from .. import models, schemas, storage
+from sqlalchemy.orm import Session, joinedload, subqueryload, undefer
+from sqlalchemy import (
+    func,
+    and_,
+    or_,
+    select,
+    union,
+    update,
+    BigInteger,
+    desc,
+    Row,
+    Select,
+)
 
 # --- Funções de Busca (Dado, Senha, Arquivo) ---
 
@@ -16,6 +28,35 @@ def get_dado_by_id_and_user_id(
     return db.execute(stmt).scalar_one_or_none()
 
 
+def get_file_dado_without_content(
+    db: Session, dado_id: int, user_id: int
+) -> models.Dado | None:
+    """
+    Busca um Dado do tipo Arquivo e os metadados do Arquivo filho,
+    sem carregar o LONGBLOB com o conteúdo.
+    """
+    stmt = (
+        select(models.Dado)
+        .filter(
+            models.Dado.id == dado_id,
+            models.Dado.usuario_id == user_id,
+            models.Dado.tipo == models.TipoDado.ARQUIVO,
+        )
+        .options(
+            joinedload(models.Dado.arquivo).load_only(
+                models.Arquivo.id,
+                models.Arquivo.iv_arquivo,
+                models.Arquivo.extensao,
+                models.Arquivo.nome_arquivo,
+                models.Arquivo.tamanho,
+                models.Arquivo.blob_ref,
+                models.Arquivo.hash_conteudo,
+            )
+        )
+    )
+    return db.execute(stmt).unique().scalar_one_or_none()
+
+
 def get_dados_ids_by_user(db: Session, user_id: int) -> List[int]:
     """Busca todos os IDs de Dados que pertencem a um usuário."""
     stmt = select(models.Dado.id).filter(models.Dado.usuario_id == user_id)
@@ -39,47 +80,130 @@ def get_dados_by_ids_and_user_id(
     return list(results)
 
 
-def get_paginated_data(
-    db: Session, pageSize: int, pageNumber: int, id_user: int
-) -> List[models.Dado]:
-    """Retorna dados paginados de um usuário"""
-    offset = (pageNumber - 1) * pageSize
+def _child_load_options(resumo: bool) -> list:
+    """
+    Opções de carregamento dos filhos (Senha/Arquivo) de um Dado.
+    No modo resumo, apenas os metadados são lidos: o LONGBLOB do arquivo
+    e a senha criptografada nunca saem do banco.
+    """
+    if resumo:
+        return [
+            joinedload(models.Dado.senha).load_only(
+                models.Senha.id, models.Senha.host_url, models.Senha.email
+            ),
+            joinedload(models.Dado.arquivo).load_only(
+                models.Arquivo.id,
+                models.Arquivo.extensao,
+                models.Arquivo.nome_arquivo,
+                models.Arquivo.tamanho,
+            ),
+        ]
+    return [
+        joinedload(models.Dado.senha),
+        joinedload(models.Dado.arquivo).undefer(models.Arquivo.arquivo),
+    ]
+
+
+def _apply_page_window(
+    stmt: Select,
+    pageSize: int,
+    pageNumber: int,
+    cursor: Optional[tuple[datetime, int]],
+) -> Select:
+    """
+    Ordena por (criado_em, id) decrescente e aplica a janela da página.
+    Com cursor, usa paginação por chave (keyset): a busca começa direto
+    no índice (usuario_id, criado_em, id), sem percorrer as páginas anteriores.
+    Sem cursor, mantém a paginação por OFFSET.
+    """
+    stmt = stmt.order_by(models.Dado.criado_em.desc(), models.Dado.id.desc())
+    if cursor is not None:
+        criado_em, dado_id = cursor
+        stmt = stmt.filter(
+            or_(
+                models.Dado.criado_em < criado_em,
+                and_(models.Dado.criado_em == criado_em, models.Dado.id < dado_id),
+            )
+        )
+    else:
+        stmt = stmt.offset((pageNumber - 1) * pageSize)
+    return stmt.limit(pageSize)
+
+
+def paginated_data_stmt(
+    pageSize: int,
+    pageNumber: int,
+    id_user: int,
+    resumo: bool = False,
+    cursor: Optional[tuple[datetime, int]] = None,
+) -> Select:
+    """Query dos dados paginados de um usuário (ver a função abaixo)."""
     stmt = (
         select(models.Dado)
         .filter(models.Dado.usuario_id == id_user)
         .options(
-            joinedload(models.Dado.senha),
-            joinedload(models.Dado.arquivo),
+            *_child_load_options(resumo),
             joinedload(models.Dado.separadores),
         )
-        .order_by(models.Dado.criado_em.desc())
-        .offset(offset)
-        .limit(pageSize)
     )
+    return _apply_page_window(stmt, pageSize, pageNumber, cursor)
+
+
+def get_paginated_data(
+    db: Session,
+    pageSize: int,
+    pageNumber: int,
+    id_user: int,
+    resumo: bool = False,
+    cursor: Optional[tuple[datetime, int]] = None,
+) -> List[models.Dado]:
+    """Retorna dados paginados de um usuário"""
+    stmt = paginated_data_stmt(pageSize, pageNumber, id_user, resumo, cursor)
     result = db.execute(stmt).unique().scalars().all()
     return list(result)
 
 
-def get_paginated_filtered_data(
-    db: Session, pageSize: int, pageNumber: int, idSeparators: list[int], id_user: int
-) -> List[models.Dado]:
-    """Retorna dados paginados, filtrados por separadores"""
-    offset = (pageNumber - 1) * pageSize
-    stmt = (
-        select(models.Dado)
-        .join(models.Dado.separadores)
+def paginated_filtered_data_stmt(
+    pageSize: int,
+    pageNumber: int,
+    idSeparators: list[int],
+    id_user: int,
+    resumo: bool = False,
+    cursor: Optional[tuple[datetime, int]] = None,
+) -> Select:
+    """Query dos dados paginados e filtrados por separadores (ver a função abaixo)."""
+    # EXISTS em vez de JOIN + DISTINCT: mantém a ordem do índice de 'dados'
+    has_separator = (
+        select(models.dados_separadores_association.c.dado_id)
         .filter(
-            models.Dado.usuario_id == id_user, models.Separador.id.in_(idSeparators)
+            models.dados_separadores_association.c.dado_id == models.Dado.id,
+            models.dados_separadores_association.c.separador_id.in_(idSeparators),
         )
+        .exists()
+    )
+    stmt = (
+        select(models.Dado)
+        .filter(models.Dado.usuario_id == id_user, has_separator)
         .options(
-            joinedload(models.Dado.senha),
-            joinedload(models.Dado.arquivo),
+            *_child_load_options(resumo),
             subqueryload(models.Dado.separadores),
         )
-        .order_by(models.Dado.criado_em.desc())
-        .offset(offset)
-        .limit(pageSize)
-        .distinct()
+    )
+    return _apply_page_window(stmt, pageSize, pageNumber, cursor)
+
+
+def get_paginated_filtered_data(
+    db: Session,
+    pageSize: int,
+    pageNumber: int,
+    idSeparators: list[int],
+    id_user: int,
+    resumo: bool = False,
+    cursor: Optional[tuple[datetime, int]] = None,
+) -> List[models.Dado]:
+    """Retorna dados paginados, filtrados por separadores"""
+    stmt = paginated_filtered_data_stmt(
+        pageSize, pageNumber, idSeparators, id_user, resumo, cursor
     )
     result = db.execute(stmt).unique().scalars().all()
     return list(result)
@@ -181,6 +305,75 @@ def get_dado_ids_by_separador_ids(db: Session, separador_ids: List[int]) -> List
     return list(db.execute(stmt).scalars().all())
 
 
+def get_credentials_by_host(
+    db: Session, user_id: int, host_normalizado: str
+) -> List[models.Dado]:
+    """
+    Busca as credenciais de um usuário cujo host normalizado é 'host_normalizado'.
+    Parte do índice (usuario_id, host_normalizado) de 'senhas'.
+    """
+    stmt = (
+        select(models.Dado)
+        .join(models.Senha, models.Senha.id == models.Dado.id)
+        .filter(
+            models.Senha.usuario_id == user_id,
+            models.Senha.host_normalizado == host_normalizado,
+        )
+        .options(
+            joinedload(models.Dado.senha),
+            joinedload(models.Dado.separadores),
+        )
+        .order_by(models.Dado.nome_aplicacao)
+    )
+    return list(db.execute(stmt).unique().scalars().all())
+
+
+def get_credential_index_rows(db: Session, user_id: int) -> List[Row]:
+    """
+    Retorna (id, nome_aplicacao, email, host_normalizado) de cada credencial
+    do usuário que possui host, sem carregar a senha criptografada.
+    """
+    stmt = (
+        select(
+            models.Dado.id,
+            models.Dado.nome_aplicacao,
+            models.Senha.email,
+            models.Senha.host_normalizado,
+        )
+        .join(models.Senha, models.Senha.id == models.Dado.id)
+        .filter(
+            models.Senha.usuario_id == user_id,
+            models.Senha.host_normalizado.is_not(None),
+        )
+        .order_by(models.Dado.id)
+    )
+    return list(db.execute(stmt).all())
+
+
+def get_senhas_to_backfill(db: Session, after_id: int, limit: int) -> List[Row]:
+    """
+    Busca (em lotes, por id) as Senhas sem 'usuario_id' ou com 'host_url' mas
+    sem 'host_normalizado'. Retorna (Senha, usuario_id do Dado).
+    """
+    stmt = (
+        select(models.Senha, models.Dado.usuario_id)
+        .join(models.Dado, models.Dado.id == models.Senha.id)
+        .filter(
+            models.Senha.id > after_id,
+            or_(
+                models.Senha.usuario_id.is_(None),
+                and_(
+                    models.Senha.host_url.is_not(None),
+                    models.Senha.host_normalizado.is_(None),
+                ),
+            ),
+        )
+        .order_by(models.Senha.id)
+        .limit(limit)
+    )
+    return list(db.execute(stmt).all())
+
+
 # --- Funções de Busca (Compartilhamento) ---
 
 
@@ -213,13 +406,12 @@ def count_remaining_dados_compartilhados(
 def get_total_storage_used_by_user(db: Session, user_id: int) -> int:
     """
     Calcula a soma total de bytes de todos os arquivos de um usuário
-    usando a função 'LENGTH()' do SQL.
+    a partir da coluna 'tamanho' (sem ler os blobs).
+    O valor usado no dia a dia é o contador 'usuario.armazenamento_usado';
+    esta soma serve para conferi-lo.
     """
-    # func.length() obtém o tamanho do blob
-    # func.sum() soma tudo
-    # .cast(BigInteger) garante que o resultado caiba
     stmt = (
-        select(func.sum(func.length(models.Arquivo.arquivo)).cast(BigInteger))
+        select(func.sum(models.Arquivo.tamanho).cast(BigInteger))
         .join(models.Dado, models.Arquivo.id == models.Dado.id)
         .filter(models.Dado.usuario_id == user_id)
     )
@@ -238,7 +430,7 @@ def get_storage_used_by_file_type(db: Session, user_id: int) -> List[Row]:
     stmt = (
         select(
             models.Arquivo.extensao,
-            func.sum(func.length(models.Arquivo.arquivo)).label("bytes_usados"),
+            func.sum(models.Arquivo.tamanho).label("bytes_usados"),
         )
         .join(models.Dado, models.Arquivo.id == models.Dado.id)
         .filter(models.Dado.usuario_id == user_id)
@@ -252,20 +444,70 @@ def get_storage_used_by_file_type(db: Session, user_id: int) -> List[Row]:
 
 def get_file_size_by_id(db: Session, arquivo_id: int) -> int:
     """Busca o tamanho (em bytes) de um único arquivo."""
-    stmt = select(func.length(models.Arquivo.arquivo)).filter(
-        models.Arquivo.id == arquivo_id
-    )
+    stmt = select(models.Arquivo.tamanho).filter(models.Arquivo.id == arquivo_id)
     size = db.execute(stmt).scalar()
     return size or 0
 
 
+def get_total_file_size_by_dado_ids(db: Session, dado_ids: List[int]) -> int:
+    """Soma o tamanho (em bytes) dos arquivos de uma lista de 'Dados'."""
+    if not dado_ids:
+        return 0
+    stmt = select(func.sum(models.Arquivo.tamanho).cast(BigInteger)).filter(
+        models.Arquivo.id.in_(dado_ids)
+    )
+    return db.execute(stmt).scalar() or 0
+
+
+# --- Funções de Busca (Armazenamento de Blobs) ---
+
+
+def get_blob_rows_to_migrate(
+    db: Session,
+    modelo: type,
+    para_disco: bool,
+    after_id: int,
+    limit: int,
+) -> list:
+    """
+    Busca (em lotes, por id) as linhas de 'modelo' (Arquivo ou DadosCompartilhados)
+    cujo blob ainda não está no destino: no banco, se 'para_disco', ou em disco, se não.
+    """
+    coluna = storage.blob_column(modelo)
+    stmt = select(modelo).filter(modelo.id > after_id)
+    if para_disco:
+        stmt = stmt.filter(modelo.blob_ref.is_(None), coluna.is_not(None))
+    else:
+        stmt = stmt.filter(modelo.blob_ref.is_not(None))
+    stmt = stmt.options(undefer(coluna)).order_by(modelo.id).limit(limit)
+    return list(db.execute(stmt).scalars().all())
+
+
+def get_all_blob_refs(db: Session) -> set[str]:
+    """Retorna todos os hashes de blobs em disco referenciados por alguma linha."""
+    stmt = union(
+        select(models.Arquivo.blob_ref).filter(models.Arquivo.blob_ref.is_not(None)),
+        select(models.DadosCompartilhados.blob_ref).filter(
+            models.DadosCompartilhados.blob_ref.is_not(None)
+        ),
+    )
+    return set(db.execute(stmt).scalars().all())
+
+
 # --- Funções de Criação (Dado, Senha, Arquivo) ---
 
 
-def create_file(db: Session, dado: models.Dado, arquivo: models.Arquivo) -> models.Dado:
+def create_file(
+    db: Session,
+    dado: models.Dado,
+    arquivo: models.Arquivo,
+    content: Union[bytes, BinaryIO],
+) -> models.Dado:
     db.add(dado)
     db.flush()
     arquivo.id = dado.id
+    # Salva o conteúdo no backend configurado (coluna ou disco)
+    storage.write_blob(arquivo, content)
     db.add(arquivo)
     return dado
 
@@ -300,7 +542,8 @@ def update_file_data(
             exclude={"arquivo_data"}, exclude_unset=True
         )
         if decoded_bytes is not None:
-            db_arquivo.arquivo = decoded_bytes
+            storage.write_blob(db_arquivo, decoded_bytes)
+            db_arquivo.tamanho = len(decoded_bytes)
         if "nome_arquivo" in file_update_dict:
             db_arquivo.nome_arquivo = file_update_dict["nome_arquivo"]
         if "extensao" in file_update_dict:
@@ -310,6 +553,21 @@ def update_file_data(
     return db_dado
 
 
+def replace_file_content(
+    db: Session,
+    db_arquivo: models.Arquivo,
+    content: BinaryIO,
+    tamanho: int,
+    iv_arquivo: str,
+) -> models.Arquivo:
+    """Substitui o conteúdo criptografado (e o IV) de um Arquivo na sessão."""
+    storage.write_blob(db_arquivo, content)
+    db_arquivo.iv_arquivo = iv_arquivo
+    db_arquivo.tamanho = tamanho
+    db.add(db_arquivo)
+    return db_arquivo
+
+
 def update_credential_data(
     db: Session,
     db_dado: models.Dado,
@@ -329,6 +587,22 @@ def update_credential_data(
     return db_dado
 
 
+def sync_file_sizes(db: Session) -> int:
+    """
+    Corrige a coluna 'tamanho' dos arquivos em que ela diverge de LENGTH(arquivo)
+    (ex: linhas criadas antes da coluna existir).
+    Retorna a quantidade de arquivos corrigidos.
+    """
+    real_size = func.length(models.Arquivo.arquivo)
+    stmt = (
+        update(models.Arquivo)
+        .filter(models.Arquivo.arquivo.is_not(None), models.Arquivo.tamanho != real_size)
+        .values(tamanho=real_size)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount
+
+
 # --- Funções de Exclusão (Dado, Log, Evento, Compartilhamento) ---
 
 
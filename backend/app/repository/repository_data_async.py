@@ -0,0 +1,64 @@
+"""Versões assíncronas (AsyncSession) das buscas de repository_data usadas nas rotas async."""
+
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from .. import models
+from .repository_data import (
+    _child_load_options,
+    paginated_data_stmt,
+    paginated_filtered_data_stmt,
+)
+
+
+async def get_dado_by_id_and_user_id(
+    db: AsyncSession, dado_id: int, user_id: int
+) -> models.Dado | None:
+    """
+    Busca um Dado específico pelo seu ID e o ID do usuário proprietário,
+    já com o Arquivo (e o conteúdo), a Senha e os separadores.
+    """
+    stmt = (
+        select(models.Dado)
+        .filter(models.Dado.id == dado_id, models.Dado.usuario_id == user_id)
+        .options(
+            *_child_load_options(resumo=False),
+            selectinload(models.Dado.separadores),
+        )
+    )
+    result = await db.execute(stmt)
+    return result.unique().scalar_one_or_none()
+
+
+async def get_paginated_data(
+    db: AsyncSession,
+    pageSize: int,
+    pageNumber: int,
+    id_user: int,
+    resumo: bool = False,
+    cursor: Optional[tuple[datetime, int]] = None,
+) -> List[models.Dado]:
+    """Retorna dados paginados de um usuário"""
+    stmt = paginated_data_stmt(pageSize, pageNumber, id_user, resumo, cursor)
+    result = await db.execute(stmt)
+    return list(result.unique().scalars().all())
+
+
+async def get_paginated_filtered_data(
+    db: AsyncSession,
+    pageSize: int,
+    pageNumber: int,
+    idSeparators: list[int],
+    id_user: int,
+    resumo: bool = False,
+    cursor: Optional[tuple[datetime, int]] = None,
+) -> List[models.Dado]:
+    """Retorna dados paginados, filtrados por separadores"""
+    stmt = paginated_filtered_data_stmt(
+        pageSize, pageNumber, idSeparators, id_user, resumo, cursor
+    )
+    result = await db.execute(stmt)
+    return list(result.unique().scalars().all())
@@ -1,8 +1,8 @@
 import logging
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc
+from sqlalchemy import insert, select, desc
 from .. import models
-from typing import List
+from typing import Iterable, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +14,36 @@ def create_log_entry(db: Session, db_log: models.Log):
     db.add(db_log)
 
 
+def bulk_create_log_entries(db: Session, rows: List[dict]):
+    """
+    Insere vários logs (dicionários com as colunas) em um único INSERT em lote.
+    """
+    db.execute(insert(models.Log), rows)
+
+
+def get_existing_log_references(
+    db: Session, usuario_ids: Iterable[int], dado_ids: Iterable[int]
+) -> Tuple[Set[int], Set[int]]:
+    """
+    Dentre os ids informados, retorna os usuários e os dados que ainda existem.
+    """
+    usuarios = set()
+    dados = set()
+    if usuario_ids:
+        usuarios = set(
+            db.execute(
+                select(models.Usuario.id).filter(models.Usuario.id.in_(usuario_ids))
+            ).scalars()
+        )
+    if dado_ids:
+        dados = set(
+            db.execute(
+                select(models.Dado.id).filter(models.Dado.id.in_(dado_ids))
+            ).scalars()
+        )
+    return usuarios, dados
+
+
 def get_paginated_logs_by_user_id(
     db: Session, user_id: int, page_size: int, page_number: int
 ) -> List[models.Log]:
@@ -0,0 +1,128 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from .. import models
+
+# --- Funções de Busca ---
+
+
+def get_session_by_token_hash(db: Session, token_hash: str) -> models.Sessao | None:
+    """Busca a sessão cujo refresh token atual tem esse hash."""
+    stmt = select(models.Sessao).filter(models.Sessao.token_hash == token_hash)
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def get_session_by_previous_token_hash(
+    db: Session, token_hash: str
+) -> models.Sessao | None:
+    """Busca a sessão cujo refresh token ANTERIOR (já trocado) tem esse hash."""
+    stmt = select(models.Sessao).filter(
+        models.Sessao.token_anterior_hash == token_hash
+    )
+    return db.execute(stmt).scalars().first()
+
+
+def get_session_by_id_and_user(
+    db: Session, session_id: int, user_id: int
+) -> models.Sessao | None:
+    stmt = select(models.Sessao).filter(
+        models.Sessao.id == session_id, models.Sessao.usuario_id == user_id
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def get_revoked_tokens(
+    db: Session, now: datetime, since: Optional[datetime] = None
+) -> List[tuple[str, datetime]]:
+    """
+    Busca (jti, expira_em) das revogações de tokens ainda não expirados,
+    apenas as feitas a partir de 'since' (se informado).
+    """
+    stmt = select(models.TokenRevogado.jti, models.TokenRevogado.expira_em).filter(
+        models.TokenRevogado.expira_em > now
+    )
+    if since is not None:
+        stmt = stmt.filter(models.TokenRevogado.revogado_em >= since)
+    return [tuple(row) for row in db.execute(stmt).all()]
+
+
+def get_revoked_sessions(db: Session, since: datetime) -> List[tuple[int, datetime]]:
+    """Busca (id, revogada_em) das sessões revogadas a partir de 'since'."""
+    stmt = select(models.Sessao.id, models.Sessao.revogada_em).filter(
+        models.Sessao.revogada_em >= since
+    )
+    return [tuple(row) for row in db.execute(stmt).all()]
+
+
+# --- Funções de Criação ---
+
+
+def create_session(db: Session, db_sessao: models.Sessao) -> models.Sessao:
+    db.add(db_sessao)
+    return db_sessao
+
+
+def create_revoked_token(
+    db: Session, db_token: models.TokenRevogado
+) -> models.TokenRevogado:
+    db.add(db_token)
+    return db_token
+
+
+# --- Funções de Atualização ---
+
+
+def rotate_session_token(
+    db: Session,
+    session_id: int,
+    token_hash: str,
+    novo_token_hash: str,
+    now: datetime,
+    expira_em: datetime,
+    ip: str | None,
+    dispositivo: str | None,
+) -> bool:
+    """
+    Troca o refresh token da sessão, somente se o atual ainda for 'token_hash'
+    (duas trocas simultâneas do mesmo token não passam as duas).
+    Retorna False se o token já tiver sido trocado.
+    """
+    stmt = (
+        update(models.Sessao)
+        .filter(
+            models.Sessao.id == session_id,
+            models.Sessao.token_hash == token_hash,
+            models.Sessao.revogada_em.is_(None),
+        )
+        .values(
+            token_anterior_hash=token_hash,
+            token_hash=novo_token_hash,
+            ultimo_uso_em=now,
+            expira_em=expira_em,
+            ip=ip,
+            dispositivo=dispositivo,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount == 1
+
+
+def revoke_session(db: Session, db_sessao: models.Sessao, now: datetime) -> None:
+    db_sessao.revogada_em = now
+    db.add(db_sessao)
+
+
+# --- Funções de Exclusão ---
+
+
+def delete_expired_sessions(db: Session, now: datetime) -> int:
+    """Apaga as sessões expiradas. Retorna quantas foram apagadas."""
+    stmt = delete(models.Sessao).filter(models.Sessao.expira_em < now)
+    return db.execute(stmt).rowcount
+
+
+def delete_expired_revoked_tokens(db: Session, now: datetime) -> int:
+    """Apaga as revogações de tokens que já expiraram de qualquer forma."""
+    stmt = delete(models.TokenRevogado).filter(models.TokenRevogado.expira_em < now)
+    return db.execute(stmt).rowcount
@@ -0,0 +1,26 @@
+"""Versões assíncronas (AsyncSession) das buscas de repository_share usadas nas rotas async."""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from .. import models
+
+
+async def get_share_by_token(
+    db: AsyncSession, token_acesso: str
+) -> models.Compartilhamento | None:
+    """
+    Busca um 'Compartilhamento', seus 'DadosCompartilhados' filhos e o dono
+    pelo token de acesso único.
+    """
+    stmt = (
+        select(models.Compartilhamento)
+        .filter(models.Compartilhamento.token_acesso == token_acesso)
+        .options(
+            joinedload(models.Compartilhamento.dados_compartilhados),
+            joinedload(models.Compartilhamento.owner_usuario),
+        )
+    )
+    result = await db.execute(stmt)
+    return result.unique().scalar_one_or_none()
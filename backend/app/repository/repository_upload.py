@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from .. import models
+
+# --- Funções de Busca ---
+
+
+def get_upload_session(
+    db: Session, session_id: str, user_id: int, for_update: bool = False
+) -> models.SessaoUpload | None:
+    """
+    Busca uma sessão de upload pelo ID, garantindo que pertence ao usuário.
+    Com 'for_update', trava a linha até o fim da transação (SELECT ... FOR UPDATE).
+    """
+    stmt = select(models.SessaoUpload).filter(
+        models.SessaoUpload.id == session_id,
+        models.SessaoUpload.usuario_id == user_id,
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def get_expired_upload_sessions(
+    db: Session, now: datetime, limit: int
+) -> List[models.SessaoUpload]:
+    """Busca sessões de upload cuja validade já passou."""
+    stmt = (
+        select(models.SessaoUpload)
+        .filter(models.SessaoUpload.expira_em < now)
+        .order_by(models.SessaoUpload.expira_em)
+        .limit(limit)
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def get_upload_session_ids(db: Session) -> set[str]:
+    """Retorna os IDs de todas as sessões de upload existentes."""
+    return set(db.execute(select(models.SessaoUpload.id)).scalars().all())
+
+
+# --- Funções de Criação ---
+
+
+def create_upload_session(
+    db: Session, db_sessao: models.SessaoUpload
+) -> models.SessaoUpload:
+    db.add(db_sessao)
+    return db_sessao
+
+
+# --- Funções de Exclusão ---
+
+
+def delete_upload_session(db: Session, db_sessao: models.SessaoUpload):
+    db.delete(db_sessao)
+
+
+def delete_upload_session_by_id(db: Session, session_id: str) -> bool:
+    """
+    Remove a sessão com um DELETE direto. Retorna False se ela já não existia
+    (ex: outra transação a removeu primeiro).
+    """
+    stmt = (
+        delete(models.SessaoUpload)
+        .filter(models.SessaoUpload.id == session_id)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount == 1
@@ -1,5 +1,6 @@
+from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from .. import models, schemas
 
 # --- Funções de Busca ---
@@ -17,6 +18,14 @@ def get_user_by_id(db: Session, user_id: int) -> models.Usuario | None:
     return db.execute(stmt).scalar_one_or_none()
 
 
+def get_storage_used(db: Session, user_id: int) -> int:
+    """Lê o contador de bytes usados pelo usuário."""
+    stmt = select(models.Usuario.armazenamento_usado).filter(
+        models.Usuario.id == user_id
+    )
+    return db.execute(stmt).scalar() or 0
+
+
 # --- Funções de Criação ---
 
 
@@ -40,6 +49,70 @@ def update_user(
     return db_user
 
 
+def update_password_hash(
+    db: Session, db_user: models.Usuario, senha_mestre: str
+) -> models.Usuario:
+    """Troca o hash da senha mestre (ex: hash refeito com novos parâmetros)."""
+    db_user.senha_mestre = senha_mestre
+    db.add(db_user)
+    return db_user
+
+
+def add_storage_used(db: Session, user_id: int, delta: int) -> bool:
+    """
+    Soma 'delta' bytes ao contador de armazenamento do usuário.
+    Para valores positivos, o UPDATE só é aplicado se o novo total couber no
+    limite do usuário; retorna False se não couber.
+    O UPDATE bloqueia a linha do usuário até o fim da transação,
+    então verificações concorrentes não ultrapassam o limite.
+    """
+    stmt = (
+        update(models.Usuario)
+        .filter(models.Usuario.id == user_id)
+        .values(armazenamento_usado=models.Usuario.armazenamento_usado + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if delta > 0:
+        stmt = stmt.filter(
+            models.Usuario.armazenamento_usado + delta
+            <= models.Usuario.armazenamento_total
+        )
+    result = db.execute(stmt)
+    return result.rowcount == 1
+
+
+def reset_storage_used(db: Session, user_id: int):
+    """Zera o contador de armazenamento do usuário."""
+    db.execute(
+        update(models.Usuario)
+        .filter(models.Usuario.id == user_id)
+        .values(armazenamento_usado=0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recompute_storage_used(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recalcula o contador a partir de 'arquivos.tamanho' (de um usuário
+    ou de todos) e retorna quantos usuários estavam com o valor errado.
+    """
+    real_usage = (
+        select(func.coalesce(func.sum(models.Arquivo.tamanho), 0))
+        .join(models.Dado, models.Arquivo.id == models.Dado.id)
+        .filter(models.Dado.usuario_id == models.Usuario.id)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(models.Usuario)
+        .filter(models.Usuario.armazenamento_usado != real_usage)
+        .values(armazenamento_usado=real_usage)
+        .execution_options(synchronize_session=False)
+    )
+    if user_id is not None:
+        stmt = stmt.filter(models.Usuario.id == user_id)
+    return db.execute(stmt).rowcount
+
+
 # --- Funções de Exclusão ---
 
 
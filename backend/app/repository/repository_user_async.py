@@ -0,0 +1,20 @@
+"""Versões assíncronas (AsyncSession) das buscas de repository_user usadas nas rotas async."""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> models.Usuario | None:
+    """Busca um usuário pelo seu email."""
+    stmt = select(models.Usuario).filter(models.Usuario.email == email)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> models.Usuario | None:
+    """Busca um usuário pelo seu ID."""
+    stmt = select(models.Usuario).filter(models.Usuario.id == user_id)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
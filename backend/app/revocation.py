@@ -0,0 +1,195 @@
+"""
+Lista de access tokens (JWT) revogados antes de expirar (ex: no logout).
+
+Cada token tem uma claim 'jti' (identificador único) e, se emitido para uma
+sessão de login, a claim 'sid'. As revogações ficam nas tabelas
+'tokens_revogados' (um token) e 'sessoes' ('revogada_em': todos os tokens da
+sessão, ex: no logout). Cada worker mantém uma cópia em memória (jti ou sessão
+-> fim da validade), então get_current_user verifica a revogação com uma busca
+num dicionário, sem consultar o banco a cada requisição.
+
+A cópia é sincronizada com o banco no máximo a cada TOKEN_REVOCATION_SYNC_SECONDS
+(só as revogações novas); nas rotas assíncronas essa consulta roda no threadpool
+(is_token_revoked_async), fora do event loop. Um token revogado por outro
+worker deixa de funcionar aqui em até esse intervalo; no worker que fez a
+revogação, na hora. Cada entrada sai da memória quando o token expira (numa
+sessão, ACCESS_TOKEN_EXPIRE_MINUTES depois da revogação: nenhum token dela é
+emitido depois), pois a partir daí o próprio 'exp' já faz o token ser recusado.
+"""
+
+import logging
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from .core import settings
+from .database import SessionLocal
+from .repository import repository_session
+
+logger = logging.getLogger(__name__)
+
+# Margem na busca incremental: cobre revogações gravadas por transações que
+# ainda não tinham feito commit na sincronização anterior e diferenças de relógio
+_SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _to_timestamp(value: datetime) -> float:
+    # Datas do banco são UTC "ingênuas"
+    return value.replace(tzinfo=UTC).timestamp()
+
+
+def _access_token_lifetime() -> timedelta:
+    return timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def _session_key(session_id: int) -> str:
+    # Um 'jti' (token_urlsafe) nunca tem ':', então as chaves não se confundem
+    return f"sessao:{session_id}"
+
+
+def _revocation_keys(jti: Optional[str], session_id: Optional[int]) -> List[str]:
+    """Chaves da lista que revogam um token: o próprio 'jti' e a sua sessão."""
+    keys = []
+    if jti is not None:
+        keys.append(jti)
+    if session_id is not None:
+        keys.append(_session_key(session_id))
+    return keys
+
+
+class RevocationList:
+    """
+    Conjunto de chaves revogadas ('jti' ou sessão), com expiração e
+    sincronização periódica.
+    """
+
+    def __init__(self, sync_seconds: float):
+        self.sync_seconds = sync_seconds
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._next_sync = 0.0
+        self._synced_since: Optional[datetime] = None
+
+    def add(self, key: str, exp: float) -> None:
+        """Marca 'key' como revogada até 'exp' (timestamp do fim da validade)."""
+        if exp <= time.time():
+            return
+        with self._lock:
+            self._revoked[key] = exp
+
+    def is_revoked(self, *keys: str) -> bool:
+        self.maybe_sync()
+        return self.contains(*keys)
+
+    def contains(self, *keys: str) -> bool:
+        """Consulta só a cópia em memória, sem sincronizar."""
+        agora = time.time()
+        for key in keys:
+            exp = self._revoked.get(key)
+            if exp is not None and exp > agora:
+                return True
+        return False
+
+    def sync_due(self) -> bool:
+        return time.monotonic() >= self._next_sync
+
+    def maybe_sync(self) -> None:
+        if not self.sync_due():
+            return
+        # Só uma thread sincroniza; as outras seguem com a cópia atual
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() >= self._next_sync:
+                self.sync()
+        finally:
+            self._sync_lock.release()
+
+    def sync(self) -> None:
+        """
+        Busca no banco as revogações feitas desde a última sincronização e remove
+        da memória as já expiradas. Se o banco falhar, mantém a cópia atual.
+        """
+        inicio = _now()
+        since = self._synced_since - _SYNC_OVERLAP if self._synced_since else None
+        # Sessões revogadas há mais tempo que a validade do access token não
+        # têm mais nenhum token válido
+        sessions_since = inicio - _access_token_lifetime()
+        if since is not None:
+            sessions_since = max(sessions_since, since)
+        try:
+            db = SessionLocal()
+            try:
+                rows = repository_session.get_revoked_tokens(db, inicio, since=since)
+                sessions = repository_session.get_revoked_sessions(db, sessions_since)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Falha ao sincronizar os tokens revogados: {e}")
+            self._next_sync = time.monotonic() + self.sync_seconds
+            return
+
+        agora = time.time()
+        with self._lock:
+            for jti, expira_em in rows:
+                self._revoked[jti] = _to_timestamp(expira_em)
+            for session_id, revogada_em in sessions:
+                self._revoked[_session_key(session_id)] = _to_timestamp(
+                    revogada_em + _access_token_lifetime()
+                )
+            for key in [k for k, exp in self._revoked.items() if exp <= agora]:
+                del self._revoked[key]
+        self._synced_since = inicio
+        self._next_sync = time.monotonic() + self.sync_seconds
+
+    def clear(self) -> None:
+        """Esvazia a cópia em memória; a próxima verificação recarrega tudo do banco."""
+        with self._sync_lock, self._lock:
+            self._revoked.clear()
+            self._synced_since = None
+            self._next_sync = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._revoked)
+
+
+_revocation_list = RevocationList(sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS)
+
+
+def is_token_revoked(jti: Optional[str], session_id: Optional[int] = None) -> bool:
+    """True se o token ('jti') ou a sessão dele ('sid') foi revogado (ex: logout)."""
+    return _revocation_list.is_revoked(*_revocation_keys(jti, session_id))
+
+
+async def is_token_revoked_async(
+    jti: Optional[str], session_id: Optional[int] = None
+) -> bool:
+    """Versão para as rotas assíncronas: a sincronização roda no threadpool."""
+    if _revocation_list.sync_due():
+        await run_in_threadpool(_revocation_list.maybe_sync)
+    return _revocation_list.contains(*_revocation_keys(jti, session_id))
+
+
+def mark_token_revoked(jti: str, exp: float) -> None:
+    """Aplica uma revogação já gravada no banco à cópia em memória deste worker."""
+    _revocation_list.add(jti, exp)
+
+
+def mark_session_revoked(session_id: int, revogada_em: datetime) -> None:
+    """Como mark_token_revoked, para todos os access tokens de uma sessão."""
+    _revocation_list.add(
+        _session_key(session_id), _to_timestamp(revogada_em + _access_token_lifetime())
+    )
+
+
+def clear_revocation_cache() -> None:
+    _revocation_list.clear()
@@ -1,50 +1,84 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, UploadFile, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from typing import Annotated
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, AsyncIterator, BinaryIO, Iterator, Optional, Tuple
 from jose import ExpiredSignatureError, JWTError
 import logging
+import tempfile
 
-from .. import core, models
-from ..database import get_db
-from ..repository import repository_user
+from .. import core, models, replica, revocation, services
+from ..database import get_async_db, get_db
 
 logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Acima deste tamanho, o corpo recebido é gravado em disco em vez de ficar na memória
+UPLOAD_SPOOL_MAX_MEMORY = 1024 * 1024  # 1 MiB
 
-def get_current_user(
-    db: Annotated[Session, Depends(get_db)],
-    token: Annotated[str, Depends(oauth2_scheme)],
-) -> models.Usuario:
-    """
-    Dependência do FastAPI para decodificar o token e retornar o usuário logado.
-    """
-    credentials_exception = HTTPException(
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as Credenciais",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = core.decode_access_token(token)
-        user_id = payload.get("sub")
 
-        if user_id is None:
-            raise credentials_exception
-
-        user_id = int(user_id)
-
-        user = repository_user.get_user_by_id(db, user_id)
 
+def _decode_token(token: str) -> Tuple[int, Optional[str], Optional[int]]:
+    """
+    Valida assinatura e 'exp' do token e retorna (id do usuário, 'jti', 'sid').
+    """
+    try:
+        payload = core.decode_access_token(token)
+        # Falta do 'sub' ou falha no int() caem no TypeError/ValueError
+        user_id = int(payload.get("sub"))
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token Expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except (JWTError, ValueError):  # Pega erros de decodificação ou falha no int()
-        raise credentials_exception
+    except (JWTError, TypeError, ValueError):
+        raise _credentials_exception()
+    # Tokens emitidos antes das claims 'jti'/'sid' valem até expirar
+    return user_id, payload.get("jti"), payload.get("sid")
+
+
+def _get_token_user_id(token: str) -> int:
+    """
+    Valida o token (assinatura, 'exp' e revogação) e retorna o id do usuário.
+    A revogação do token ou da sessão dele (logout) é verificada em memória
+    (ver app.revocation).
+    """
+    user_id, jti, session_id = _decode_token(token)
+    if revocation.is_token_revoked(jti, session_id):
+        raise _credentials_exception()
+    return user_id
+
+
+async def _get_token_user_id_async(token: str) -> int:
+    """Versão de _get_token_user_id que não consulta o banco no event loop."""
+    user_id, jti, session_id = _decode_token(token)
+    if await revocation.is_token_revoked_async(jti, session_id):
+        raise _credentials_exception()
+    return user_id
+
+
+def get_current_user(
+    db: Annotated[Session, Depends(get_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> models.Usuario:
+    """
+    Dependência do FastAPI para decodificar o token e retornar o usuário logado.
+    O usuário vem do cache em memória (ver services.get_authenticated_user).
+    """
+    user_id = _get_token_user_id(token)
+    # Commits desta sessão contam como escrita do usuário (ver app.replica)
+    db.info[replica.SESSION_USER_KEY] = user_id
+    try:
+        user = services.get_authenticated_user(db, user_id)
     except Exception as e:
         logger.error(f"Falha ao obter usuário atual: {e}", exc_info=True)
         raise HTTPException(
@@ -53,5 +87,120 @@ def get_current_user(
         )
 
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
+
+
+async def get_current_user_async(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> models.Usuario:
+    """
+    Versão de get_current_user para as rotas 'async def' (usa a AsyncSession da rota).
+    Do usuário só devem ser lidos os campos do cache (ex: id, email, nome).
+    """
+    user_id = await _get_token_user_id_async(token)
+    db.info[replica.SESSION_USER_KEY] = user_id
+    try:
+        user = await services.get_authenticated_user_async(db, user_id)
+    except Exception as e:
+        logger.error(f"Falha ao obter usuário atual: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Falha ao obter dados do usuário.",
+        )
+
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+
+def get_read_db(
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+) -> Iterator[Session]:
+    """
+    Sessão para rotas só de leitura: na réplica (se configurada), ou no
+    primário logo após uma escrita do próprio usuário (ver app.replica).
+    Nada deve ser gravado nela.
+    """
+    db = replica.read_sessionmaker(current_user.id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_read_db_async(
+    current_user: Annotated[models.Usuario, Depends(get_current_user_async)],
+) -> AsyncIterator[AsyncSession]:
+    """Versão de get_read_db para as rotas 'async def'."""
+    session_factory = await replica.async_read_sessionmaker(current_user.id)
+    async with session_factory() as db:
+        yield db
+
+
+def get_current_token_claims(
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> dict:
+    """
+    Dependência que retorna as claims do access token (ex: 'sid', a sessão).
+    Usar junto com get_current_user, que já valida o token.
+    """
+    try:
+        return core.decode_access_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível validar as Credenciais",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _request_body_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"O corpo da requisição excede o limite de {max_bytes} bytes.",
+    )
+
+
+async def spool_request_body(
+    request: Request, max_bytes: int
+) -> AsyncIterator[BinaryIO]:
+    """
+    Recebe o corpo bruto da requisição em pedaços e o grava em um arquivo
+    temporário (em disco a partir de 1 MiB), sem nunca tê-lo inteiro na memória.
+    Acima de 'max_bytes' a recepção é interrompida com 413.
+    """
+    content_length = request.headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise _request_body_too_large(max_bytes)
+
+    spool = UploadFile(
+        file=tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY)
+    )
+    try:
+        recebidos = 0
+        async for chunk in request.stream():
+            # O Content-Length pode estar ausente (chunked) ou mentir
+            recebidos += len(chunk)
+            if recebidos > max_bytes:
+                raise _request_body_too_large(max_bytes)
+            # UploadFile.write usa o threadpool quando o arquivo já está em disco
+            await spool.write(chunk)
+        await spool.seek(0)
+        yield spool.file
+    finally:
+        await spool.close()
+
+
+async def get_spooled_request_body(request: Request) -> AsyncIterator[BinaryIO]:
+    """
+    Dependência do FastAPI com o corpo bruto da requisição em um arquivo
+    temporário (ver spool_request_body), limitado a MAX_REQUEST_BODY_BYTES.
+    Declarar depois de get_current_user, para não receber o corpo de quem
+    não está autenticado.
+    """
+    async for content in spool_request_body(
+        request, core.settings.MAX_REQUEST_BODY_BYTES
+    ):
+        yield content
@@ -0,0 +1,92 @@
+from typing import Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from ..exceptions import RangeNotSatisfiableError
+
+# Respostas privadas do usuário: o cliente pode guardar, mas deve revalidar sempre
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def make_etag(versao: str) -> str:
+    """Formata uma versão/hash como ETag forte (entre aspas)."""
+    return f'"{versao}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Verifica se o header 'If-None-Match' da requisição contém 'etag'.
+    Usa a comparação fraca (ignora o prefixo 'W/'), como pede o HTTP para esse header.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    """Resposta 304 (sem corpo) para quando o cliente já tem a versão atual."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def set_etag(response: Response, etag: str, cache_control: str = PRIVATE_REVALIDATE):
+    """Adiciona o ETag e o Cache-Control a uma resposta 200."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def if_range_matches(request: Request, etag: Optional[str]) -> bool:
+    """
+    Verifica a pré-condição 'If-Range': sem o header, o Range vale sempre;
+    com ele, só vale se for igual ao ETag forte atual (datas e ETags fracos não valem).
+    """
+    header = request.headers.get("if-range")
+    if header is None:
+        return True
+    header = header.strip()
+    return bool(etag) and not header.startswith("W/") and header == etag
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta um header 'Range' de um único intervalo ('bytes=inicio-fim',
+    'bytes=inicio-' ou 'bytes=-sufixo') para um conteúdo de 'size' bytes.
+
+    Retorna (inicio, fim) inclusivos, ou None quando o header não existe,
+    é inválido ou pede vários intervalos (nesses casos o conteúdo inteiro é enviado).
+    Lança RangeNotSatisfiableError se o intervalo estiver fora do conteúdo.
+    """
+    if not header:
+        return None
+    unidade, _, intervalo = header.partition("=")
+    if unidade.strip().lower() != "bytes" or "," in intervalo:
+        return None
+    inicio_str, sep, fim_str = intervalo.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not inicio_str:
+            # 'bytes=-N': os últimos N bytes
+            sufixo = int(fim_str)
+            if sufixo < 0:
+                return None
+            if sufixo == 0 or size == 0:
+                raise RangeNotSatisfiableError("Intervalo solicitado vazio.")
+            return max(size - sufixo, 0), size - 1
+        inicio = int(inicio_str)
+        fim = int(fim_str) if fim_str else size - 1
+    except ValueError:
+        return None
+    if inicio < 0 or (fim_str and fim < inicio):
+        return None
+    if inicio >= size:
+        raise RangeNotSatisfiableError(
+            f"O intervalo começa depois do fim do conteúdo ({size} bytes)."
+        )
+    return inicio, min(fim, size - 1)
@@ -1,19 +1,42 @@
 import logging
 import base64
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Annotated, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, AsyncIterator, BinaryIO, List, Optional
 
 
-from .. import schemas, models
-from ..database import get_db
+from .. import schemas, models, storage
+from ..database import get_async_db, get_db
 from ..exceptions import (
     DataNotFoundError,
     DuplicateDataError,
+    RangeNotSatisfiableError,
     StorageLimitExceededError,
+    UploadSessionConflictError,
 )
 from .. import services
-from .dependencies import get_current_user
+from . import http_cache
+from .dependencies import (
+    get_current_user,
+    get_current_user_async,
+    get_read_db_async,
+    get_spooled_request_body,
+    spool_request_body,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +53,9 @@ def _build_data_response(db_dado: models.Dado) -> schemas.DataResponse:
 
     if db_dado.tipo == models.TipoDado.ARQUIVO and db_dado.arquivo:
         # Converte os bytes do arquivo para Base64
-        arquivo_data_str = ""
-        if db_dado.arquivo.arquivo:
-            arquivo_data_str = base64.b64encode(db_dado.arquivo.arquivo).decode("utf-8")
+        arquivo_data_str = base64.b64encode(storage.read_blob(db_dado.arquivo)).decode(
+            "utf-8"
+        )
 
         file_response = schemas.FileResponse(
             id=db_dado.arquivo.id,
@@ -66,6 +89,44 @@ def _build_data_response(db_dado: models.Dado) -> schemas.DataResponse:
     )
 
 
+def _build_data_summary_response(db_dado: models.Dado) -> schemas.DataSummaryResponse:
+    """
+    Converte um models.Dado carregado no modo resumo em um schemas.DataSummaryResponse.
+    Não acessa o conteúdo do arquivo nem a senha criptografada (que não foram carregados).
+    """
+    file_response: Optional[schemas.FileSummaryResponse] = None
+    credential_response: Optional[schemas.CredentialSummaryResponse] = None
+
+    if db_dado.tipo == models.TipoDado.ARQUIVO and db_dado.arquivo:
+        file_response = schemas.FileSummaryResponse(
+            id=db_dado.arquivo.id,
+            extensao=db_dado.arquivo.extensao,
+            nome_arquivo=db_dado.arquivo.nome_arquivo,
+            tamanho=db_dado.arquivo.tamanho,
+        )
+
+    elif db_dado.tipo == models.TipoDado.SENHA and db_dado.senha:
+        credential_response = schemas.CredentialSummaryResponse(
+            id=db_dado.senha.id,
+            host_url=db_dado.senha.host_url,
+            email=db_dado.senha.email,
+        )
+
+    return schemas.DataSummaryResponse(
+        id=db_dado.id,
+        usuario_id=db_dado.usuario_id,
+        nome_aplicacao=db_dado.nome_aplicacao,
+        descricao=db_dado.descricao,
+        tipo=db_dado.tipo,
+        criado_em=db_dado.criado_em,
+        arquivo=file_response,
+        senha=credential_response,
+        separadores=[
+            schemas.SeparatorResponse.model_validate(s) for s in db_dado.separadores
+        ],
+    )
+
+
 @router.post(
     "/credentials",
     response_model=schemas.DataResponse,
@@ -155,32 +216,532 @@ def create_file(
         )
 
 
-@router.get("/{data_id}", response_model=schemas.DataResponse, tags=["Dados"])
-def get_single_data_entry(
+@router.post(
+    "/files/upload",
+    status_code=status.HTTP_201_CREATED,
+    response_model=schemas.DataSummaryResponse,
+    tags=["Arquivos"],
+)
+def upload_file(
+    nome_aplicacao: Annotated[str, Query()],
+    extensao: Annotated[str, Query()],
+    nome_arquivo: Annotated[str, Query()],
+    iv_arquivo: Annotated[str, Header(alias="X-IV-Arquivo", min_length=1)],
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    # Depois do usuário: o corpo só é recebido de quem está autenticado
+    content: Annotated[BinaryIO, Depends(get_spooled_request_body)],
+    requests: Request,
+    tasks: BackgroundTasks,
+    descricao: Annotated[Optional[str], Query()] = None,
+    id_pasta: Annotated[Optional[int], Query()] = None,
+    id_tags: Annotated[List[int], Query()] = [],
+):
+    """
+    Cria um novo arquivo enviando o conteúdo criptografado como bytes brutos
+    (application/octet-stream, sem Base64) no corpo da requisição.
+    O IV vai no header 'X-IV-Arquivo' e os demais metadados na query string.
+    Retorna apenas os metadados do arquivo criado.
+    """
+    ip = requests.client.host if requests.client else "desconhecido"
+    dispositivo = requests.headers.get("User-Agent", "desconhecido")
+    log_context = schemas.LogContext(ip=ip, dispositivo=dispositivo)
+    try:
+        file_data = schemas.DataCreateFileUpload(
+            nome_aplicacao=nome_aplicacao,
+            descricao=descricao,
+            iv_arquivo=iv_arquivo,
+            extensao=extensao,
+            nome_arquivo=nome_arquivo,
+            id_pasta=id_pasta,
+            id_tags=id_tags,
+        )
+        created_file = services.create_file_from_stream(
+            db=db,
+            user=current_user,
+            file_data=file_data,
+            content=content,
+            log_context=log_context,
+            tasks=tasks,
+        )
+        return _build_data_summary_response(created_file)
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except DuplicateDataError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except StorageLimitExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    except Exception as e:
+        logger.error(
+            f"Falha ao receber upload de arquivo do usuário {current_user.id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao salvar o arquivo.",
+        )
+
+
+@router.post(
+    "/files/uploads",
+    status_code=status.HTTP_201_CREATED,
+    response_model=schemas.UploadSessionResponse,
+    tags=["Arquivos"],
+)
+def create_upload_session(
+    upload_data: schemas.UploadSessionCreate,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+):
+    """
+    Inicia um upload retomável em partes.
+    Depois, envie cada parte em 'PUT /data/files/uploads/{id}/chunks/{indice}'
+    (todas com 'tamanho_chunk' bytes, menos a última) e finalize em
+    'POST /data/files/uploads/{id}/complete'.
+    """
+    try:
+        return services.create_upload_session(db, current_user, upload_data)
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except DuplicateDataError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except StorageLimitExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    except Exception as e:
+        logger.error(
+            f"Falha ao iniciar upload em partes do usuário {current_user.id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao iniciar o upload.",
+        )
+
+
+def get_upload_chunk_limit(
+    session_id: str,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+) -> int:
+    """Dependência com o tamanho máximo da parte, o 'tamanho_chunk' da sessão."""
+    try:
+        return services.get_upload_chunk_size(db, current_user, session_id)
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+async def get_spooled_upload_chunk(
+    request: Request,
+    max_bytes: Annotated[int, Depends(get_upload_chunk_limit)],
+) -> AsyncIterator[BinaryIO]:
+    """
+    Corpo da parte em um arquivo temporário, recebido só depois de autenticar
+    o usuário e encontrar a sessão, e limitado ao 'tamanho_chunk' dela (413).
+    """
+    async for content in spool_request_body(request, max_bytes):
+        yield content
+
+
+@router.put(
+    "/files/uploads/{session_id}/chunks/{index}",
+    response_model=schemas.UploadSessionResponse,
+    tags=["Arquivos"],
+)
+def put_upload_chunk(
+    session_id: str,
+    index: Annotated[int, Path(ge=0)],
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    content: Annotated[BinaryIO, Depends(get_spooled_upload_chunk)],
+):
+    """
+    Envia (ou reenvia) a parte 'index' de um upload, como bytes brutos no corpo.
+    Retorna o estado atualizado da sessão.
+    """
+    try:
+        return services.put_upload_chunk(
+            db, current_user, session_id=session_id, index=index, content=content
+        )
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(
+            f"Falha ao receber parte {index} do upload {session_id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao salvar a parte do upload.",
+        )
+
+
+@router.get(
+    "/files/uploads/{session_id}",
+    response_model=schemas.UploadSessionResponse,
+    tags=["Arquivos"],
+)
+def get_upload_session_status(
+    session_id: str,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+):
+    """Retorna quais partes do upload já foram recebidas (para retomar o envio)."""
+    try:
+        return services.get_upload_session_status(db, current_user, session_id)
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error(
+            f"Falha ao buscar estado do upload {session_id}: {e}", exc_info=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao buscar o upload.",
+        )
+
+
+@router.post(
+    "/files/uploads/{session_id}/complete",
+    status_code=status.HTTP_201_CREATED,
+    response_model=schemas.DataSummaryResponse,
+    tags=["Arquivos"],
+)
+def complete_upload_session(
+    session_id: str,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    requests: Request,
+    tasks: BackgroundTasks,
+):
+    """
+    Finaliza um upload em partes: junta as partes e cria o arquivo.
+    Retorna apenas os metadados do arquivo criado.
+    """
+    ip = requests.client.host if requests.client else "desconhecido"
+    dispositivo = requests.headers.get("User-Agent", "desconhecido")
+    log_context = schemas.LogContext(ip=ip, dispositivo=dispositivo)
+    try:
+        created_file = services.complete_upload_session(
+            db,
+            current_user,
+            session_id=session_id,
+            log_context=log_context,
+            tasks=tasks,
+        )
+        return _build_data_summary_response(created_file)
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except (DuplicateDataError, UploadSessionConflictError) as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except StorageLimitExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    except Exception as e:
+        logger.error(
+            f"Falha ao finalizar upload {session_id} do usuário {current_user.id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao salvar o arquivo.",
+        )
+
+
+@router.delete(
+    "/files/uploads/{session_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["Arquivos"],
+)
+def cancel_upload_session(
+    session_id: str,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+):
+    """Cancela um upload em partes e descarta as partes recebidas."""
+    try:
+        services.cancel_upload_session(db, current_user, session_id)
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error(f"Falha ao cancelar upload {session_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao cancelar o upload.",
+        )
+
+
+@router.put(
+    "/files/{data_id}/content",
+    response_model=schemas.DataSummaryResponse,
+    tags=["Arquivos"],
+)
+def replace_file_content(
     data_id: int,
+    iv_arquivo: Annotated[str, Header(alias="X-IV-Arquivo", min_length=1)],
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    # Depois do usuário: o corpo só é recebido de quem está autenticado
+    content: Annotated[BinaryIO, Depends(get_spooled_request_body)],
     requests: Request,
     tasks: BackgroundTasks,
 ):
-    """Busca e retorna um Dado específico (arquivo ou credencial)."""
+    """
+    Substitui o conteúdo de um arquivo existente.
+    O corpo da requisição é o conteúdo criptografado em bytes brutos
+    (application/octet-stream) e o novo IV vai no header 'X-IV-Arquivo'.
+    Retorna apenas os metadados do arquivo.
+    """
     ip = requests.client.host if requests.client else "desconhecido"
     dispositivo = requests.headers.get("User-Agent", "desconhecido")
     log_context = schemas.LogContext(ip=ip, dispositivo=dispositivo)
     try:
-        db_dado = services.get_specific_data(
+        updated_dado = services.replace_file_content(
             db=db,
             user=current_user,
             data_id=data_id,
+            iv_arquivo=iv_arquivo,
+            content=content,
             log_context=log_context,
             tasks=tasks,
         )
-        return _build_data_response(db_dado)
+        return _build_data_summary_response(updated_dado)
     except DataNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except StorageLimitExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
     except Exception as e:
         logger.error(
-            f"Falha ao buscar dado com id {data_id} do usuário {current_user.id}: {e}",
+            f"Falha ao substituir conteúdo do arquivo {data_id} do usuário {current_user.id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao atualizar o arquivo.",
+        )
+
+
+@router.get(
+    "/files/{data_id}/content",
+    response_class=StreamingResponse,
+    tags=["Arquivos"],
+)
+def download_file_content(
+    data_id: int,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    requests: Request,
+    tasks: BackgroundTasks,
+):
+    """
+    Baixa o conteúdo criptografado de um arquivo como bytes brutos
+    (application/octet-stream), enviado em pedaços.
+    O IV do arquivo é enviado no header 'X-IV-Arquivo'.
+
+    Aceita 'Range' (um único intervalo) para baixar só uma parte ou retomar um
+    download interrompido (resposta 206). Com 'If-Range' igual ao ETag, o intervalo
+    só é respeitado se o conteúdo não mudou; caso contrário, o arquivo inteiro é enviado.
+    A visualização é registrada uma vez por download: no envio do arquivo inteiro
+    ou do intervalo que começa no byte 0, e nunca nas continuações nem num 416.
+    """
+    try:
+        file_info = services.get_file_content_info(
+            db=db, user=current_user, data_id=data_id
+        )
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error(
+            f"Falha ao preparar download do arquivo {data_id} do usuário {current_user.id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao baixar o arquivo.",
+        )
+
+    headers = {"X-IV-Arquivo": file_info.iv_arquivo or ""}
+    etag = (
+        http_cache.make_etag(file_info.hash_conteudo)
+        if file_info.hash_conteudo
+        else None
+    )
+    if etag:
+        headers["ETag"] = etag
+
+    # Linhas antigas sem 'tamanho' (antes do reconcile-storage) não aceitam Range
+    byte_range = None
+    if file_info.tamanho:
+        headers["Accept-Ranges"] = "bytes"
+        if http_cache.if_range_matches(requests, etag):
+            try:
+                byte_range = http_cache.parse_byte_range(
+                    requests.headers.get("range"), file_info.tamanho
+                )
+            except RangeNotSatisfiableError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+                    detail=str(e),
+                    headers={"Content-Range": f"bytes */{file_info.tamanho}"},
+                )
+
+    if byte_range is None or byte_range[0] == 0:
+        ip = requests.client.host if requests.client else "desconhecido"
+        dispositivo = requests.headers.get("User-Agent", "desconhecido")
+        log_context = schemas.LogContext(ip=ip, dispositivo=dispositivo)
+        services.log_file_download(
+            db=db,
+            user=current_user,
+            data_id=data_id,
+            log_context=log_context,
+            tasks=tasks,
+        )
+
+    if byte_range is None:
+        if file_info.tamanho:
+            headers["Content-Length"] = str(file_info.tamanho)
+        return StreamingResponse(
+            services.iter_file_content(file_info),
+            media_type="application/octet-stream",
+            headers=headers,
+            background=tasks,
+        )
+
+    inicio, fim = byte_range
+    headers["Content-Range"] = f"bytes {inicio}-{fim}/{file_info.tamanho}"
+    headers["Content-Length"] = str(fim - inicio + 1)
+    return StreamingResponse(
+        services.iter_file_content(file_info, offset=inicio, length=fim - inicio + 1),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="application/octet-stream",
+        headers=headers,
+        background=tasks,
+    )
+
+
+@router.get(
+    "/credentials/by-host",
+    response_model=List[schemas.DataResponse],
+    tags=["Credenciais"],
+)
+def get_credentials_by_host(
+    url: Annotated[str, Query(min_length=1)],
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+):
+    """
+    Retorna apenas as credenciais do usuário para o site de 'url'
+    (comparando pelo domínio registrável, ex: 'login.site.com' -> 'site.com').
+    """
+    try:
+        data = services.get_credentials_by_host(db, current_user, url)
+        return [_build_data_response(dado) for dado in data]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(
+            f"Falha ao buscar credenciais por host do usuário {current_user.id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao buscar credenciais.",
+        )
+
+
+@router.get(
+    "/credentials/index",
+    response_model=schemas.CredentialIndexResponse,
+    tags=["Credenciais"],
+)
+def get_credential_index(
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    requests: Request,
+    response: Response,
+):
+    """
+    Retorna o índice compacto (id, nome, email, host) das credenciais do usuário.
+    A resposta tem ETag: reenviando-o em 'If-None-Match', a API responde 304
+    (sem corpo) enquanto o índice não mudar.
+    """
+    try:
+        index = services.get_credential_index(db, current_user)
+    except Exception as e:
+        logger.error(
+            f"Falha ao montar índice de credenciais do usuário {current_user.id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao buscar o índice de credenciais.",
+        )
+
+    etag = http_cache.make_etag(index.versao)
+    if http_cache.etag_matches(requests, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_etag(response, etag)
+    return index
+
+
+@router.get("/{data_id}", response_model=schemas.DataResponse, tags=["Dados"])
+async def get_single_data_entry(
+    data_id: int,
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user_async)],
+    requests: Request,
+    response: Response,
+    tasks: BackgroundTasks,
+):
+    """
+    Busca e retorna um Dado específico (arquivo ou credencial).
+    A resposta tem ETag: reenviando-o em 'If-None-Match', a API responde 304
+    (sem corpo e sem ler o conteúdo do arquivo) enquanto o Dado não mudar.
+    A visualização só é registrada (e notificada) quando o Dado é enviado,
+    não num 304.
+    """
+    ip = requests.client.host if requests.client else "desconhecido"
+    dispositivo = requests.headers.get("User-Agent", "desconhecido")
+    log_context = schemas.LogContext(ip=ip, dispositivo=dispositivo)
+    user_id = current_user.id
+    try:
+        db_dado = await services.get_specific_data_async(
+            db=db, user=current_user, data_id=data_id
+        )
+        versao = services.get_data_version(db_dado)
+        if versao:
+            etag = http_cache.make_etag(versao)
+            if http_cache.etag_matches(requests, etag):
+                return http_cache.not_modified(etag)
+            http_cache.set_etag(response, etag)
+        db_dado = await services.log_data_view_async(
+            db=db,
+            user=current_user,
+            db_dado=db_dado,
+            log_context=log_context,
+            tasks=tasks,
+        )
+        # A leitura do conteúdo (disco) e o Base64 ficam fora do event loop
+        return await run_in_threadpool(_build_data_response, db_dado)
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error(
+            f"Falha ao buscar dado com id {data_id} do usuário {user_id}: {e}",
             exc_info=True,
         )
         raise HTTPException(
@@ -312,18 +873,43 @@ def delete_data(
         )
 
 
-@router.post("/search", response_model=List[schemas.DataResponse], tags=["Dados"])
-def search_data_paginated(
+@router.post(
+    "/search",
+    response_model=List[schemas.DataResponse] | List[schemas.DataSummaryResponse],
+    tags=["Dados"],
+)
+async def search_data_paginated(
     payload: schemas.FilterPageConfig,
-    db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db_async)],
+    current_user: Annotated[models.Usuario, Depends(get_current_user_async)],
+    response: Response,
 ):
-    """Busca paginada de dados."""
+    """
+    Busca paginada de dados.
+    Com 'resumo' verdadeiro, retorna apenas os metadados de cada item
+    (sem o conteúdo dos arquivos e sem as senhas criptografadas).
+
+    Se a página vier cheia, o header 'X-Proximo-Cursor' traz o cursor
+    da próxima página, que deve ser enviado no campo 'cursor'.
+    """
     try:
-        data = services.get_data_paginated_filtered(db, current_user, payload)
-        return [_build_data_response(dado) for dado in data]
+        data = await services.get_data_paginated_filtered_async(
+            db, current_user, payload
+        )
+        if len(data) == payload.page_size:
+            response.headers["X-Proximo-Cursor"] = services.encode_page_cursor(
+                data[-1].criado_em, data[-1].id
+            )
+        if payload.resumo:
+            return [_build_data_summary_response(dado) for dado in data]
+        # A leitura do conteúdo (disco) e o Base64 ficam fora do event loop
+        return await run_in_threadpool(
+            lambda: [_build_data_response(dado) for dado in data]
+        )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(
             f"Falha ao buscar dados paginados do usuário {current_user.id}: {e}",
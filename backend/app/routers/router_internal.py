@@ -0,0 +1,67 @@
+import logging
+import secrets
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Optional
+
+from .. import audit_log, db_pool, geoip, hashing, logging_config, mailer
+from ..core import settings
+from ..database import async_engine, async_replica_engine, engine, replica_engine
+
+logger = logging.getLogger(__name__)
+
+_LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def require_internal_access(request: Request):
+    """
+    Libera as rotas internas para requisições com o header 'X-Internal-Token'
+    igual a INTERNAL_API_TOKEN e, se INTERNAL_ALLOW_LOOPBACK estiver ligado,
+    para as conexões do próprio servidor (localhost).
+    """
+    host: Optional[str] = request.client.host if request.client else None
+    # Atrás de um proxy reverso local toda conexão vem de localhost: por isso é opcional
+    if settings.INTERNAL_ALLOW_LOOPBACK and host in _LOOPBACK_HOSTS:
+        return
+    token = request.headers.get("X-Internal-Token")
+    if (
+        settings.INTERNAL_API_TOKEN
+        and token
+        and secrets.compare_digest(token, settings.INTERNAL_API_TOKEN)
+    ):
+        return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso negado.")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Interno"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_access)],
+)
+
+
+@router.get("/metrics")
+def get_internal_metrics():
+    """
+    Métricas de operação da API (deste worker): fila do pool do Argon2,
+    ocupação/espera dos pools de conexões do banco (rotas síncronas e assíncronas,
+    e da réplica de leitura, se configurada), fila de logs, buffer dos logs de
+    auditoria, cache do GeoIP e fila de emails.
+    """
+    pools = {
+        "sync": db_pool.get_pool_metrics(engine),
+        "async": db_pool.get_pool_metrics(async_engine.sync_engine),
+    }
+    if replica_engine is not None:
+        pools["replica_sync"] = db_pool.get_pool_metrics(replica_engine)
+        pools["replica_async"] = db_pool.get_pool_metrics(
+            async_replica_engine.sync_engine
+        )
+    return {
+        "argon2_pool": hashing.get_metrics(),
+        "db_pool": pools,
+        "logs": logging_config.get_metrics(),
+        "audit_logs": audit_log.get_metrics(),
+        "geoip": geoip.get_metrics(),
+        "email": mailer.get_metrics(),
+    }
@@ -4,8 +4,7 @@ from typing import Annotated, List
 import logging
 
 from .. import schemas, services, models, services
-from ..database import get_db
-from .dependencies import get_current_user
+from .dependencies import get_current_user, get_read_db
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/notifications", tags=["Notificações e Logs"])
@@ -13,7 +12,7 @@ router = APIRouter(prefix="/notifications", tags=["Notificações e Logs"])
 
 @router.get("/", response_model=List[schemas.EventoResponse])
 def get_my_notifications(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
     page_number: int = Query(1, gt=0, description="Número da página"),
     page_size: int = Query(
@@ -46,7 +45,7 @@ def get_my_notifications(
     tags=["Notificações e Logs"],  # Tag atualizada
 )
 def get_my_activity_logs(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
     page_number: int = Query(1, gt=0, description="Número da página"),
     page_size: int = Query(
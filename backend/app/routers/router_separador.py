@@ -1,12 +1,21 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Request,
+    Response,
+    BackgroundTasks,
+)
 from sqlalchemy.orm import Session
 from typing import Annotated, List
 
 from .. import schemas, models, services
 from ..database import get_db
 from ..exceptions import DataNotFoundError, SeparatorNameTakenError
-from .dependencies import get_current_user
+from . import http_cache
+from .dependencies import get_current_user, get_read_db
 
 logger = logging.getLogger(__name__)
 
@@ -94,12 +103,23 @@ def create_tag(
 
 @router.get("/tags", response_model=List[schemas.SeparatorResponse], tags=["Tags"])
 def get_all_user_tags(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    request: Request,
+    response: Response,
 ):
-    """Busca a lista plana de todas as Tags do usuário logado."""
+    """
+    Busca a lista plana de todas as Tags do usuário logado.
+    Responde 304 se o 'If-None-Match' enviado for igual ao ETag atual.
+    """
     try:
         tags = services.get_tags_by_user(db, user_id=current_user.id)
+        etag = http_cache.make_etag(
+            services.get_separators_version(current_user.id, tags)
+        )
+        if http_cache.etag_matches(request, etag):
+            return http_cache.not_modified(etag)
+        http_cache.set_etag(response, etag)
         return tags
     except Exception as e:
         logger.error(
@@ -115,12 +135,23 @@ def get_all_user_tags(
     "/folders/root", response_model=List[schemas.SeparatorResponse], tags=["Pastas"]
 )
 def get_root_level_folders(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    request: Request,
+    response: Response,
 ):
-    """Busca a lista de Pastas que estão no nível raiz."""
+    """
+    Busca a lista de Pastas que estão no nível raiz.
+    Responde 304 se o 'If-None-Match' enviado for igual ao ETag atual.
+    """
     try:
         folders = services.get_root_folders(db, user_id=current_user.id)
+        etag = http_cache.make_etag(
+            services.get_separators_version(current_user.id, folders)
+        )
+        if http_cache.etag_matches(request, etag):
+            return http_cache.not_modified(etag)
+        http_cache.set_etag(response, etag)
         return folders
     except Exception as e:
         logger.error(
@@ -140,7 +171,7 @@ def get_root_level_folders(
 )
 def get_subfolders(
     folder_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
 ):
     """Busca a lista de Subpastas de uma 'folder_id' específica."""
@@ -1,13 +1,24 @@
 import logging
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+    Request,
+    Response,
+)
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated, List
 
-from .. import schemas, models, services
-from ..database import get_db
+from .. import schemas, models, services, storage
+from ..database import get_async_db, get_db
 from ..exceptions import (
     DataNotFoundError,
 )
+from . import http_cache
 from .dependencies import get_current_user
 import base64
 
@@ -79,9 +90,9 @@ def create_new_share(
     "/{token_acesso}",
     response_model=schemas.SharedDataViewResponse,
 )
-def get_shared_data(
+async def get_shared_data(
     token_acesso: str,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     request: Request,
     tasks: BackgroundTasks,
 ):
@@ -93,20 +104,23 @@ def get_shared_data(
     dispositivo = request.headers.get("User-Agent", "desconhecido")
     log_context = schemas.LogContext(ip=ip, dispositivo=dispositivo)
     try:
-        db_share = services.get_shared_data_by_token(
+        db_share = await services.get_shared_data_by_token_async(
             db, token_acesso=token_acesso, log_context=log_context, tasks=tasks
         )
 
         # Constrói a lista de itens para a resposta
-        itens_view = [
-            schemas.SharedItemView(
-                dado_criptografado=base64.b64encode(item.dado_criptografado).decode(
-                    "utf-8"
-                ),
-                meta=item.meta,
-            )
-            for item in db_share.dados_compartilhados
-        ]
+        # (a leitura do conteúdo em disco e o Base64 ficam fora do event loop)
+        itens_view = await run_in_threadpool(
+            lambda: [
+                schemas.SharedItemView(
+                    dado_criptografado=base64.b64encode(
+                        storage.read_blob(item)
+                    ).decode("utf-8"),
+                    meta=item.meta,
+                )
+                for item in db_share.dados_compartilhados
+            ]
+        )
 
         return schemas.SharedDataViewResponse(
             itens=itens_view, data_expiracao=db_share.data_expiracao
@@ -129,13 +143,22 @@ def get_shared_data(
 def get_my_shares(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    request: Request,
+    response: Response,
 ):
     """
     Busca a lista completa de todos os links de compartilhamento
     criados pelo usuário logado.
+    Responde 304 se o 'If-None-Match' enviado for igual ao ETag atual.
     """
     try:
         shares = services.get_shares_by_user_id(db, user_id=current_user.id)
+        etag = http_cache.make_etag(
+            services.get_shares_version(current_user.id, shares)
+        )
+        if http_cache.etag_matches(request, etag):
+            return http_cache.not_modified(etag)
+        http_cache.set_etag(response, etag)
         return shares
     except Exception as e:
         logger.error(
@@ -9,15 +9,22 @@ from fastapi import (
 )
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 from starlette.responses import JSONResponse
 
 # Imports de dentro do projeto
 from .. import schemas, models
-from ..database import get_db
-from ..exceptions import UserNotFoundError, EmailAlreadyExistsError
+from ..database import get_async_db, get_db
+from ..exceptions import (
+    AuthenticationError,
+    UserNotFoundError,
+    EmailAlreadyExistsError,
+    LoginThrottledError,
+    PasswordHashingBusyError,
+)
 from .. import services
-from .dependencies import get_current_user
+from .dependencies import get_current_token_claims, get_current_user, get_read_db
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +44,12 @@ def create_user(user_data: schemas.UserCreate, db: Annotated[Session, Depends(ge
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT, detail="Email já registrado."
             )
+    except PasswordHashingBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.error(f"Falha ao criar conta: {e}", exc_info=True)
         raise HTTPException(
@@ -48,11 +61,11 @@ def create_user(user_data: schemas.UserCreate, db: Annotated[Session, Depends(ge
 
 
 @router.post("/login", response_model=schemas.LoginResponse)
-def login(
+async def login(
     request: Request,
     tasks: BackgroundTasks,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
 ):
     """Endpoint para autenticar um usuário."""
     try:
@@ -60,7 +73,7 @@ def login(
             ip=request.client.host if request.client else "desconhecido",
             dispositivo=request.headers.get("User-Agent", "desconhecido"),
         )
-        login_response = services.authenticate_and_login_user(
+        login_response = await services.authenticate_and_login_user_async(
             db=db,
             email=form_data.username,
             password=form_data.password,
@@ -79,6 +92,18 @@ def login(
 
         return login_response
 
+    except LoginThrottledError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except PasswordHashingBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.error(f"Erro inesperado ao tentar login: {e}", exc_info=True)
         raise HTTPException(
@@ -87,6 +112,73 @@ def login(
         )
 
 
+@router.post("/token/refresh", response_model=schemas.TokenRefreshResponse)
+def refresh_token(
+    refresh_data: schemas.TokenRefreshRequest,
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+):
+    """
+    Troca o refresh token (recebido no login) por um novo access token, sem
+    precisar da senha. O refresh token é trocado a cada uso: guarde o novo e
+    descarte o anterior (reusar um token já trocado encerra a sessão).
+    """
+    log_context = schemas.LogContext(
+        ip=request.client.host if request.client else "desconhecido",
+        dispositivo=request.headers.get("User-Agent", "desconhecido"),
+    )
+    try:
+        return services.refresh_session(
+            db, refresh_token=refresh_data.refresh_token, log_context=log_context
+        )
+    except AuthenticationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    except Exception as e:
+        logger.error(f"Erro inesperado ao renovar token: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao renovar o token.",
+        )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    current_user: Annotated[models.Usuario, Depends(get_current_user)],
+    claims: Annotated[dict, Depends(get_current_token_claims)],
+    db: Annotated[Session, Depends(get_db)],
+    request: Request,
+    tasks: BackgroundTasks,
+):
+    """
+    Encerra a sessão atual: o refresh token dela e todos os access tokens
+    emitidos para ela (não só o usado nesta requisição) deixam de funcionar.
+    """
+    log_context = schemas.LogContext(
+        ip=request.client.host if request.client else "desconhecido",
+        dispositivo=request.headers.get("User-Agent", "desconhecido"),
+    )
+    try:
+        services.logout(
+            db,
+            user=current_user,
+            claims=claims,
+            log_context=log_context,
+            tasks=tasks,
+        )
+    except Exception as e:
+        logger.error(
+            f"Erro ao encerrar sessão do usuário {current_user.id}: {e}", exc_info=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao encerrar a sessão.",
+        )
+
+
 @router.get("/users/me", response_model=schemas.UserResponse)
 def get_user_me(current_user: Annotated[models.Usuario, Depends(get_current_user)]):
     """Retorna os dados do usuário logado atualmente."""
@@ -179,7 +271,7 @@ def delete_user_me(
     "/users/me/dashboard", response_model=schemas.DashboardResponse, tags=["Usuário"]
 )
 def get_user_dashboard_stats(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[models.Usuario, Depends(get_current_user)],
 ):
     """
@@ -150,10 +150,25 @@ class LoginResponse(UserResponse):
     """Schema de resposta completa ao fazer login."""
 
     access_token: str
+    refresh_token: str
     saltKDF: str
     token_type: str = "bearer"
 
 
+class TokenRefreshRequest(BaseModel):
+    """Schema para trocar um refresh token por novos tokens."""
+
+    refresh_token: str = Field(..., min_length=1)
+
+
+class TokenRefreshResponse(BaseModel):
+    """Novos tokens da sessão: o refresh token anterior deixa de valer."""
+
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
 # Domínio: Separadores
 # --- Schema de Input (Separadores) ---
 
@@ -236,8 +251,19 @@ class FilterPageConfig(BaseModel):
     """Schema para filtros e paginação com validação."""
 
     page_size: PositiveInt
-    page_number: PositiveInt
+    page_number: PositiveInt = 1
     id_separadores: List[int] = []
+    cursor: Optional[str] = Field(
+        default=None,
+        description=(
+            "Cursor opaco devolvido no header 'X-Proximo-Cursor' da página anterior. "
+            "Quando informado, 'page_number' é ignorado."
+        ),
+    )
+    resumo: bool = Field(
+        default=False,
+        description="Se verdadeiro, retorna apenas os metadados (sem o conteúdo dos arquivos).",
+    )
 
 
 # --- Sub-Schemas de Output (Filhos) ---
@@ -263,6 +289,42 @@ class FileResponse(BaseSchema):
     iv_arquivo: Optional[str]
 
 
+class CredentialSummaryResponse(BaseSchema):
+    """Schema resumido de uma Senha (sem a senha criptografada)."""
+
+    id: int
+    host_url: Optional[str]
+    email: Optional[str]
+
+
+class FileSummaryResponse(BaseSchema):
+    """Schema resumido de um Arquivo (sem o conteúdo)."""
+
+    id: int
+    extensao: str
+    nome_arquivo: str
+    tamanho: int
+
+
+class CredentialIndexItem(BaseModel):
+    """Item do índice compacto de credenciais usado pela extensão."""
+
+    id: int
+    nome_aplicacao: str
+    email: Optional[str]
+    host_normalizado: str
+
+
+class CredentialIndexResponse(BaseModel):
+    """
+    Índice compacto das credenciais do usuário.
+    'versao' muda sempre que o conteúdo do índice muda (também enviada como ETag).
+    """
+
+    versao: str
+    itens: List[CredentialIndexItem]
+
+
 # --- Schema de Output Principal (Pai) ---
 
 
@@ -282,6 +344,43 @@ class DataResponse(BaseSchema):
     separadores: List[SeparatorResponse] = []
 
 
+class DataSummaryResponse(BaseSchema):
+    """Schema de resposta resumido de um Dado, usado nas listagens (modo 'resumo')."""
+
+    id: int
+    usuario_id: int
+    nome_aplicacao: str
+    descricao: Optional[str]
+    tipo: TipoDado
+    criado_em: datetime
+
+    arquivo: Optional[FileSummaryResponse] = None
+    senha: Optional[CredentialSummaryResponse] = None
+    separadores: List[SeparatorResponse] = []
+
+
+class UploadSessionResponse(BaseModel):
+    """Estado de uma sessão de upload em partes."""
+
+    id: str
+    tamanho_total: int
+    tamanho_chunk: int
+    total_chunks: int
+    chunks_recebidos: List[int]
+    bytes_recebidos: int
+    expira_em: datetime
+
+
+class FileContentInfo(BaseModel):
+    """Metadados necessários para enviar o conteúdo de um arquivo (usado internamente)."""
+
+    id: int
+    iv_arquivo: Optional[str]
+    tamanho: int
+    blob_ref: Optional[str] = None
+    hash_conteudo: Optional[str] = None
+
+
 # --- Sub-Schemas de Input (Criação) ---
 
 
@@ -327,6 +426,33 @@ class DataCreateFile(BaseModel):
     )
 
 
+class DataCreateFileUpload(BaseModel):
+    """
+    Schema (query string e header) para criar um Arquivo enviando o conteúdo no corpo.
+    O conteúdo criptografado é enviado como bytes brutos, não em Base64.
+    """
+
+    nome_aplicacao: str
+    descricao: Optional[str] = Field(default=None, min_length=1)
+    iv_arquivo: str = Field(..., min_length=1)
+    extensao: str
+    nome_arquivo: str
+    id_pasta: Optional[int] = Field(
+        default=None, description="ID da pasta pai (opcional)."
+    )
+    id_tags: List[int] = Field(
+        default_factory=list, description="Lista de IDs de tags (opcional)."
+    )
+
+
+class UploadSessionCreate(DataCreateFileUpload):
+    """Schema para iniciar um upload de arquivo em partes."""
+
+    tamanho_total: PositiveInt = Field(
+        description="Tamanho total (em bytes) do conteúdo criptografado."
+    )
+
+
 class DataCreateCredential(BaseModel):
     """Schema para criar um novo Dado do tipo Senha."""
 
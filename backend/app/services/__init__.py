@@ -4,3 +4,6 @@ from .service_utils import *
 from .service_data import *
 from .service_separador import *
 from .service_share import *
+from .service_storage import *
+from .service_upload import *
+from .service_session import *
@@ -1,13 +1,18 @@
+import hashlib
 import logging
-from typing import List
+import os
+import sys
+from typing import BinaryIO, Iterator, List, Optional, Union
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 
 from app.repository import repository_log
 
 from .. import services
-from .. import models, schemas
-from ..repository import repository_data
+from .. import models, schemas, storage
+from ..repository import repository_data, repository_data_async, repository_user
 from ..exceptions import (
     DataNotFoundError,
     DuplicateDataError,
@@ -16,6 +21,9 @@ from ..exceptions import (
 
 logger = logging.getLogger(__name__)
 
+# Tamanho de cada pedaço lido do banco ao enviar o conteúdo de um arquivo
+FILE_STREAM_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
 # GET
 
 
@@ -29,6 +37,9 @@ def get_data_paginated_filtered(
     # A validação de pageSize, pageNumber e idSeparators é
     # tratada automaticamente pelo FastAPI/Pydantic na camada da API.
 
+    # O cursor (se houver) é validado aqui e levanta ValueError se for inválido
+    cursor = services.decode_page_cursor(fpData.cursor) if fpData.cursor else None
+
     # Se não houver filtros, chama a função paginada simples
     if not fpData.id_separadores:
         return repository_data.get_paginated_data(
@@ -36,6 +47,8 @@ def get_data_paginated_filtered(
             pageSize=fpData.page_size,
             pageNumber=fpData.page_number,
             id_user=user_data.id,
+            resumo=fpData.resumo,
+            cursor=cursor,
         )
     # Se houver filtros, chama a função filtrada
     else:
@@ -45,37 +58,258 @@ def get_data_paginated_filtered(
             pageNumber=fpData.page_number,
             idSeparators=fpData.id_separadores,
             id_user=user_data.id,
+            resumo=fpData.resumo,
+            cursor=cursor,
         )
 
 
-def get_specific_data(
-    db: Session,
+async def get_data_paginated_filtered_async(
+    db: AsyncSession, user_data: models.Usuario, fpData: schemas.FilterPageConfig
+) -> List[models.Dado]:
+    """Versão de get_data_paginated_filtered para as rotas assíncronas."""
+    cursor = services.decode_page_cursor(fpData.cursor) if fpData.cursor else None
+
+    if not fpData.id_separadores:
+        return await repository_data_async.get_paginated_data(
+            db,
+            pageSize=fpData.page_size,
+            pageNumber=fpData.page_number,
+            id_user=user_data.id,
+            resumo=fpData.resumo,
+            cursor=cursor,
+        )
+    return await repository_data_async.get_paginated_filtered_data(
+        db,
+        pageSize=fpData.page_size,
+        pageNumber=fpData.page_number,
+        idSeparators=fpData.id_separadores,
+        id_user=user_data.id,
+        resumo=fpData.resumo,
+        cursor=cursor,
+    )
+
+
+async def _get_dado_async(db: AsyncSession, data_id: int, user_id: int) -> models.Dado:
+    db_dado = await repository_data_async.get_dado_by_id_and_user_id(
+        db, dado_id=data_id, user_id=user_id
+    )
+    if not db_dado:
+        raise DataNotFoundError(
+            f"Dado com id {data_id} não encontrado ou não pertence ao usuário."
+        )
+    return db_dado
+
+
+async def get_specific_data_async(
+    db: AsyncSession, user: models.Usuario, data_id: int
+) -> models.Dado:
+    """
+    Busca um Dado específico pelo seu ID, garantindo que pertença ao usuário.
+    O Dado volta com o Arquivo, a Senha e os separadores já carregados.
+    Não registra a visualização (ver log_data_view_async), para que a rota
+    possa responder 304 antes.
+    """
+    user_id = user.id
+    db_dado = await _get_dado_async(db, data_id, user_id)
+    if db_dado.arquivo and not db_dado.arquivo.hash_conteudo:
+        # Arquivos salvos antes do hash_conteudo: calcula uma vez para o ETag
+        conteudo = await run_in_threadpool(storage.read_blob, db_dado.arquivo)
+        db_dado.arquivo.hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+        try:
+            await db.commit()
+        except Exception as e:
+            logger.error(
+                f"Falha ao salvar o hash do Arquivo {data_id}: {e}", exc_info=True
+            )
+            await db.rollback()
+            # O rollback expira o Dado; recarrega com os relacionamentos
+            db_dado = await _get_dado_async(db, data_id, user_id)
+    return db_dado
+
+
+async def log_data_view_async(
+    db: AsyncSession,
     user: models.Usuario,
-    data_id: int,
+    db_dado: models.Dado,
     log_context: schemas.LogContext,
     tasks: BackgroundTasks,
 ) -> models.Dado:
     """
-    Busca um Dado específico pelo seu ID, garantindo que pertença ao usuário.
+    Registra a visualização do Dado (evento crítico, com notificação).
+    Uma falha no log não impede a resposta; retorna o Dado a usar nela.
     """
-    db_dado = repository_data.get_dado_by_id_and_user_id(
+    data_id, user_id = db_dado.id, user.id
+    try:
+        await services.log_and_notify_async(
+            db, user, schemas.LogTipo.DADO_VISUALIZADO, log_context, tasks, dado=db_dado
+        )
+        await db.commit()
+    except Exception as e:
+        logger.error(
+            f"Falha ao logar vizualização do Dado {data_id}: {e}", exc_info=True
+        )
+        await db.rollback()
+        # O rollback expira o Dado; recarrega com os relacionamentos
+        db_dado = await _get_dado_async(db, data_id, user_id)
+    return db_dado
+
+
+def get_data_version(db_dado: models.Dado) -> Optional[str]:
+    """
+    Versão (ETag) de um Dado, calculada pelos metadados, pela credencial e pelos
+    separadores. O conteúdo de um arquivo entra pelo seu hash, sem ler o LONGBLOB.
+    Retorna None para um arquivo ainda sem 'hash_conteudo'.
+    """
+    rows = [
+        (
+            db_dado.id,
+            db_dado.usuario_id,
+            db_dado.nome_aplicacao,
+            db_dado.descricao,
+            db_dado.tipo,
+            db_dado.criado_em,
+        )
+    ]
+    if db_dado.arquivo:
+        if not db_dado.arquivo.hash_conteudo:
+            return None
+        rows.append(
+            (
+                db_dado.arquivo.extensao,
+                db_dado.arquivo.nome_arquivo,
+                db_dado.arquivo.iv_arquivo,
+                db_dado.arquivo.hash_conteudo,
+            )
+        )
+    if db_dado.senha:
+        rows.append(
+            (
+                db_dado.senha.host_url,
+                db_dado.senha.email,
+                db_dado.senha.senha_cripto,
+                db_dado.senha.iv_senha_cripto,
+            )
+        )
+    rows.extend(
+        (s.id, s.nome, s.tipo, s.cor, s.id_pasta_raiz) for s in db_dado.separadores
+    )
+    return services.compute_version(rows)
+
+
+def get_file_content_info(
+    db: Session, user: models.Usuario, data_id: int
+) -> schemas.FileContentInfo:
+    """
+    Valida o acesso a um Arquivo para download do conteúdo bruto.
+    Não carrega o conteúdo do arquivo nem registra a visualização
+    (ver log_file_download).
+    """
+    db_dado = repository_data.get_file_dado_without_content(
         db, dado_id=data_id, user_id=user.id
     )
-    if not db_dado:
+    if not db_dado or not db_dado.arquivo:
         raise DataNotFoundError(
-            f"Dado com id {data_id} não encontrado ou não pertence ao usuário."
+            f"Arquivo com id {data_id} não encontrado ou não pertence ao usuário."
         )
+    return schemas.FileContentInfo(
+        id=db_dado.arquivo.id,
+        iv_arquivo=db_dado.arquivo.iv_arquivo,
+        tamanho=db_dado.arquivo.tamanho,
+        blob_ref=db_dado.arquivo.blob_ref,
+        hash_conteudo=db_dado.arquivo.hash_conteudo,
+    )
+
+
+def log_file_download(
+    db: Session,
+    user: models.Usuario,
+    data_id: int,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+):
+    """
+    Registra a visualização (evento crítico, com notificação) de um download.
+    Chamar uma vez por download, e não a cada parte pedida com 'Range'.
+    Uma falha no log não impede o download.
+    """
     try:
+        db_dado = repository_data.get_file_dado_without_content(
+            db, dado_id=data_id, user_id=user.id
+        )
         services.log_and_notify(
             db, user, schemas.LogTipo.DADO_VISUALIZADO, log_context, tasks, dado=db_dado
         )
         db.commit()
     except Exception as e:
         logger.error(
-            f"Falha ao logar vizualização do Dado {data_id}: {e}", exc_info=True
+            f"Falha ao logar vizualização do Arquivo {data_id}: {e}", exc_info=True
         )
         db.rollback()
-    return db_dado
+
+
+def iter_file_content(
+    file_info: schemas.FileContentInfo,
+    offset: int = 0,
+    length: Optional[int] = None,
+    chunk_size: int = FILE_STREAM_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Gera o conteúdo criptografado de um arquivo (ou apenas a janela de 'length'
+    bytes a partir de 'offset') em pedaços de 'chunk_size' bytes,
+    lendo do banco ou do disco (ver app/storage.py).
+
+    Roda enquanto a resposta está sendo enviada (depois que a sessão
+    da requisição já foi fechada), então não usa a sessão da requisição.
+    """
+    if length is None:
+        # Linhas antigas sem 'tamanho' (antes do reconcile-storage) são lidas até o fim
+        length = file_info.tamanho - offset if file_info.tamanho else sys.maxsize
+    return storage.iter_blob_range(
+        models.Arquivo,
+        row_id=file_info.id,
+        blob_ref=file_info.blob_ref,
+        offset=offset,
+        length=length,
+        chunk_size=chunk_size,
+    )
+
+
+def get_credentials_by_host(
+    db: Session, user: models.Usuario, url: str
+) -> List[models.Dado]:
+    """
+    Busca as credenciais do usuário para o site de 'url',
+    comparando pelo domínio registrável (ex: 'login.site.com' encontra 'site.com').
+    """
+    host = services.normalize_host(url)
+    if not host:
+        raise ValueError(f"Não foi possível extrair o host da URL '{url}'.")
+    return repository_data.get_credentials_by_host(
+        db, user_id=user.id, host_normalizado=host
+    )
+
+
+def get_credential_index(
+    db: Session, user: models.Usuario
+) -> schemas.CredentialIndexResponse:
+    """
+    Monta o índice compacto (id, nome, email, host) das credenciais do usuário.
+    A versão é um hash do conteúdo, então só muda quando o índice muda.
+    """
+    rows = repository_data.get_credential_index_rows(db, user_id=user.id)
+    itens = [
+        schemas.CredentialIndexItem(
+            id=row.id,
+            nome_aplicacao=row.nome_aplicacao,
+            email=row.email,
+            host_normalizado=row.host_normalizado,
+        )
+        for row in rows
+    ]
+    digest = hashlib.sha256()
+    for item in itens:
+        digest.update(item.model_dump_json().encode("utf-8"))
+    return schemas.CredentialIndexResponse(versao=digest.hexdigest()[:32], itens=itens)
 
 
 # CREATE
@@ -125,10 +359,12 @@ def create_credential(
             separadores=final_separadores,
         )
         db_senha = models.Senha(
+            usuario_id=user.id,
             senha_cripto=credential_data.senha.senha_cripto,
             iv_senha_cripto=credential_data.senha.iv_senha_cripto,
             email=credential_data.senha.email,
             host_url=credential_data.senha.host_url,
+            host_normalizado=services.normalize_host(credential_data.senha.host_url),
         )
         created_data = repository_data.create_credential(
             db=db, dado=db_dado, senha=db_senha
@@ -149,63 +385,99 @@ def create_credential(
         raise e
 
 
-def create_file(
+def validate_new_file(
     db: Session,
     user: models.Usuario,
-    file_data: schemas.DataCreateFile,
-    log_context: schemas.LogContext,
-    tasks: BackgroundTasks,
-) -> models.Dado:
+    nome_aplicacao: str,
+    nome_arquivo: str,
+    extensao: str,
+    id_pasta: Optional[int],
+    id_tags: List[int],
+) -> List[models.Separador]:
     """
-    Serviço para criar um novo Dado do tipo Arquivo.
+    Valida pasta/tags e a duplicata de um novo arquivo.
+    Retorna a lista final de separadores.
     """
-
     # Chama o helper de utils
     final_separadores, parent_folder_id = (
         services.validate_and_get_separadores_for_create(
-            db, user_id=user.id, id_pasta=file_data.id_pasta, id_tags=file_data.id_tags
+            db, user_id=user.id, id_pasta=id_pasta, id_tags=id_tags
         )
     )
 
     existing_duplicate = repository_data.find_file_duplicate(
         db,
         user_id=user.id,
-        nome_aplicacao=file_data.nome_aplicacao,
-        nome_arquivo=file_data.arquivo.nome_arquivo,
-        extensao=file_data.arquivo.extensao,
+        nome_aplicacao=nome_aplicacao,
+        nome_arquivo=nome_arquivo,
+        extensao=extensao,
         parent_folder_id=parent_folder_id,
     )
     if existing_duplicate:
         raise DuplicateDataError(
-            f"O arquivo '{file_data.nome_aplicacao} / {file_data.arquivo.nome_arquivo}.{file_data.arquivo.extensao}' já existe nesta pasta."
+            f"O arquivo '{nome_aplicacao} / {nome_arquivo}.{extensao}' já existe nesta pasta."
         )
+    return final_separadores
 
-    encrypted_bytes = services.decode_base64_file(file_data.arquivo.arquivo_data)
-
-    novo_arquivo_bytes = len(encrypted_bytes)
-
-    # Obter armazenamento atual
-    usado_total = repository_data.get_total_storage_used_by_user(db, user_id=user.id)
 
-    # Verificar o limite (lendo do objeto 'user')
-    if (usado_total + novo_arquivo_bytes) > user.armazenamento_total:
+def check_storage_limit(
+    db: Session,
+    user: models.Usuario,
+    novo_arquivo_bytes: int,
+    tamanho_arquivo_antigo: int = 0,
+    acao: str = "adicionar",
+):
+    """
+    Reserva espaço para 'novo_arquivo_bytes' no contador do usuário,
+    descontando o tamanho do arquivo que será substituído (se houver).
+    A reserva faz parte da transação atual: se ela for desfeita, o contador também é.
+    """
+    delta = novo_arquivo_bytes - tamanho_arquivo_antigo
+    if not repository_user.add_storage_used(db, user_id=user.id, delta=delta):
         raise StorageLimitExceededError(
-            f"Não é possível adicionar o arquivo. Limite de armazenamento de {user.armazenamento_total // (1024*1024)}MB excedido."
+            f"Não é possível {acao} o arquivo. Limite de armazenamento de {user.armazenamento_total // (1024*1024)}MB excedido."
         )
+
+
+def get_stream_size(stream: BinaryIO) -> int:
+    """Retorna o tamanho de um arquivo temporário e volta o cursor para o início."""
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def save_new_file(
+    db: Session,
+    user: models.Usuario,
+    nome_aplicacao: str,
+    descricao: Optional[str],
+    final_separadores: List[models.Separador],
+    content: Union[bytes, BinaryIO],
+    tamanho: int,
+    iv_arquivo: str,
+    nome_arquivo: str,
+    extensao: str,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> models.Dado:
+    """Cria o Dado e o Arquivo filho, loga a criação e commita."""
     db_dado = models.Dado(
         usuario_id=user.id,
-        nome_aplicacao=file_data.nome_aplicacao,
-        descricao=file_data.descricao,
+        nome_aplicacao=nome_aplicacao,
+        descricao=descricao,
         tipo=models.TipoDado.ARQUIVO,
         separadores=final_separadores,
     )
     db_arquivo = models.Arquivo(
-        arquivo=encrypted_bytes,
-        iv_arquivo=file_data.arquivo.iv_arquivo,
-        nome_arquivo=file_data.arquivo.nome_arquivo,
-        extensao=file_data.arquivo.extensao,
+        iv_arquivo=iv_arquivo,
+        nome_arquivo=nome_arquivo,
+        extensao=extensao,
+        tamanho=tamanho,
+    )
+    created_data = repository_data.create_file(
+        db=db, dado=db_dado, arquivo=db_arquivo, content=content
     )
-    created_data = repository_data.create_file(db=db, dado=db_dado, arquivo=db_arquivo)
 
     services.log_and_notify(
         db, user, schemas.LogTipo.DADO_CRIADO, log_context, tasks, dado=created_data
@@ -216,6 +488,90 @@ def create_file(
     return created_data
 
 
+def create_file(
+    db: Session,
+    user: models.Usuario,
+    file_data: schemas.DataCreateFile,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> models.Dado:
+    """
+    Serviço para criar um novo Dado do tipo Arquivo.
+    """
+    final_separadores = validate_new_file(
+        db,
+        user,
+        nome_aplicacao=file_data.nome_aplicacao,
+        nome_arquivo=file_data.arquivo.nome_arquivo,
+        extensao=file_data.arquivo.extensao,
+        id_pasta=file_data.id_pasta,
+        id_tags=file_data.id_tags,
+    )
+
+    encrypted_bytes = services.decode_base64_file(file_data.arquivo.arquivo_data)
+
+    check_storage_limit(db, user, novo_arquivo_bytes=len(encrypted_bytes))
+
+    return save_new_file(
+        db,
+        user,
+        nome_aplicacao=file_data.nome_aplicacao,
+        descricao=file_data.descricao,
+        final_separadores=final_separadores,
+        content=encrypted_bytes,
+        tamanho=len(encrypted_bytes),
+        iv_arquivo=file_data.arquivo.iv_arquivo,
+        nome_arquivo=file_data.arquivo.nome_arquivo,
+        extensao=file_data.arquivo.extensao,
+        log_context=log_context,
+        tasks=tasks,
+    )
+
+
+def create_file_from_stream(
+    db: Session,
+    user: models.Usuario,
+    file_data: schemas.DataCreateFileUpload,
+    content: BinaryIO,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> models.Dado:
+    """
+    Serviço para criar um novo Dado do tipo Arquivo a partir dos bytes brutos
+    já recebidos em um arquivo temporário (corpo bruto da requisição).
+    As validações de duplicata e de limite são feitas antes de ler o conteúdo.
+    """
+    final_separadores = validate_new_file(
+        db,
+        user,
+        nome_aplicacao=file_data.nome_aplicacao,
+        nome_arquivo=file_data.nome_arquivo,
+        extensao=file_data.extensao,
+        id_pasta=file_data.id_pasta,
+        id_tags=file_data.id_tags,
+    )
+
+    tamanho = get_stream_size(content)
+    if tamanho == 0:
+        raise ValueError("O conteúdo do arquivo não pode ser vazio.")
+    check_storage_limit(db, user, novo_arquivo_bytes=tamanho)
+
+    return save_new_file(
+        db,
+        user,
+        nome_aplicacao=file_data.nome_aplicacao,
+        descricao=file_data.descricao,
+        final_separadores=final_separadores,
+        content=content,
+        tamanho=tamanho,
+        iv_arquivo=file_data.iv_arquivo,
+        nome_arquivo=file_data.nome_arquivo,
+        extensao=file_data.extensao,
+        log_context=log_context,
+        tasks=tasks,
+    )
+
+
 # EDIT
 def edit_file_data(
     db: Session,
@@ -292,22 +648,16 @@ def edit_file_data(
         base64_string = update_data.arquivo.arquivo_data
         if base64_string is not None:
             decoded_bytes = services.decode_base64_file(base64_string)
-            novo_arquivo_bytes = len(decoded_bytes)
             tamanho_arquivo_antigo = repository_data.get_file_size_by_id(
                 db, db_dado.arquivo.id
             )
-            usado_total = repository_data.get_total_storage_used_by_user(
-                db, user_id=user.id
+            check_storage_limit(
+                db,
+                user,
+                novo_arquivo_bytes=len(decoded_bytes),
+                tamanho_arquivo_antigo=tamanho_arquivo_antigo,
+                acao="atualizar",
             )
-            novo_total_usado = (
-                usado_total - tamanho_arquivo_antigo
-            ) + novo_arquivo_bytes
-
-            # Verifica o limite
-            if novo_total_usado > user.armazenamento_total:
-                raise StorageLimitExceededError(
-                    f"Não é possível atualizar o arquivo. Limite de armazenamento de {user.armazenamento_total // (1024*1024)}MB excedido."
-                )
 
     try:
         updated_dado = repository_data.update_file_data(
@@ -332,6 +682,65 @@ def edit_file_data(
         raise e
 
 
+def replace_file_content(
+    db: Session,
+    user: models.Usuario,
+    data_id: int,
+    iv_arquivo: str,
+    content: BinaryIO,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> models.Dado:
+    """
+    Serviço para substituir apenas o conteúdo (bytes brutos + IV) de um Arquivo,
+    equivalente a um PATCH com 'arquivo_data' e 'iv_arquivo', mas sem Base64.
+    """
+    db_dado = repository_data.get_file_dado_without_content(
+        db, dado_id=data_id, user_id=user.id
+    )
+    if not db_dado or not db_dado.arquivo:
+        raise DataNotFoundError(
+            f"Arquivo com id {data_id} inválido ou não pertence ao usuário."
+        )
+
+    tamanho = get_stream_size(content)
+    if tamanho == 0:
+        raise ValueError("O conteúdo do arquivo não pode ser vazio.")
+    tamanho_arquivo_antigo = repository_data.get_file_size_by_id(
+        db, db_dado.arquivo.id
+    )
+    check_storage_limit(
+        db,
+        user,
+        novo_arquivo_bytes=tamanho,
+        tamanho_arquivo_antigo=tamanho_arquivo_antigo,
+        acao="atualizar",
+    )
+
+    try:
+        repository_data.replace_file_content(
+            db,
+            db_arquivo=db_dado.arquivo,
+            content=content,
+            tamanho=tamanho,
+            iv_arquivo=iv_arquivo,
+        )
+        services.log_and_notify(
+            db,
+            user,
+            schemas.LogTipo.DADO_EDITADO,
+            log_context,
+            tasks,
+            dado=db_dado,
+        )
+        db.commit()
+        db.refresh(db_dado)
+        return db_dado
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
 def edit_credential_data(
     db: Session,
     user: models.Usuario,
@@ -394,6 +803,10 @@ def edit_credential_data(
             db_senha=db_dado.senha,
             update_data=update_data,
         )
+        if "host_url" in update_senha_dict:
+            db_dado.senha.host_normalizado = services.normalize_host(
+                update_senha_dict["host_url"]
+            )
         services.log_and_notify(
             db,
             user,
@@ -409,6 +822,33 @@ def edit_credential_data(
         raise e
 
 
+def backfill_normalized_hosts(db: Session, batch_size: int = 500) -> int:
+    """
+    Preenche 'host_normalizado' e 'usuario_id' (cópia do dono do Dado, para o
+    índice da busca por host) das Senhas antigas, em lotes com commit.
+    Retorna quantas Senhas foram atualizadas.
+    """
+    atualizadas = 0
+    last_id = 0
+    while True:
+        rows = repository_data.get_senhas_to_backfill(
+            db, after_id=last_id, limit=batch_size
+        )
+        if not rows:
+            return atualizadas
+        try:
+            for senha, usuario_id in rows:
+                senha.usuario_id = usuario_id
+                if senha.host_normalizado is None and senha.host_url:
+                    senha.host_normalizado = services.normalize_host(senha.host_url)
+                atualizadas += 1
+            last_id = rows[-1][0].id
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+
+
 # DELETE
 def delete_data_by_id(
     db: Session,
@@ -434,6 +874,11 @@ def delete_data_by_id(
             db, dado_id=dado_id
         )
 
+        # Libera o espaço do arquivo no contador do usuário
+        if dado.tipo == models.TipoDado.ARQUIVO:
+            tamanho = repository_data.get_file_size_by_id(db, arquivo_id=dado_id)
+            repository_user.add_storage_used(db, user_id=user.id, delta=-tamanho)
+
         # Deletar os Logs associados primeiro
         repository_data.delete_logs_by_dado_id(db, dado_id=dado_id)
 
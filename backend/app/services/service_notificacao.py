@@ -1,11 +1,12 @@
-import httpx
 import logging
+from datetime import UTC, datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import BackgroundTasks
 from typing import List
 
 from app.database import SessionLocal
-from .. import models, schemas
+from .. import audit_log, geoip, models, schemas
 from ..repository import repository_log, repository_evento
 from . import service_utils
 
@@ -22,18 +23,8 @@ def _task_send_email_and_fetch_region(
     2. Atualiza o Log no DB com a região.
     3. Envia o email de notificação.
     """
-    # Buscar Região
-    regiao = "Desconhecida"
-    if ip != "unknown" and ip != "127.0.0.1":
-        try:
-            # Chamada de rede síncrona (OK, pois está em background)
-            url = f"http://ip-api.com/json/{ip}"
-            response = httpx.get(url, timeout=5.0)
-            if response.status_code == 200:
-                data = response.json()
-                regiao = f"{data.get('city', '')}, {data.get('region', '')}, {data.get('country', '')}"
-        except Exception as e:
-            logger.error(f"Falha ao buscar GeoIP para {ip}: {e}")
+    # Buscar Região (com cache; ver app.geoip)
+    regiao = geoip.resolve_region(ip)
 
     # Atualizar o Log no DB
     # A tarefa de background roda *fora* da sessão da request,
@@ -51,22 +42,20 @@ def _task_send_email_and_fetch_region(
     )
 
 
-# CREATE
-def log_and_notify(
-    db: Session,
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _build_log(
     user: models.Usuario,
     tipo_acesso: schemas.LogTipo,
     log_context: schemas.LogContext,
-    tasks: BackgroundTasks,
-    dado: models.Dado | None = None,
-):
-    """
-    Serviço central para criar Logs e, se crítico,
-    criar Eventos (notificações) e disparar emails.
-    """
-
-    # Criar o Log de auditoria
-    db_log = models.Log(
+    dado: models.Dado | None,
+) -> models.Log:
+    return models.Log(
+        # Horário da ação (UTC), com o mesmo relógio para os logs gravados na
+        # transação e os gravados depois em lote (ver app.audit_log)
+        data_hora=_now(),
         usuario_id=user.id,
         dispositivo=log_context.dispositivo,
         ip=log_context.ip,
@@ -74,11 +63,24 @@ def log_and_notify(
         id_dado=dado.id if dado else None,
         nome_aplicacao=dado.nome_aplicacao if dado else None,
     )
-    repository_log.create_log_entry(db, db_log=db_log)
-    db.flush()
-    db.refresh(db_log)
 
-    # Lógica de Notificação para eventos críticos
+
+def _add_non_critical_log(db: Session | AsyncSession, db_log: models.Log):
+    """Log sem notificação: vai para o buffer em lote (ou direto na sessão, se desligado)."""
+    if audit_log.buffer_enabled():
+        audit_log.queue_log(db, db_log)
+    else:
+        repository_log.create_log_entry(db, db_log=db_log)
+
+
+def _notify_if_critical(
+    db: Session | AsyncSession,
+    user: models.Usuario,
+    tipo_acesso: schemas.LogTipo,
+    db_log: models.Log,
+    tasks: BackgroundTasks,
+):
+    """Cria o Evento e agenda o email dos eventos críticos (o Log já tem id)."""
     if tipo_acesso in schemas.EVENTOS_CRITICOS:
 
         mensagem_notificacao = (
@@ -100,6 +102,55 @@ def log_and_notify(
         )
 
 
+# CREATE
+def log_and_notify(
+    db: Session,
+    user: models.Usuario,
+    tipo_acesso: schemas.LogTipo,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+    dado: models.Dado | None = None,
+):
+    """
+    Serviço central para criar Logs e, se crítico,
+    criar Eventos (notificações) e disparar emails.
+    Logs não críticos são gravados em lote depois do commit (ver app.audit_log).
+    """
+
+    # Criar o Log de auditoria
+    db_log = _build_log(user, tipo_acesso, log_context, dado)
+    if tipo_acesso not in schemas.EVENTOS_CRITICOS:
+        _add_non_critical_log(db, db_log)
+        return
+
+    repository_log.create_log_entry(db, db_log=db_log)
+    # O INSERT já devolve o id (autoincremento); o email em background precisa dele
+    db.flush()
+
+    # Lógica de Notificação para eventos críticos
+    _notify_if_critical(db, user, tipo_acesso, db_log, tasks)
+
+
+async def log_and_notify_async(
+    db: AsyncSession,
+    user: models.Usuario,
+    tipo_acesso: schemas.LogTipo,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+    dado: models.Dado | None = None,
+):
+    """Versão de log_and_notify para as rotas assíncronas (AsyncSession)."""
+    db_log = _build_log(user, tipo_acesso, log_context, dado)
+    if tipo_acesso not in schemas.EVENTOS_CRITICOS:
+        _add_non_critical_log(db, db_log)
+        return
+
+    # As funções de criação dos repositórios só fazem db.add: servem para as duas sessões
+    repository_log.create_log_entry(db, db_log=db_log)
+    await db.flush()
+    _notify_if_critical(db, user, tipo_acesso, db_log, tasks)
+
+
 # GET
 
 
@@ -3,9 +3,9 @@ from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 
 from app.services import service_notificacao
-from .. import models, schemas
+from .. import models, schemas, services
 from ..exceptions import DataNotFoundError, SeparatorNameTakenError
-from ..repository import repository_separador, repository_data
+from ..repository import repository_separador, repository_data, repository_user
 
 
 # GET
@@ -25,6 +25,14 @@ def get_root_folders(db: Session, user_id: int) -> List[models.Separador]:
     return repository_separador.get_root_folders_by_user(db, user_id=user_id)
 
 
+def get_separators_version(user_id: int, separadores: List[models.Separador]) -> str:
+    """Versão (ETag) de uma lista de separadores, calculada pelos campos retornados."""
+    return services.compute_version(
+        [(user_id,)]
+        + [(s.id, s.nome, s.tipo, s.cor, s.id_pasta_raiz) for s in separadores]
+    )
+
+
 def get_child_folders(
     db: Session, user_id: int, parent_folder_id: int
 ) -> List[models.Separador]:
@@ -341,6 +349,12 @@ def delete_folder_recursively(
         all_data_ids = repository_data.get_dado_ids_by_separador_ids(db, all_folder_ids)
 
         if all_data_ids:
+            # Libera o espaço dos arquivos no contador do usuário
+            tamanho_total = repository_data.get_total_file_size_by_dado_ids(
+                db, all_data_ids
+            )
+            repository_user.add_storage_used(db, user_id=user.id, delta=-tamanho_total)
+
             # Deleta todos os LOGS associados a esses dados
             repository_data.delete_logs_by_dado_ids(db, all_data_ids)
 
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, UTC
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import core, models, revocation, schemas, services
+from ..core import settings
+from ..exceptions import AuthenticationError
+from ..repository import repository_session
+
+logger = logging.getLogger(__name__)
+
+
+# Helpers
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _hash_refresh_token(refresh_token: str) -> str:
+    # O token é aleatório (256 bits), então um SHA-256 simples basta para guardá-lo
+    return hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+
+
+def _new_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def _session_expiration(now: datetime) -> datetime:
+    return now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+def create_session_access_token(user_id: int, session_id: int) -> str:
+    """Access token (JWT) ligado a uma sessão ('sid'), para o logout encerrá-la."""
+    return core.create_access_token(data={"sub": str(user_id), "sid": session_id})
+
+
+def _new_login_session(
+    user: models.Usuario, log_context: schemas.LogContext
+) -> tuple[models.Sessao, str]:
+    now = _now()
+    refresh_token = _new_refresh_token()
+    db_sessao = models.Sessao(
+        usuario_id=user.id,
+        token_hash=_hash_refresh_token(refresh_token),
+        dispositivo=log_context.dispositivo,
+        ip=log_context.ip,
+        ultimo_uso_em=now,
+        expira_em=_session_expiration(now),
+    )
+    return db_sessao, refresh_token
+
+
+# CREATE
+def create_login_session(
+    db: Session, user: models.Usuario, log_context: schemas.LogContext
+) -> tuple[models.Sessao, str]:
+    """
+    Cria a sessão de um login e retorna (sessão, refresh token).
+    O refresh token só existe em texto nesta resposta; o banco guarda o hash.
+    """
+    db_sessao, refresh_token = _new_login_session(user, log_context)
+    try:
+        repository_session.create_session(db, db_sessao)
+        db.commit()
+        db.refresh(db_sessao)
+    except Exception as e:
+        db.rollback()
+        raise e
+    return db_sessao, refresh_token
+
+
+async def create_login_session_async(
+    db: AsyncSession, user: models.Usuario, log_context: schemas.LogContext
+) -> tuple[models.Sessao, str]:
+    """Versão de create_login_session para as rotas assíncronas (AsyncSession)."""
+    db_sessao, refresh_token = _new_login_session(user, log_context)
+    try:
+        repository_session.create_session(db, db_sessao)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise e
+    return db_sessao, refresh_token
+
+
+# EDIT
+def refresh_session(
+    db: Session, refresh_token: str, log_context: schemas.LogContext
+) -> schemas.TokenRefreshResponse:
+    """
+    Troca um refresh token válido por um novo access token e um novo refresh token
+    (rotação). Não verifica senha nem gera logs/emails: é uma única busca indexada.
+
+    Se um refresh token já trocado for usado de novo, ele pode ter sido roubado:
+    a sessão inteira (com os access tokens dela) é revogada e o usuário precisa
+    fazer login novamente.
+    """
+    token_hash = _hash_refresh_token(refresh_token)
+    now = _now()
+    db_sessao = repository_session.get_session_by_token_hash(db, token_hash)
+
+    if db_sessao is None:
+        reused = repository_session.get_session_by_previous_token_hash(db, token_hash)
+        if reused is not None and reused.revogada_em is None:
+            logger.warning(
+                f"Reuso de refresh token detectado na sessão {reused.id} "
+                f"do usuário {reused.usuario_id}; sessão revogada."
+            )
+            try:
+                repository_session.revoke_session(db, reused, now)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                raise e
+            revocation.mark_session_revoked(reused.id, now)
+        raise AuthenticationError("Refresh token inválido.")
+
+    if db_sessao.revogada_em is not None or db_sessao.expira_em <= now:
+        raise AuthenticationError("Sessão expirada ou encerrada.")
+
+    novo_refresh_token = _new_refresh_token()
+    try:
+        rotated = repository_session.rotate_session_token(
+            db,
+            session_id=db_sessao.id,
+            token_hash=token_hash,
+            novo_token_hash=_hash_refresh_token(novo_refresh_token),
+            now=now,
+            expira_em=_session_expiration(now),
+            ip=log_context.ip,
+            dispositivo=log_context.dispositivo,
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    if not rotated:
+        # Outra requisição trocou este mesmo token primeiro
+        raise AuthenticationError("Refresh token inválido.")
+
+    return schemas.TokenRefreshResponse(
+        access_token=create_session_access_token(db_sessao.usuario_id, db_sessao.id),
+        refresh_token=novo_refresh_token,
+    )
+
+
+# DELETE
+def logout(
+    db: Session,
+    user: models.Usuario,
+    claims: dict,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> None:
+    """
+    Encerra a sessão do access token atual (claim 'sid', se houver), o que
+    revoga todos os access tokens dela, revoga o próprio access token
+    (claim 'jti') e registra o logout.
+    """
+    session_id = claims.get("sid")
+    jti = claims.get("jti")
+    exp = claims.get("exp")
+    revogada_em = None
+    try:
+        if jti is not None and exp is not None:
+            repository_session.create_revoked_token(
+                db,
+                models.TokenRevogado(
+                    jti=jti,
+                    usuario_id=user.id,
+                    expira_em=datetime.fromtimestamp(exp, UTC).replace(tzinfo=None),
+                    revogado_em=_now(),
+                ),
+            )
+        if session_id is not None:
+            db_sessao = repository_session.get_session_by_id_and_user(
+                db, session_id=session_id, user_id=user.id
+            )
+            if db_sessao is not None and db_sessao.revogada_em is None:
+                revogada_em = _now()
+                repository_session.revoke_session(db, db_sessao, revogada_em)
+        services.log_and_notify(db, user, schemas.LogTipo.LOGOUT, log_context, tasks)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    if jti is not None and exp is not None:
+        # Os outros workers recebem a revogação na próxima sincronização
+        revocation.mark_token_revoked(jti, exp)
+    if revogada_em is not None:
+        revocation.mark_session_revoked(session_id, revogada_em)
+
+
+def sweep_expired_sessions(db: Session) -> tuple[int, int]:
+    """
+    Apaga as sessões expiradas e as revogações de tokens que já expiraram.
+    Retorna (sessões apagadas, revogações apagadas).
+    """
+    now = _now()
+    try:
+        sessoes = repository_session.delete_expired_sessions(db, now)
+        revogacoes = repository_session.delete_expired_revoked_tokens(db, now)
+        db.commit()
+        return sessoes, revogacoes
+    except Exception as e:
+        db.rollback()
+        raise e
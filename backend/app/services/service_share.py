@@ -3,11 +3,12 @@ from fastapi import BackgroundTasks
 from typing import List
 from datetime import datetime, UTC
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services import service_notificacao
 
-from .. import models, schemas, services
-from ..repository import repository_share, repository_data
+from .. import models, schemas, services, storage
+from ..repository import repository_share, repository_share_async, repository_data
 from ..exceptions import DataNotFoundError
 from .service_utils import decode_base64_file
 
@@ -39,14 +40,14 @@ def create_share_link(
     for item in share_data.itens:
         encrypted_bytes = decode_base64_file(item.dado_criptografado)
 
-        db_dados_list.append(
-            models.DadosCompartilhados(
-                dado_origem_id=item.dado_origem_id,
-                dado_criptografado=encrypted_bytes,
-                iv_dado=item.iv_dado,
-                meta=item.meta,
-            )
+        db_item = models.DadosCompartilhados(
+            dado_origem_id=item.dado_origem_id,
+            iv_dado=item.iv_dado,
+            meta=item.meta,
         )
+        # Salva o blob no backend configurado (coluna ou disco)
+        storage.write_blob(db_item, encrypted_bytes)
+        db_dados_list.append(db_item)
 
     # Gerar o token de acesso seguro
     token = secrets.token_urlsafe(32)  # Gera um token de 32 bytes
@@ -88,7 +89,52 @@ def get_shared_data_by_token(
     Verifica as regras de acesso e retorna o 'envelope' completo.
     """
     db_share = repository_share.get_share_by_token(db, token_acesso=token_acesso)
+    _check_share_access(db_share)
+
+    try:
+        repository_share.increment_share_access_count(db, db_share)
+        user = db_share.owner_usuario
+        service_notificacao.log_and_notify(
+            db, user, schemas.LogTipo.COMPARTILHAMENTO_ACESSADO, log_context, tasks
+        )
+        db.commit()
+        db.refresh(db_share)
+        return db_share
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+async def get_shared_data_by_token_async(
+    db: AsyncSession,
+    token_acesso: str,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> models.Compartilhamento:
+    """Versão de get_shared_data_by_token para as rotas assíncronas."""
+    db_share = await repository_share_async.get_share_by_token(
+        db, token_acesso=token_acesso
+    )
+    _check_share_access(db_share)
+
+    try:
+        repository_share.increment_share_access_count(db, db_share)
+        await service_notificacao.log_and_notify_async(
+            db,
+            db_share.owner_usuario,
+            schemas.LogTipo.COMPARTILHAMENTO_ACESSADO,
+            log_context,
+            tasks,
+        )
+        await db.commit()
+        return db_share
+    except Exception as e:
+        await db.rollback()
+        raise e
+
 
+def _check_share_access(db_share: models.Compartilhamento | None) -> None:
+    """Levanta DataNotFoundError se o link não puder mais ser acessado."""
     if not db_share:
         raise DataNotFoundError("Link de compartilhamento inválido ou expirado.")
 
@@ -105,19 +151,6 @@ def get_shared_data_by_token(
     if not db_share.dados_compartilhados:
         raise DataNotFoundError("O item original deste compartilhamento foi removido.")
 
-    try:
-        repository_share.increment_share_access_count(db, db_share)
-        user = db_share.owner_usuario
-        service_notificacao.log_and_notify(
-            db, user, schemas.LogTipo.COMPARTILHAMENTO_ACESSADO, log_context, tasks
-        )
-        db.commit()
-        db.refresh(db_share)
-        return db_share
-    except Exception as e:
-        db.rollback()
-        raise e
-
 
 def get_shares_by_user_id(db: Session, user_id: int) -> List[models.Compartilhamento]:
     """
@@ -126,6 +159,24 @@ def get_shares_by_user_id(db: Session, user_id: int) -> List[models.Compartilham
     return repository_share.get_all_shares_by_user_id(db, user_id=user_id)
 
 
+def get_shares_version(user_id: int, shares: List[models.Compartilhamento]) -> str:
+    """Versão (ETag) da lista de compartilhamentos, calculada pelos campos retornados."""
+    return services.compute_version(
+        [(user_id,)]
+        + [
+            (
+                s.id,
+                s.token_acesso,
+                s.n_acessos_total,
+                s.n_acessos_atual,
+                s.data_expiracao,
+                s.criado_em,
+            )
+            for s in shares
+        ]
+    )
+
+
 # UPDATE
 def edit_share_rules(
     db: Session,
@@ -0,0 +1,59 @@
+import logging
+from sqlalchemy.orm import Session
+
+from .. import models, storage
+from ..repository import repository_data
+
+logger = logging.getLogger(__name__)
+
+# Modelos que têm blobs (conteúdo criptografado)
+_BLOB_MODELS = (models.Arquivo, models.DadosCompartilhados)
+
+
+def migrate_blobs(db: Session, para_disco: bool = True, batch_size: int = 20) -> int:
+    """
+    Move os blobs de Arquivos e DadosCompartilhados do banco para o disco
+    (ou de volta para o banco, se 'para_disco' for falso), em lotes com commit.
+    Pode ser interrompida e executada de novo: só processa o que falta mover.
+    Retorna quantas linhas foram migradas.
+    """
+    destino = (
+        storage.get_filesystem_backend()
+        if para_disco
+        else storage.get_database_backend()
+    )
+    migradas = 0
+    for modelo in _BLOB_MODELS:
+        last_id = 0
+        while True:
+            rows = repository_data.get_blob_rows_to_migrate(
+                db, modelo, para_disco=para_disco, after_id=last_id, limit=batch_size
+            )
+            if not rows:
+                break
+            try:
+                for row in rows:
+                    content = storage.read_blob(row)
+                    destino.write(row, content)
+                last_id = rows[-1].id
+                db.commit()
+                migradas += len(rows)
+                logger.info(f"{modelo.__tablename__}: {migradas} blob(s) migrados.")
+            except Exception as e:
+                db.rollback()
+                raise e
+            # Libera os blobs já migrados da memória da sessão
+            db.expunge_all()
+    return migradas
+
+
+def collect_blob_garbage(db: Session, grace_seconds: int = 24 * 60 * 60) -> int:
+    """
+    Remove do disco os blobs que não são mais referenciados por nenhuma linha
+    (arquivos apagados ou substituídos). Só remove blobs mais antigos que
+    'grace_seconds', para não apagar uploads ainda não commitados.
+    """
+    referenced = repository_data.get_all_blob_refs(db)
+    return storage.get_filesystem_backend().collect_garbage(
+        referenced, grace_seconds=grace_seconds
+    )
@@ -0,0 +1,336 @@
+import logging
+import math
+import os
+import secrets
+import shutil
+import tempfile
+from datetime import datetime, timedelta, UTC
+from typing import BinaryIO, Dict
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
+
+from .. import models, schemas, services
+from ..core import settings
+from ..exceptions import (
+    DataNotFoundError,
+    StorageLimitExceededError,
+    UploadSessionConflictError,
+)
+from ..repository import repository_upload, repository_user
+
+logger = logging.getLogger(__name__)
+
+
+# Helpers (partes em disco)
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _upload_root() -> str:
+    return os.path.abspath(settings.UPLOAD_SESSION_PATH)
+
+
+def _session_dir(session_id: str) -> str:
+    return os.path.join(_upload_root(), session_id)
+
+
+def _chunk_path(session_id: str, index: int) -> str:
+    return os.path.join(_session_dir(session_id), f"{index:06d}.part")
+
+
+def _total_chunks(sessao: models.SessaoUpload) -> int:
+    return math.ceil(sessao.tamanho_total / sessao.tamanho_chunk)
+
+
+def _expected_chunk_size(sessao: models.SessaoUpload, index: int) -> int:
+    """Todas as partes têm 'tamanho_chunk' bytes, menos a última."""
+    inicio = index * sessao.tamanho_chunk
+    return min(sessao.tamanho_chunk, sessao.tamanho_total - inicio)
+
+
+def _received_chunks(sessao: models.SessaoUpload) -> Dict[int, int]:
+    """Retorna {índice: tamanho} das partes já recebidas e completas."""
+    recebidas: Dict[int, int] = {}
+    try:
+        nomes = os.listdir(_session_dir(sessao.id))
+    except FileNotFoundError:
+        return recebidas
+    for nome in nomes:
+        if not nome.endswith(".part"):
+            continue
+        index = int(nome.removesuffix(".part"))
+        tamanho = os.path.getsize(os.path.join(_session_dir(sessao.id), nome))
+        if index < _total_chunks(sessao) and tamanho == _expected_chunk_size(
+            sessao, index
+        ):
+            recebidas[index] = tamanho
+    return recebidas
+
+
+def _build_upload_status(sessao: models.SessaoUpload) -> schemas.UploadSessionResponse:
+    recebidas = _received_chunks(sessao)
+    return schemas.UploadSessionResponse(
+        id=sessao.id,
+        tamanho_total=sessao.tamanho_total,
+        tamanho_chunk=sessao.tamanho_chunk,
+        total_chunks=_total_chunks(sessao),
+        chunks_recebidos=sorted(recebidas),
+        bytes_recebidos=sum(recebidas.values()),
+        expira_em=sessao.expira_em,
+    )
+
+
+def _get_active_session(
+    db: Session, user: models.Usuario, session_id: str, for_update: bool = False
+) -> models.SessaoUpload:
+    sessao = repository_upload.get_upload_session(
+        db, session_id=session_id, user_id=user.id, for_update=for_update
+    )
+    if not sessao or sessao.expira_em < _now():
+        raise DataNotFoundError(
+            f"Sessão de upload {session_id} não encontrada, expirada ou já finalizada."
+        )
+    return sessao
+
+
+# CREATE
+def create_upload_session(
+    db: Session, user: models.Usuario, upload_data: schemas.UploadSessionCreate
+) -> schemas.UploadSessionResponse:
+    """
+    Inicia um upload em partes. Valida pasta, tags, duplicata e limite de
+    armazenamento já no início, para o cliente não enviar partes à toa.
+    """
+    services.validate_new_file(
+        db,
+        user,
+        nome_aplicacao=upload_data.nome_aplicacao,
+        nome_arquivo=upload_data.nome_arquivo,
+        extensao=upload_data.extensao,
+        id_pasta=upload_data.id_pasta,
+        id_tags=upload_data.id_tags,
+    )
+    # Apenas uma verificação antecipada: o espaço é reservado ao finalizar
+    usado = repository_user.get_storage_used(db, user_id=user.id)
+    if usado + upload_data.tamanho_total > user.armazenamento_total:
+        raise StorageLimitExceededError(
+            f"Não é possível adicionar o arquivo. Limite de armazenamento de {user.armazenamento_total // (1024*1024)}MB excedido."
+        )
+
+    db_sessao = models.SessaoUpload(
+        id=secrets.token_urlsafe(24),
+        usuario_id=user.id,
+        nome_aplicacao=upload_data.nome_aplicacao,
+        descricao=upload_data.descricao,
+        iv_arquivo=upload_data.iv_arquivo,
+        extensao=upload_data.extensao,
+        nome_arquivo=upload_data.nome_arquivo,
+        id_pasta=upload_data.id_pasta,
+        id_tags=upload_data.id_tags,
+        tamanho_total=upload_data.tamanho_total,
+        tamanho_chunk=settings.UPLOAD_CHUNK_SIZE,
+        expira_em=_now() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+    )
+    try:
+        repository_upload.create_upload_session(db, db_sessao)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    os.makedirs(_session_dir(db_sessao.id), exist_ok=True)
+    return _build_upload_status(db_sessao)
+
+
+# UPDATE
+def put_upload_chunk(
+    db: Session,
+    user: models.Usuario,
+    session_id: str,
+    index: int,
+    content: BinaryIO,
+) -> schemas.UploadSessionResponse:
+    """
+    Salva a parte 'index' de um upload. Reenviar a mesma parte a substitui,
+    então o cliente pode repetir qualquer parte que falhou.
+    """
+    sessao = _get_active_session(db, user, session_id)
+
+    total_chunks = _total_chunks(sessao)
+    if index >= total_chunks:
+        raise ValueError(
+            f"Parte {index} inválida: este upload tem {total_chunks} parte(s) (0 a {total_chunks - 1})."
+        )
+    esperado = _expected_chunk_size(sessao, index)
+    tamanho = services.get_stream_size(content)
+    if tamanho != esperado:
+        raise ValueError(
+            f"A parte {index} deve ter {esperado} bytes, mas foram recebidos {tamanho}."
+        )
+
+    # Escreve em um temporário e move, para nunca deixar uma parte pela metade
+    session_dir = _session_dir(sessao.id)
+    os.makedirs(session_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=session_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            shutil.copyfileobj(content, tmp)
+        os.replace(tmp_path, _chunk_path(sessao.id, index))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Cada parte recebida renova a validade da sessão
+    try:
+        sessao.expira_em = _now() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    return _build_upload_status(sessao)
+
+
+# GET
+def get_upload_session_status(
+    db: Session, user: models.Usuario, session_id: str
+) -> schemas.UploadSessionResponse:
+    """Retorna quais partes do upload já foram recebidas."""
+    return _build_upload_status(_get_active_session(db, user, session_id))
+
+
+def get_upload_chunk_size(db: Session, user: models.Usuario, session_id: str) -> int:
+    """Tamanho máximo de uma parte do upload (o corpo de cada PUT da parte)."""
+    return _get_active_session(db, user, session_id).tamanho_chunk
+
+
+# FINALIZE
+def complete_upload_session(
+    db: Session,
+    user: models.Usuario,
+    session_id: str,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> models.Dado:
+    """
+    Junta as partes e cria o Arquivo, com as verificações de duplicata e de
+    limite de armazenamento. A sessão é removida na mesma transação.
+
+    Dois 'complete' simultâneos do mesmo upload criam um único Arquivo: a linha
+    da sessão fica travada até o commit (o segundo espera o primeiro e recebe
+    DataNotFoundError, 404) e, nos bancos sem trava de linha (ex: SQLite), só
+    quem remover a sessão segue (o outro recebe UploadSessionConflictError, 409).
+    """
+    sessao = _get_active_session(db, user, session_id, for_update=True)
+
+    faltando = _total_chunks(sessao) - len(_received_chunks(sessao))
+    if faltando:
+        raise ValueError(f"Upload incompleto: falta(m) {faltando} parte(s).")
+
+    final_separadores = services.validate_new_file(
+        db,
+        user,
+        nome_aplicacao=sessao.nome_aplicacao,
+        nome_arquivo=sessao.nome_arquivo,
+        extensao=sessao.extensao,
+        id_pasta=sessao.id_pasta,
+        id_tags=sessao.id_tags,
+    )
+    services.check_storage_limit(db, user, novo_arquivo_bytes=sessao.tamanho_total)
+
+    nome_aplicacao = sessao.nome_aplicacao
+    descricao = sessao.descricao
+    iv_arquivo = sessao.iv_arquivo
+    nome_arquivo = sessao.nome_arquivo
+    extensao = sessao.extensao
+    tamanho_total = sessao.tamanho_total
+    # Remove a sessão antes de juntar as partes; o rollback a devolve se algo falhar
+    if not repository_upload.delete_upload_session_by_id(db, sessao.id):
+        db.rollback()
+        raise UploadSessionConflictError(
+            f"O upload {session_id} foi finalizado ou cancelado por outra requisição."
+        )
+
+    session_dir = _session_dir(sessao.id)
+    try:
+        with tempfile.TemporaryFile(dir=session_dir) as combined:
+            for index in range(_total_chunks(sessao)):
+                with open(_chunk_path(sessao.id, index), "rb") as chunk:
+                    shutil.copyfileobj(chunk, combined)
+            combined.seek(0)
+
+            created_data = services.save_new_file(
+                db,
+                user,
+                nome_aplicacao=nome_aplicacao,
+                descricao=descricao,
+                final_separadores=final_separadores,
+                content=combined,
+                tamanho=tamanho_total,
+                iv_arquivo=iv_arquivo,
+                nome_arquivo=nome_arquivo,
+                extensao=extensao,
+                log_context=log_context,
+                tasks=tasks,
+            )
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    shutil.rmtree(session_dir, ignore_errors=True)
+    return created_data
+
+
+# DELETE
+def cancel_upload_session(db: Session, user: models.Usuario, session_id: str):
+    """Cancela um upload em partes e apaga as partes já recebidas."""
+    sessao = repository_upload.get_upload_session(
+        db, session_id=session_id, user_id=user.id
+    )
+    if not sessao:
+        raise DataNotFoundError(f"Sessão de upload {session_id} não encontrada.")
+    try:
+        repository_upload.delete_upload_session(db, sessao)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    shutil.rmtree(_session_dir(session_id), ignore_errors=True)
+
+
+def sweep_expired_upload_sessions(db: Session, batch_size: int = 100) -> int:
+    """
+    Remove as sessões de upload expiradas (e suas partes em disco),
+    além de pastas de partes que não pertencem a nenhuma sessão.
+    Retorna quantas sessões foram removidas.
+    """
+    removidas = 0
+    while True:
+        sessoes = repository_upload.get_expired_upload_sessions(
+            db, now=_now(), limit=batch_size
+        )
+        if not sessoes:
+            break
+        session_ids = [sessao.id for sessao in sessoes]
+        try:
+            for sessao in sessoes:
+                repository_upload.delete_upload_session(db, sessao)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+        for session_id in session_ids:
+            shutil.rmtree(_session_dir(session_id), ignore_errors=True)
+        removidas += len(session_ids)
+
+    # Pastas órfãs: lista as pastas antes de buscar as sessões, já que a
+    # sessão é commitada antes da sua pasta ser criada
+    root = _upload_root()
+    if os.path.isdir(root):
+        pastas = os.listdir(root)
+        existentes = repository_upload.get_upload_session_ids(db)
+        for nome in pastas:
+            if nome not in existentes:
+                shutil.rmtree(os.path.join(root, nome), ignore_errors=True)
+    return removidas
@@ -1,14 +1,81 @@
 import logging
 from fastapi import BackgroundTasks
-from sqlalchemy.orm import Session
-from .. import models, schemas, core, services
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models, schemas, core, hashing, rate_limit, services
+from ..cache import TTLCache
+from ..core import settings
 from ..exceptions import EmailAlreadyExistsError, AuthenticationError
-from ..repository import repository_user, repository_data
+from ..repository import repository_user, repository_user_async, repository_data
 
 logger = logging.getLogger(__name__)
 
+# Usuários autenticados recentemente (id -> cópia desanexada dos campos abaixo)
+_user_cache: TTLCache[int, models.Usuario] = TTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
+
+# Campos guardados no cache. Os demais (ex: o hash da senha e o contador
+# 'armazenamento_usado', que muda a cada upload) são lidos do banco só se acessados.
+_CACHED_USER_FIELDS = (
+    "id",
+    "nome",
+    "email",
+    "created_at",
+    "saltKDF",
+    "armazenamento_total",
+)
+
 
 # AUTH
+def get_authenticated_user(db: Session, user_id: int) -> models.Usuario | None:
+    """
+    Retorna o usuário do token, usando o cache em memória quando possível.
+
+    O objeto retornado pertence à sessão 'db' (via merge sem consulta ao banco):
+    campos fora do cache e relacionamentos são carregados sob demanda.
+    """
+    cached = _user_cache.get(user_id)
+    if cached is None:
+        user = repository_user.get_user_by_id(db, user_id)
+        if user is not None:
+            _cache_user(user)
+        return user
+    return db.merge(cached, load=False)
+
+
+async def get_authenticated_user_async(
+    db: AsyncSession, user_id: int
+) -> models.Usuario | None:
+    """
+    Versão de get_authenticated_user para as rotas assíncronas.
+    Só os campos do cache podem ser lidos (não há carregamento sob demanda).
+    """
+    cached = _user_cache.get(user_id)
+    if cached is None:
+        user = await repository_user_async.get_user_by_id(db, user_id)
+        if user is not None:
+            _cache_user(user)
+        return user
+    return await db.merge(cached, load=False)
+
+
+def _cache_user(user: models.Usuario) -> None:
+    if not _user_cache.enabled:
+        return
+    cached = models.Usuario(
+        **{field: getattr(user, field) for field in _CACHED_USER_FIELDS}
+    )
+    make_transient_to_detached(cached)
+    _user_cache.set(user.id, cached)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Remove o usuário do cache (chamar após alterar ou apagar o usuário)."""
+    _user_cache.pop(user_id)
+
+
 def authenticate_and_login_user(
     db: Session,
     email: str,
@@ -16,8 +83,17 @@ def authenticate_and_login_user(
     log_context: schemas.LogContext,
     tasks: BackgroundTasks,
 ) -> schemas.LoginResponse | None:
+    # Recusa antes de qualquer trabalho (Argon2, logs, email) se houver falhas demais
+    rate_limit.check_login_allowed(log_context.ip, email)
+
     user = repository_user.get_user_by_email(db, email)
-    if not user or not core.verify_password(password, user.senha_mestre):
+    senha_correta, novo_hash = (
+        hashing.verify_and_rehash_password(password, user.senha_mestre)
+        if user
+        else (False, None)
+    )
+    if not user or not senha_correta:
+        rate_limit.record_login_failure(log_context.ip, email)
         if user:  # Se o usuário existe mas a senha está errada
             try:
                 services.log_and_notify(
@@ -28,7 +104,19 @@ def authenticate_and_login_user(
                 db.rollback()
                 logger.error(f"Erro ao logar falha de login: {e}")
         return None
-    access_token = core.create_access_token(data={"sub": str(user.id)})
+
+    rate_limit.record_login_success(email)
+    if novo_hash:
+        # Hash gerado com parâmetros antigos do Argon2: salva o novo (sem migração em massa)
+        try:
+            repository_user.update_password_hash(db, user, senha_mestre=novo_hash)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao atualizar hash da senha do usuário {user.id}: {e}")
+
+    db_sessao, refresh_token = services.create_login_session(db, user, log_context)
+    access_token = services.create_session_access_token(user.id, db_sessao.id)
     try:
         services.log_and_notify(
             db, user, schemas.LogTipo.LOGIN_SUCESSO, log_context, tasks
@@ -38,12 +126,82 @@ def authenticate_and_login_user(
         db.rollback()
         logger.error(f"Erro ao logar sucesso de login: {e}")
 
+    return _build_login_response(user, access_token, refresh_token)
+
+
+async def authenticate_and_login_user_async(
+    db: AsyncSession,
+    email: str,
+    password: str,
+    log_context: schemas.LogContext,
+    tasks: BackgroundTasks,
+) -> schemas.LoginResponse | None:
+    """
+    Versão de authenticate_and_login_user para a rota assíncrona de login:
+    as consultas e o Argon2 (no pool de processos) são aguardados sem ocupar
+    uma thread do servidor. O rate limit (que pode consultar o Redis) roda
+    no threadpool.
+    """
+    await run_in_threadpool(rate_limit.check_login_allowed, log_context.ip, email)
+
+    user = await repository_user_async.get_user_by_email(db, email)
+    senha_correta, novo_hash = (
+        await hashing.verify_and_rehash_password_async(password, user.senha_mestre)
+        if user
+        else (False, None)
+    )
+    if not user or not senha_correta:
+        await run_in_threadpool(rate_limit.record_login_failure, log_context.ip, email)
+        if user:  # Se o usuário existe mas a senha está errada
+            try:
+                await services.log_and_notify_async(
+                    db, user, schemas.LogTipo.LOGIN_FALHO, log_context, tasks
+                )
+                await db.commit()  # Commita o log/evento
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Erro ao logar falha de login: {e}")
+        return None
+
+    await run_in_threadpool(rate_limit.record_login_success, email)
+    if novo_hash:
+        user_id = user.id
+        try:
+            repository_user.update_password_hash(db, user, senha_mestre=novo_hash)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Erro ao atualizar hash da senha do usuário {user_id}: {e}")
+            # O rollback expira o usuário e aqui não há carregamento sob demanda
+            await db.refresh(user)
+
+    db_sessao, refresh_token = await services.create_login_session_async(
+        db, user, log_context
+    )
+    access_token = services.create_session_access_token(user.id, db_sessao.id)
+    try:
+        await services.log_and_notify_async(
+            db, user, schemas.LogTipo.LOGIN_SUCESSO, log_context, tasks
+        )
+        await db.commit()  # Commita o log/evento
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Erro ao logar sucesso de login: {e}")
+        await db.refresh(user)
+
+    return _build_login_response(user, access_token, refresh_token)
+
+
+def _build_login_response(
+    user: models.Usuario, access_token: str, refresh_token: str
+) -> schemas.LoginResponse:
     return schemas.LoginResponse(
         nome=user.nome,
         id=user.id,
         created_at=user.created_at,
         email=user.email,
         access_token=access_token,
+        refresh_token=refresh_token,
         saltKDF=user.saltKDF,
     )
 
@@ -56,8 +214,8 @@ def get_dashboard_stats(db: Session, user: models.Usuario) -> schemas.DashboardR
 
     total_storage = user.armazenamento_total
 
-    # Armazenamento Usado
-    used_storage = repository_data.get_total_storage_used_by_user(db, user_id=user.id)
+    # Armazenamento Usado (contador mantido a cada criação/edição/remoção)
+    used_storage = repository_user.get_storage_used(db, user_id=user.id)
 
     # Armazenamento por Tipo
     raw_storage_by_type = repository_data.get_storage_used_by_file_type(
@@ -87,7 +245,7 @@ def register_user(db: Session, user_data: schemas.UserCreate) -> models.Usuario
         raise EmailAlreadyExistsError(f"O email {user_data.email} já está registrado.")
 
     # Cria o hash da senha
-    hashed_password = core.get_password_hash(user_data.senha_mestre)
+    hashed_password = hashing.get_password_hash(user_data.senha_mestre)
     salt = core.generate_crypto_salt()
 
     new_user = models.Usuario(
@@ -150,6 +308,7 @@ def edit_user(
 
         # Commita a atualização do usuário e os logs
         db.commit()
+        invalidate_cached_user(user.id)
 
         db.refresh(updated_user)
         return updated_user
@@ -180,6 +339,23 @@ def clear_all_user_data(
             tasks,
         )
         db.commit()
+        invalidate_cached_user(user.id)
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def reconcile_storage_usage(db: Session) -> tuple[int, int]:
+    """
+    Confere o tamanho salvo de cada arquivo e o contador de armazenamento
+    de cada usuário, corrigindo divergências.
+    Retorna (arquivos corrigidos, usuários corrigidos).
+    """
+    try:
+        arquivos_corrigidos = repository_data.sync_file_sizes(db)
+        usuarios_corrigidos = repository_user.recompute_storage_used(db)
+        db.commit()
+        return arquivos_corrigidos, usuarios_corrigidos
     except Exception as e:
         db.rollback()
         raise e
@@ -193,6 +369,7 @@ def delete_user(db: Session, user_id: int) -> None:
         services.clear_all_user_data_logic(db=db, user_id=user_id)
         repository_user.delete_user_by_id(db=db, user_id=user_id)
         db.commit()
+        invalidate_cached_user(user_id)
     except Exception as e:
         db.rollback()
         raise e
@@ -1,18 +1,23 @@
-import smtplib
-import ssl
 import logging
 import base64
-from typing import List, Optional
+import hashlib
+from datetime import datetime
+from typing import Any, Iterable, List, Optional
+from urllib.parse import urlsplit
+import tldextract
 from sqlalchemy.orm import Session
 from email.message import EmailMessage
 
-from .. import models, schemas
+from .. import audit_log, mailer, models, schemas
 from ..exceptions import DataNotFoundError
-from ..repository import repository_separador, repository_data
+from ..repository import repository_separador, repository_data, repository_user
 from ..core import settings
 
 logger = logging.getLogger(__name__)
 
+# Usa apenas a lista de sufixos públicos embutida no pacote (sem acesso à rede)
+_tld_extract = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
 
 def decode_base64_file(base64_string: str) -> bytes:
     """
@@ -25,6 +30,65 @@ def decode_base64_file(base64_string: str) -> bytes:
         raise ValueError(f"Codificação Base64 inválida: {e}")
 
 
+def normalize_host(url: Optional[str]) -> Optional[str]:
+    """
+    Normaliza uma URL para o seu domínio registrável (eTLD+1).
+    Ex: 'https://accounts.google.com.br/login' -> 'google.com.br'.
+    IPs e hosts sem sufixo público (ex: 'localhost') são mantidos como estão.
+    Retorna None se não for possível extrair um host.
+    """
+    if not url or not url.strip():
+        return None
+    url = url.strip()
+    # Permite URLs sem esquema, ex: 'google.com/login'
+    if "://" not in url:
+        url = "//" + url
+    try:
+        hostname = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if not hostname:
+        return None
+    hostname = hostname.rstrip(".").lower()
+    extracted = _tld_extract(hostname)
+    return extracted.top_domain_under_public_suffix or hostname
+
+
+def encode_page_cursor(criado_em: datetime, dado_id: int) -> str:
+    """
+    Gera o cursor opaco de paginação a partir da posição (criado_em, id)
+    do último item de uma página.
+    """
+    raw = f"{criado_em.isoformat()}|{dado_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decodifica um cursor gerado por 'encode_page_cursor',
+    levantando um ValueError se ele for inválido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        criado_em_str, dado_id_str = raw.split("|", 1)
+        return datetime.fromisoformat(criado_em_str), int(dado_id_str)
+    except Exception:
+        raise ValueError("Cursor de paginação inválido.")
+
+
+def compute_version(rows: Iterable[Iterable[Any]]) -> str:
+    """
+    Calcula uma versão (hash) a partir dos valores das linhas que formam uma resposta.
+    Usada como ETag: muda sempre que algum valor muda, sem precisar serializar a resposta.
+    """
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(tuple(row)).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:32]
+
+
 def validate_and_get_separadores_for_create(
     db: Session, user_id: int, id_pasta: Optional[int], id_tags: List[int]
 ) -> tuple[List[models.Separador], Optional[int]]:
@@ -123,6 +187,8 @@ def clear_all_user_data_logic(db: Session, user_id: int):
     Orquestra a exclusão de todos os dados de um usuário, mantendo a conta.
     (Sem commit/rollback)
     """
+    # Grava antes os logs em lote pendentes, para que sejam apagados também
+    audit_log.flush_audit_logs()
     dado_ids = repository_data.get_dados_ids_by_user(db, user_id=user_id)
     if dado_ids:
         repository_data.delete_logs_by_user_and_dados(
@@ -133,19 +199,19 @@ def clear_all_user_data_logic(db: Session, user_id: int):
     repository_data.delete_compartilhamentos_by_user(db, user_id=user_id)
     repository_data.delete_dados_by_user(db, user_id=user_id)
     repository_separador.delete_separadores_by_user_id(db, user_id=user_id)
+    repository_user.reset_storage_used(db, user_id=user_id)
 
 
 def send_email_alert(email: str, assunto: str, mensagem: str):
     """
     Serviço real de envio de email.
-    Conecta-se ao SMTP do Gmail e envia uma notificação.
+    Coloca a notificação na fila do app.mailer, que a envia pelo SMTP
+    (EMAIL_SMTP_*) usando uma conexão já aberta e autenticada.
 
-    Esta função é síncrona (bloqueante) e deve ser executada
-    em uma BackgroundTask para não travar a API.
+    Não espera o envio: a fila é consumida pelas threads do mailer.
     """
-    # 1. Obter as credenciais do settings
+    # 1. Obter o remetente do settings
     email_remetente = settings.EMAIL_HOST_USER
-    email_senha = settings.EMAIL_HOST_PASSWORD
 
     # 2. Criar o objeto do e-mail
     msg = EmailMessage()
@@ -154,19 +220,6 @@ def send_email_alert(email: str, assunto: str, mensagem: str):
     msg["To"] = email  # O destinatário
     msg.set_content(mensagem)  # O corpo do e-mail
 
-    # 3. Criar o contexto SSL seguro
-    context = ssl.create_default_context()
-
-    logger.info(f"Iniciando envio de email (em background) para {email}...")
-
-    try:
-        # 4. Conectar e Enviar
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as smtp:
-            smtp.login(email_remetente, email_senha)
-            smtp.send_message(msg)
-            logger.info(f"Email enviado com sucesso para {email}.")
-
-    except Exception as e:
-        # Se o envio de email falhar, apenas logamos.
-        # Não devemos quebrar a aplicação.
-        logger.error(f"Falha ao enviar email para {email}: {e}", exc_info=True)
+    # 3. Enfileirar o envio (falhas são apenas logadas pelo mailer)
+    logger.info(f"Email para {email} colocado na fila de envio.")
+    mailer.get_mailer().send_message(msg)
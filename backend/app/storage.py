@@ -0,0 +1,283 @@
+"""
+Armazenamento do conteúdo criptografado (blobs) de Arquivos e DadosCompartilhados.
+
+- DatabaseBlobBackend: guarda o blob na própria coluna LONGBLOB da linha.
+- FileSystemBlobBackend: guarda o blob em disco, endereçado pelo SHA-256 do
+  conteúdo ('<raiz>/ab/cd/abcd...'); a linha guarda apenas o hash em 'blob_ref'.
+
+As leituras escolhem o backend pela própria linha ('blob_ref' preenchido -> disco),
+então os dois formatos convivem durante a migração. As escritas usam o backend
+configurado em BLOB_STORAGE_BACKEND.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import BinaryIO, Iterator, Optional, Union
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .core import settings
+from .database import SessionLocal
+
+BlobRow = Union[models.Arquivo, models.DadosCompartilhados]
+
+# Coluna LONGBLOB de cada modelo que tem conteúdo criptografado
+_BLOB_COLUMNS = {
+    models.Arquivo: "arquivo",
+    models.DadosCompartilhados: "dado_criptografado",
+}
+
+# Tamanho dos pedaços usados ao copiar/ler blobs
+BLOB_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_column(modelo: type):
+    """Coluna LONGBLOB de 'modelo' (Arquivo ou DadosCompartilhados)."""
+    return getattr(modelo, _BLOB_COLUMNS[modelo])
+
+
+def _set_content_hash(row: BlobRow, digest: str) -> None:
+    """Guarda o SHA-256 do conteúdo nos Arquivos (usado como ETag dos downloads)."""
+    if isinstance(row, models.Arquivo):
+        row.hash_conteudo = digest
+
+
+class BlobBackend(ABC):
+    """Interface comum dos backends de armazenamento de blobs."""
+
+    @abstractmethod
+    def write(self, row: BlobRow, content: Union[bytes, BinaryIO]) -> None:
+        """Salva 'content' como o blob da linha (ainda sem commit)."""
+
+    @abstractmethod
+    def read(self, row: BlobRow) -> bytes:
+        """Lê o blob inteiro de uma linha carregada."""
+
+    @abstractmethod
+    def iter_range(
+        self,
+        modelo: type,
+        row_id: int,
+        blob_ref: Optional[str],
+        offset: int,
+        length: int,
+        chunk_size: int = BLOB_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """
+        Gera 'length' bytes do blob a partir de 'offset', em pedaços.
+        Não depende da sessão da requisição (pode rodar durante o envio da resposta).
+        """
+
+
+class DatabaseBlobBackend(BlobBackend):
+    """Blob na coluna LONGBLOB da própria linha (comportamento original)."""
+
+    def write(self, row: BlobRow, content: Union[bytes, BinaryIO]) -> None:
+        if not isinstance(content, bytes):
+            content = content.read()
+        setattr(row, _BLOB_COLUMNS[type(row)], content)
+        row.blob_ref = None
+        _set_content_hash(row, hashlib.sha256(content).hexdigest())
+
+    def read(self, row: BlobRow) -> bytes:
+        return getattr(row, _BLOB_COLUMNS[type(row)]) or b""
+
+    def iter_range(
+        self,
+        modelo: type,
+        row_id: int,
+        blob_ref: Optional[str],
+        offset: int,
+        length: int,
+        chunk_size: int = BLOB_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        # Lê janelas com SUBSTRING, sem trazer o LONGBLOB inteiro para a memória
+        column = blob_column(modelo)
+        db: Session = SessionLocal()
+        try:
+            end = offset + length
+            while offset < end:
+                size = min(chunk_size, end - offset)
+                stmt = select(func.substring(column, offset + 1, size)).filter(
+                    modelo.id == row_id
+                )
+                chunk = db.execute(stmt).scalar() or b""
+                if chunk:
+                    yield chunk
+                    offset += len(chunk)
+                if len(chunk) < size:
+                    break
+        finally:
+            db.close()
+
+
+class FileSystemBlobBackend(BlobBackend):
+    """
+    Blob em disco, endereçado pelo conteúdo (SHA-256).
+    Conteúdos iguais são salvos uma única vez; arquivos que nenhuma linha
+    referencia mais são removidos por 'collect_garbage'.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, blob_ref: str) -> str:
+        """Caminho do blob, com dois níveis de pastas para não lotar um diretório."""
+        return os.path.join(self.root, blob_ref[:2], blob_ref[2:4], blob_ref)
+
+    def put(self, content: Union[bytes, BinaryIO]) -> str:
+        """
+        Salva o conteúdo de forma atômica e retorna o seu hash.
+        Escreve em um arquivo temporário (calculando o hash durante a cópia)
+        e só então o move para o caminho final com os.replace.
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                if isinstance(content, bytes):
+                    digest.update(content)
+                    tmp.write(content)
+                else:
+                    while chunk := content.read(BLOB_CHUNK_SIZE):
+                        digest.update(chunk)
+                        tmp.write(chunk)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+
+            blob_ref = digest.hexdigest()
+            final_path = self.path_for(blob_ref)
+            if os.path.exists(final_path):
+                # Conteúdo já salvo: renova a data para o coletor não removê-lo agora
+                os.utime(final_path)
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return blob_ref
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def write(self, row: BlobRow, content: Union[bytes, BinaryIO]) -> None:
+        row.blob_ref = self.put(content)
+        setattr(row, _BLOB_COLUMNS[type(row)], None)
+        _set_content_hash(row, row.blob_ref)
+
+    def read(self, row: BlobRow) -> bytes:
+        with open(self.path_for(row.blob_ref), "rb") as f:
+            return f.read()
+
+    def iter_range(
+        self,
+        modelo: type,
+        row_id: int,
+        blob_ref: Optional[str],
+        offset: int,
+        length: int,
+        chunk_size: int = BLOB_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        with open(self.path_for(blob_ref), "rb") as f:
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                yield chunk
+                remaining -= len(chunk)
+
+    def iter_refs(self) -> Iterator[tuple[str, float]]:
+        """Lista (hash, data de modificação) de todos os blobs salvos."""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == self.root:
+                # Ignora a pasta de temporários
+                dirnames[:] = [d for d in dirnames if d != "tmp"]
+            for name in filenames:
+                full_path = os.path.join(dirpath, name)
+                yield name, os.path.getmtime(full_path)
+
+    def delete(self, blob_ref: str) -> None:
+        try:
+            os.remove(self.path_for(blob_ref))
+        except FileNotFoundError:
+            pass
+
+    def collect_garbage(self, referenced: set[str], grace_seconds: int) -> int:
+        """
+        Remove os blobs que nenhuma linha referencia e que são mais antigos que
+        'grace_seconds' (o prazo protege uploads salvos em disco e ainda não commitados).
+        Retorna quantos blobs foram removidos.
+        """
+        limite = time.time() - grace_seconds
+        removidos = 0
+        for blob_ref, mtime in self.iter_refs():
+            if blob_ref not in referenced and mtime < limite:
+                self.delete(blob_ref)
+                removidos += 1
+
+        # Temporários antigos são restos de escritas interrompidas
+        for name in os.listdir(self.tmp_dir):
+            tmp_path = os.path.join(self.tmp_dir, name)
+            if os.path.getmtime(tmp_path) < limite:
+                os.remove(tmp_path)
+        return removidos
+
+
+_database_backend = DatabaseBlobBackend()
+
+
+def get_database_backend() -> DatabaseBlobBackend:
+    return _database_backend
+
+
+@lru_cache
+def get_filesystem_backend() -> FileSystemBlobBackend:
+    return FileSystemBlobBackend(settings.BLOB_STORAGE_PATH)
+
+
+def get_write_backend() -> BlobBackend:
+    """Backend usado para salvar novos blobs (BLOB_STORAGE_BACKEND)."""
+    if settings.BLOB_STORAGE_BACKEND == "filesystem":
+        return get_filesystem_backend()
+    return _database_backend
+
+
+def get_backend(blob_ref: Optional[str]) -> BlobBackend:
+    """Backend onde está o blob de uma linha, de acordo com o seu 'blob_ref'."""
+    if blob_ref:
+        return get_filesystem_backend()
+    return _database_backend
+
+
+def write_blob(row: BlobRow, content: Union[bytes, BinaryIO]) -> None:
+    """Salva o blob de uma linha usando o backend configurado."""
+    get_write_backend().write(row, content)
+
+
+def read_blob(row: BlobRow) -> bytes:
+    """Lê o blob inteiro de uma linha, esteja ele no banco ou em disco."""
+    return get_backend(row.blob_ref).read(row)
+
+
+def iter_blob_range(
+    modelo: type,
+    row_id: int,
+    blob_ref: Optional[str],
+    offset: int,
+    length: int,
+    chunk_size: int = BLOB_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Gera uma janela do blob de uma linha, esteja ele no banco ou em disco."""
+    return get_backend(blob_ref).iter_range(
+        modelo, row_id, blob_ref, offset, length, chunk_size
+    )
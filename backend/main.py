@@ -1,45 +1,54 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app import audit_log, hashing, mailer, replica
+from app.logging_config import setup_logging
+from app.database import async_engine, async_replica_engine
 from app.routers import (
     router_user,
     router_data,
     router_separador,
     router_share,
     router_notificacao,
+    router_internal,
 )
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
-# Configuracao do logger
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)-8s - %(name)-25s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+# Configuracao do logger (fila + thread de escrita, ver app/logging_config.py)
+setup_logging()
 
 logger = logging.getLogger()
 
 # Configuracao do FASTAPI
 origins = ["*"]  # Aceita todas as origens
 
-app = FastAPI(
-    title="Krypta API",
-    description="API para o gerenciador de senhas e arquivos Krypta.",
-    version="1.0.0",
-)
+# Headers customizados que o navegador pode ler nas respostas
+expose_headers = [
+    "X-IV-Arquivo",
+    "X-Proximo-Cursor",
+    "ETag",
+    "Accept-Ranges",
+    "Content-Range",
+    "Retry-After",
+]
 
-app.add_middleware(
-    CORSMiddleware, allow_origins=origins, allow_methods=["*"], allow_headers=["*"]
-)
-# Inclui as rotas da API
-app.include_router(router_user.router)
-app.include_router(router_data.router)
-app.include_router(router_separador.router)
-app.include_router(router_share.router)
-app.include_router(router_notificacao.router)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    replica.check_configuration()
+    yield
+    # Encerra os processos do pool do Argon2 ao desligar a API
+    hashing.shutdown()
+    # Grava os logs de auditoria que ainda estão no buffer
+    audit_log.shutdown()
+    # Envia os emails que ainda estão na fila
+    mailer.shutdown()
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
 
 
-@app.get("/", tags=["Root"])
 def read_root():
     """
     Endpoint raiz para verificar se a API está funcionando.
@@ -47,7 +56,42 @@ def read_root():
     return {"message": "Bem-vindo à Krypta API!"}
 
 
+def create_app() -> FastAPI:
+    """
+    Monta a aplicação FastAPI (middlewares e rotas).
+    O 'app' abaixo é o servido pelo uvicorn/gunicorn ('manage.py serve');
+    'manage.py check-startup' chama esta função para medir a montagem.
+    """
+    app = FastAPI(
+        title="Krypta API",
+        description="API para o gerenciador de senhas e arquivos Krypta.",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=expose_headers,
+    )
+    # Inclui as rotas da API
+    app.include_router(router_user.router)
+    app.include_router(router_data.router)
+    app.include_router(router_separador.router)
+    app.include_router(router_share.router)
+    app.include_router(router_notificacao.router)
+    app.include_router(router_internal.router)
+    app.add_api_route("/", read_root, methods=["GET"], tags=["Root"])
+    return app
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
+    # Desenvolvimento (um processo, com reload). Em produção: python manage.py serve
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
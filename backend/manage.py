@@ -0,0 +1,461 @@
+"""
+Comandos de manutenção da API Krypta.
+
+Uso (a partir da pasta 'backend'):
+    python manage.py reconcile-storage
+    python manage.py normalize-hosts
+    python manage.py migrate-blobs [--para banco]
+    python manage.py gc-blobs
+    python manage.py sweep-uploads
+    python manage.py sweep-sessions
+    python manage.py bench-jwt [--usuario-id 1]
+    python manage.py bench-argon2 [--alvo-ms 250] [--nucleos 4] [--memoria-max-mib 256]
+    python manage.py serve [--workers 4] [--porta 8000] [--preload]
+    python manage.py check-startup [--orcamento-ms 3000]
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Callable
+
+from app import core, services
+from app.database import SessionLocal
+from app.logging_config import setup_logging
+
+setup_logging()
+
+logger = logging.getLogger("manage")
+
+
+def reconcile_storage(args: argparse.Namespace):
+    """Corrige 'arquivos.tamanho' e o contador 'usuario.armazenamento_usado'."""
+    db = SessionLocal()
+    try:
+        arquivos, usuarios = services.reconcile_storage_usage(db)
+        logger.info(
+            f"Reconciliação concluída: {arquivos} arquivo(s) e {usuarios} usuário(s) corrigidos."
+        )
+    finally:
+        db.close()
+
+
+def normalize_hosts(args: argparse.Namespace):
+    """Preenche 'host_normalizado' e 'usuario_id' das senhas antigas."""
+    db = SessionLocal()
+    try:
+        total = services.backfill_normalized_hosts(db, batch_size=args.lote)
+        logger.info(f"{total} credencial(is) com host normalizado.")
+    finally:
+        db.close()
+
+
+def migrate_blobs(args: argparse.Namespace):
+    """Move o conteúdo dos arquivos e compartilhamentos entre o banco e o disco."""
+    db = SessionLocal()
+    try:
+        total = services.migrate_blobs(
+            db, para_disco=args.para == "disco", batch_size=args.lote
+        )
+        logger.info(f"Migração concluída: {total} blob(s) movidos para o {args.para}.")
+    finally:
+        db.close()
+
+
+def gc_blobs(args: argparse.Namespace):
+    """Remove do disco os blobs que nenhuma linha referencia mais."""
+    db = SessionLocal()
+    try:
+        total = services.collect_blob_garbage(db, grace_seconds=args.prazo_horas * 3600)
+        logger.info(f"{total} blob(s) sem referência removidos.")
+    finally:
+        db.close()
+
+
+def sweep_uploads(args: argparse.Namespace):
+    """Remove as sessões de upload em partes expiradas e suas partes em disco."""
+    db = SessionLocal()
+    try:
+        total = services.sweep_expired_upload_sessions(db)
+        logger.info(f"{total} sessão(ões) de upload expirada(s) removida(s).")
+    finally:
+        db.close()
+
+
+def sweep_sessions(args: argparse.Namespace):
+    """Apaga as sessões de login (refresh tokens) e as revogações de tokens expiradas."""
+    db = SessionLocal()
+    try:
+        sessoes, revogacoes = services.sweep_expired_sessions(db)
+        logger.info(f"{sessoes} sessão(ões) de login expirada(s) removida(s).")
+        logger.info(f"{revogacoes} revogação(ões) de token expirada(s) removida(s).")
+    finally:
+        db.close()
+
+
+def _bench(func: Callable[[], object], iteracoes: int) -> float:
+    """Tempo médio (em microssegundos) de uma chamada de 'func'."""
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        func()
+    return (time.perf_counter() - inicio) / iteracoes * 1_000_000
+
+
+def bench_jwt(args: argparse.Namespace):
+    """Mede o custo por requisição da validação do JWT, com e sem o cache de tokens."""
+    from app.routers.dependencies import get_current_user
+
+    token = core.create_access_token({"sub": str(args.usuario_id or 1)})
+
+    def sem_cache():
+        core.clear_token_cache()
+        core.decode_access_token(token)
+
+    def com_cache():
+        core.decode_access_token(token)
+
+    resultados = {
+        "decode_access_token (sem cache)": _bench(sem_cache, args.iteracoes),
+        "decode_access_token (com cache)": _bench(com_cache, args.iteracoes),
+    }
+
+    if args.usuario_id:
+        # Mede a dependência inteira (token + usuário), como em cada requisição
+        db = SessionLocal()
+        try:
+
+            def dependencia(limpar_cache: bool):
+                if limpar_cache:
+                    core.clear_token_cache()
+                get_current_user(db, token)
+                db.expunge_all()
+
+            resultados["get_current_user (sem cache de token)"] = _bench(
+                lambda: dependencia(True), args.iteracoes
+            )
+            resultados["get_current_user (com cache de token)"] = _bench(
+                lambda: dependencia(False), args.iteracoes
+            )
+        finally:
+            db.close()
+
+    for nome, micros in resultados.items():
+        logger.info(f"{nome:<40} {micros:10.1f} µs/chamada")
+
+
+def _argon2_ms(time_cost: int, memory_kib: int, parallelism: int, amostras: int) -> float:
+    """Tempo médio (em ms) de um hash Argon2 com os parâmetros dados."""
+    from passlib.hash import argon2
+
+    handler = argon2.using(
+        rounds=time_cost, memory_cost=memory_kib, parallelism=parallelism
+    )
+    handler.hash("aquecimento")
+    inicio = time.perf_counter()
+    for _ in range(amostras):
+        handler.hash("senha-de-teste-do-benchmark")
+    return (time.perf_counter() - inicio) / amostras * 1000
+
+
+def bench_argon2(args: argparse.Namespace):
+    """
+    Mede o Argon2 neste servidor e recomenda parâmetros para o tempo alvo.
+    Usa a maior memória permitida (o que mais encarece ataques com GPU) e aumenta
+    o número de passadas até chegar no alvo; se nem 1 passada couber, reduz a memória.
+    """
+    settings = core.settings
+    nucleos = args.nucleos or os.cpu_count() or 1
+    paralelismo = args.paralelismo or nucleos
+    memoria_kib = args.memoria_max_mib * 1024
+    # Mínimo recomendado pela OWASP para o Argon2id: 19 MiB
+    memoria_min_kib = 19 * 1024
+
+    atual_ms = _argon2_ms(
+        settings.ARGON2_TIME_COST,
+        settings.ARGON2_MEMORY_COST_KIB,
+        settings.ARGON2_PARALLELISM,
+        args.amostras,
+    )
+    logger.info(
+        f"Atual: t={settings.ARGON2_TIME_COST}, m={settings.ARGON2_MEMORY_COST_KIB} KiB, "
+        f"p={settings.ARGON2_PARALLELISM} -> {atual_ms:.0f} ms"
+    )
+
+    time_cost = 1
+    while True:
+        ms = _argon2_ms(time_cost, memoria_kib, paralelismo, args.amostras)
+        logger.info(f"t={time_cost}, m={memoria_kib} KiB, p={paralelismo} -> {ms:.0f} ms")
+        if ms > args.alvo_ms and time_cost == 1 and memoria_kib > memoria_min_kib:
+            memoria_kib = max(memoria_kib // 2, memoria_min_kib)
+            continue
+        if ms > args.alvo_ms:
+            # Passou do alvo: fica com a configuração anterior (se houver)
+            time_cost = max(time_cost - 1, 1)
+            break
+        proximo_ms = ms * (time_cost + 1) / time_cost
+        if proximo_ms > args.alvo_ms:
+            break
+        time_cost += 1
+
+    workers = max(nucleos // paralelismo, 1)
+    final_ms = _argon2_ms(time_cost, memoria_kib, paralelismo, args.amostras)
+    logger.info(
+        f"Recomendado para ~{args.alvo_ms} ms em {nucleos} núcleo(s): "
+        f"{final_ms:.0f} ms por hash, ~{workers * 1000 / final_ms:.1f} logins/s, "
+        f"{workers * memoria_kib // 1024} MiB de pico no pool."
+    )
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST_KIB={memoria_kib}")
+    print(f"ARGON2_PARALLELISM={paralelismo}")
+    print(f"ARGON2_POOL_WORKERS={workers}")
+
+
+def _installed(modulo: str) -> bool:
+    return importlib.util.find_spec(modulo) is not None
+
+
+def _serve_gunicorn(args: argparse.Namespace, workers: int):
+    """
+    Gunicorn com workers do uvicorn e 'preload': a API é importada uma vez no
+    processo mestre e os workers nascem por fork, já com tudo carregado.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as e:
+        raise RuntimeError(
+            "--preload requer o pacote 'gunicorn' (pip install gunicorn)."
+        ) from e
+
+    from app.database import dispose_engines_after_fork
+
+    def post_fork(server, worker):
+        # Conexões abertas pelo mestre durante o import não podem ser compartilhadas
+        dispose_engines_after_fork()
+
+    opcoes = {
+        "bind": f"{args.host}:{args.porta}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "keyfile": args.ssl_keyfile,
+        "certfile": args.ssl_certfile,
+    }
+
+    class KryptaApplication(BaseApplication):
+        def load_config(self):
+            for chave, valor in opcoes.items():
+                if valor is not None:
+                    self.cfg.set(chave, valor)
+
+        def load(self):
+            from main import app
+
+            return app
+
+    KryptaApplication().run()
+
+
+def serve(args: argparse.Namespace):
+    """Sobe a API para produção, com vários workers (sem o reload do main.py)."""
+    import uvicorn
+
+    workers = args.workers or core.settings.SERVER_WORKERS or os.cpu_count() or 1
+    # Os workers (e o app.replica) precisam saber quantos processos atendem a API
+    core.settings.SERVER_WORKERS = workers
+    os.environ["SERVER_WORKERS"] = str(workers)
+    # uvicorn[standard] já instala os dois; sem eles, usa asyncio e h11
+    logger.info(
+        f"{workers} worker(s), loop={'uvloop' if _installed('uvloop') else 'asyncio'}, "
+        f"http={'httptools' if _installed('httptools') else 'h11'}"
+    )
+    if args.preload:
+        _serve_gunicorn(args, workers)
+        return
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.porta,
+        workers=workers,
+        loop="auto",
+        http="auto",
+        log_level=core.settings.LOG_LEVEL.lower(),
+        # Os logs do uvicorn (inclusive o de acesso) também passam pela fila
+        log_config=None,
+        ssl_keyfile=args.ssl_keyfile,
+        ssl_certfile=args.ssl_certfile,
+    )
+
+
+# Executado num processo novo: o tempo de import só vale sem nada já carregado
+_STARTUP_PROBE = """
+import json, time
+inicio = time.perf_counter()
+import main
+importado = time.perf_counter()
+main.create_app()
+montado = time.perf_counter()
+print(json.dumps({"total_ms": (importado - inicio) * 1000,
+                  "app_ms": (montado - importado) * 1000}))
+"""
+
+
+def check_startup(args: argparse.Namespace):
+    """
+    Mede o tempo de subida de um worker (import dos módulos + montagem da API)
+    e sai com erro se passar do orçamento. Lista os módulos mais lentos.
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _STARTUP_PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if resultado.returncode != 0:
+        logger.error(f"Falha ao importar a API:\n{resultado.stderr[-2000:]}")
+        sys.exit(1)
+
+    tempos = json.loads(resultado.stdout.strip().splitlines()[-1])
+    # O import de 'main' já monta o 'app' uma vez
+    import_ms = tempos["total_ms"] - tempos["app_ms"]
+
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        # "import time: <próprio µs> | <acumulado µs> | <módulo>"
+        partes = linha.removeprefix("import time:").split("|")
+        if len(partes) == 3 and partes[0].strip().isdigit():
+            modulos.append((int(partes[0]), partes[2].strip()))
+    for proprio_us, modulo in sorted(modulos, reverse=True)[: args.top]:
+        logger.info(f"{modulo:<50} {proprio_us / 1000:8.1f} ms")
+
+    total_ms = tempos["total_ms"]
+    logger.info(
+        f"Import: {import_ms:.0f} ms, montagem da API: {tempos['app_ms']:.0f} ms, "
+        f"total: {total_ms:.0f} ms (orçamento: {args.orcamento_ms} ms)"
+    )
+    if total_ms > args.orcamento_ms:
+        logger.error("Tempo de subida acima do orçamento.")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comandos de manutenção do Krypta.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    subparsers.add_parser(
+        "reconcile-storage",
+        help="Recalcula o tamanho dos arquivos e o armazenamento usado por usuário.",
+    ).set_defaults(func=reconcile_storage)
+
+    normalize_parser = subparsers.add_parser(
+        "normalize-hosts",
+        help="Preenche o host normalizado (eTLD+1) e o dono das credenciais antigas.",
+    )
+    normalize_parser.add_argument("--lote", type=int, default=500)
+    normalize_parser.set_defaults(func=normalize_hosts)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate-blobs",
+        help="Move o conteúdo dos arquivos do banco para o disco (BLOB_STORAGE_PATH).",
+    )
+    migrate_parser.add_argument("--para", choices=["disco", "banco"], default="disco")
+    migrate_parser.add_argument("--lote", type=int, default=20)
+    migrate_parser.set_defaults(func=migrate_blobs)
+
+    gc_parser = subparsers.add_parser(
+        "gc-blobs", help="Remove do disco os blobs que não são mais usados."
+    )
+    gc_parser.add_argument(
+        "--prazo-horas",
+        type=int,
+        default=24,
+        help="Só remove blobs sem referência mais antigos que esse prazo.",
+    )
+    gc_parser.set_defaults(func=gc_blobs)
+
+    subparsers.add_parser(
+        "sweep-uploads", help="Remove os uploads em partes abandonados (expirados)."
+    ).set_defaults(func=sweep_uploads)
+
+    subparsers.add_parser(
+        "sweep-sessions",
+        help="Apaga as sessões de login e as revogações de tokens expiradas.",
+    ).set_defaults(func=sweep_sessions)
+
+    bench_jwt_parser = subparsers.add_parser(
+        "bench-jwt",
+        help="Mede o ganho do cache de tokens JWT por requisição autenticada.",
+    )
+    bench_jwt_parser.add_argument("--iteracoes", type=int, default=10000)
+    bench_jwt_parser.add_argument(
+        "--usuario-id",
+        type=int,
+        default=None,
+        help="Também mede a dependência get_current_user para este usuário (usa o banco).",
+    )
+    bench_jwt_parser.set_defaults(func=bench_jwt)
+
+    bench_argon2_parser = subparsers.add_parser(
+        "bench-argon2",
+        help="Mede o Argon2 neste servidor e recomenda os parâmetros para o .env.",
+    )
+    bench_argon2_parser.add_argument(
+        "--alvo-ms", type=int, default=250, help="Tempo alvo de um hash (login)."
+    )
+    bench_argon2_parser.add_argument(
+        "--nucleos",
+        type=int,
+        default=None,
+        help="Núcleos disponíveis para o Argon2 (padrão: todos).",
+    )
+    bench_argon2_parser.add_argument(
+        "--paralelismo",
+        type=int,
+        default=None,
+        help="Threads por hash (padrão: igual a --nucleos).",
+    )
+    bench_argon2_parser.add_argument("--memoria-max-mib", type=int, default=256)
+    bench_argon2_parser.add_argument("--amostras", type=int, default=3)
+    bench_argon2_parser.set_defaults(func=bench_argon2)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Sobe a API para produção (vários workers, uvloop/httptools)."
+    )
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--porta", type=int, default=8000)
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processos da API (padrão: SERVER_WORKERS ou um por núcleo).",
+    )
+    serve_parser.add_argument(
+        "--preload",
+        action="store_true",
+        help="Carrega a API uma vez e cria os workers por fork (requer gunicorn).",
+    )
+    serve_parser.add_argument("--ssl-keyfile", default=None)
+    serve_parser.add_argument("--ssl-certfile", default=None)
+    serve_parser.set_defaults(func=serve)
+
+    startup_parser = subparsers.add_parser(
+        "check-startup",
+        help="Mede o tempo de import e de montagem da API e compara com um orçamento.",
+    )
+    startup_parser.add_argument("--orcamento-ms", type=int, default=3000)
+    startup_parser.add_argument(
+        "--top", type=int, default=10, help="Quantos dos módulos mais lentos listar."
+    )
+    startup_parser.set_defaults(func=check_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Variáveis obrigatórias do app.core.Settings, para importar os módulos sem um .env
+os.environ.setdefault("SECRET_KEY", "chave-de-teste")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("EMAIL_HOST_USER", "krypta@localhost")
+os.environ.setdefault("EMAIL_HOST_PASSWORD", "")
+
+# Banco e arquivos dos testes: SQLite numa pasta temporária (nunca o banco do .env)
+TEST_DIR = tempfile.mkdtemp(prefix="krypta-testes-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{TEST_DIR}/primario.sqlite",
+    BLOB_STORAGE_PATH=os.path.join(TEST_DIR, "blobs"),
+    UPLOAD_SESSION_PATH=os.path.join(TEST_DIR, "uploads"),
+    # Um processo só: o backend em memória vale para o limite de login e a réplica
+    RATE_LIMIT_BACKEND="memory",
+    SERVER_WORKERS="1",
+    # Hash no próprio processo, sem consulta de GeoIP e logs gravados na hora
+    ARGON2_POOL_WORKERS="0",
+    GEOIP_BACKEND="none",
+    AUDIT_LOG_FLUSH_SECONDS="0",
+    LOG_LEVEL="WARNING",
+)
+for variavel in ("ASYNC_DATABASE_URL", "DATABASE_REPLICA_URL"):
+    os.environ.pop(variavel, None)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient da API, com as tabelas criadas e sem envio de emails."""
+    from fastapi.testclient import TestClient
+
+    import main
+    from app.database import Base, engine
+    from app.services import service_utils
+
+    Base.metadata.create_all(engine)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(service_utils, "send_email_alert", lambda **kwargs: None)
+        with TestClient(main.app) as test_client:
+            yield test_client
+
+
+@pytest.fixture
+def login(client):
+    """Cria um usuário novo (email único) e retorna os headers com o token dele."""
+
+    def _login(senha: str = "senha-mestre") -> dict:
+        email = f"{uuid.uuid4().hex}@teste.com"
+        r = client.post(
+            "/users", json={"email": email, "nome": "Teste", "senha_mestre": senha}
+        )
+        assert r.status_code == 201, r.text
+        r = client.post("/login", data={"username": email, "password": senha})
+        assert r.status_code == 200, r.text
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    return _login
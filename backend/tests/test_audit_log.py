@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app import audit_log, models, schemas
+from app.database import SessionLocal
+from app.services import service_notificacao
+
+HORARIO = datetime(2021, 6, 1, 15, 30, 0)
+
+
+@pytest.fixture
+def buffered_logs(monkeypatch):
+    """Liga o buffer em lote (desligado nos testes) até o fim do teste."""
+    monkeypatch.setattr(audit_log.settings, "AUDIT_LOG_FLUSH_SECONDS", 60)
+    monkeypatch.setattr(audit_log._buffer, "flush_seconds", 60)
+    yield
+    audit_log.shutdown()
+
+
+def test_critical_and_buffered_logs_use_the_same_clock(
+    client, login, buffered_logs, monkeypatch
+):
+    monkeypatch.setattr(service_notificacao, "_now", lambda: HORARIO)
+    headers = login()
+    r = client.post(
+        "/data/credentials",
+        json={
+            "nome_aplicacao": "site",
+            "senha": {
+                "senha_cripto": "c2VuaGE=",
+                "iv_senha_cripto": "aXY=",
+                "email": "a@b.com",
+            },
+        },
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    # O log da criação (não crítico) está no buffer; o do login já foi gravado
+    audit_log.flush_audit_logs()
+
+    user_id = client.get("/users/me", headers=headers).json()["id"]
+    with SessionLocal() as db:
+        logs = db.execute(
+            select(models.Log.tipo_acesso, models.Log.data_hora)
+            .filter(models.Log.usuario_id == user_id)
+            .order_by(models.Log.id)
+        ).all()
+    assert logs == [
+        (schemas.LogTipo.LOGIN_SUCESSO.value, HORARIO),
+        (schemas.LogTipo.DADO_CRIADO.value, HORARIO),
+    ]
@@ -0,0 +1,199 @@
+import pytest
+from fastapi import Request
+from sqlalchemy import func, select
+
+from app import models, schemas, storage
+from app.core import settings
+from app.database import SessionLocal
+from app.exceptions import RangeNotSatisfiableError
+from app.routers import http_cache
+
+CONTEUDO = bytes(range(256)) * 40
+TAMANHO = len(CONTEUDO)
+
+
+def _request(**headers) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (nome.replace("_", "-").encode(), valor.encode())
+                for nome, valor in headers.items()
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "header, esperado",
+    [
+        (None, None),
+        ("bytes=0-9", (0, 9)),
+        ("bytes=100-", (100, TAMANHO - 1)),
+        # Sufixo: os últimos N bytes, limitado ao tamanho do conteúdo
+        ("bytes=-10", (TAMANHO - 10, TAMANHO - 1)),
+        ("bytes=-999999", (0, TAMANHO - 1)),
+        # Fim depois do conteúdo: cortado no último byte
+        (f"bytes={TAMANHO - 5}-999999", (TAMANHO - 5, TAMANHO - 1)),
+        # Vários intervalos, unidade desconhecida ou sintaxe inválida: arquivo inteiro
+        ("bytes=0-9,20-29", None),
+        ("items=0-9", None),
+        ("bytes=abc-", None),
+        ("bytes=10-5", None),
+        ("bytes=10", None),
+    ],
+)
+def test_parse_byte_range(header, esperado):
+    assert http_cache.parse_byte_range(header, TAMANHO) == esperado
+
+
+@pytest.mark.parametrize(
+    "header, tamanho",
+    [(f"bytes={TAMANHO}-", TAMANHO), ("bytes=-0", TAMANHO), ("bytes=-5", 0)],
+)
+def test_parse_byte_range_not_satisfiable(header, tamanho):
+    with pytest.raises(RangeNotSatisfiableError):
+        http_cache.parse_byte_range(header, tamanho)
+
+
+def test_if_range_matches():
+    etag = '"abc"'
+    assert http_cache.if_range_matches(_request(), etag)
+    assert http_cache.if_range_matches(_request(if_range='"abc"'), etag)
+    # ETag antigo, ETag fraco, data ou conteúdo sem ETag: o Range é ignorado
+    assert not http_cache.if_range_matches(_request(if_range='"velho"'), etag)
+    assert not http_cache.if_range_matches(_request(if_range='W/"abc"'), etag)
+    assert not http_cache.if_range_matches(
+        _request(if_range="Wed, 21 Oct 2015 07:28:00 GMT"), etag
+    )
+    assert not http_cache.if_range_matches(_request(if_range='"abc"'), None)
+
+
+@pytest.fixture(params=["database", "filesystem"])
+def arquivo(request, client, login, monkeypatch):
+    """Arquivo com CONTEUDO salvo em cada um dos backends de blob."""
+    monkeypatch.setattr(settings, "BLOB_STORAGE_BACKEND", request.param)
+    headers = login()
+    r = client.post(
+        "/data/files/upload",
+        params={
+            "nome_aplicacao": "app",
+            "extensao": "bin",
+            "nome_arquivo": "arquivo.bin",
+        },
+        headers={**headers, "X-IV-Arquivo": "aXY="},
+        content=CONTEUDO,
+    )
+    assert r.status_code == 201, r.text
+    data_id = r.json()["id"]
+    with SessionLocal() as db:
+        row = db.get(models.Arquivo, data_id)
+        assert (row.blob_ref is not None) == (request.param == "filesystem")
+        blob_ref = row.blob_ref
+    return data_id, blob_ref, headers
+
+
+def _views(data_id: int) -> int:
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count(models.Log.id)).filter(
+                models.Log.id_dado == data_id,
+                models.Log.tipo_acesso == schemas.LogTipo.DADO_VISUALIZADO.value,
+            )
+        )
+
+
+def _download(client, data_id, headers, **extra):
+    return client.get(
+        f"/data/files/{data_id}/content", headers={**headers, **extra}
+    )
+
+
+def test_full_download(client, arquivo):
+    data_id, _, headers = arquivo
+    r = _download(client, data_id, headers)
+    assert r.status_code == 200
+    assert r.content == CONTEUDO
+    assert r.headers["Accept-Ranges"] == "bytes"
+    assert r.headers["Content-Length"] == str(TAMANHO)
+    assert "Content-Range" not in r.headers
+
+
+@pytest.mark.parametrize(
+    "header, inicio, fim",
+    [
+        ("bytes=100-199", 100, 199),
+        ("bytes=-50", TAMANHO - 50, TAMANHO - 1),
+        (f"bytes={TAMANHO - 10}-999999", TAMANHO - 10, TAMANHO - 1),
+    ],
+)
+def test_partial_download(client, arquivo, header, inicio, fim):
+    data_id, _, headers = arquivo
+    r = _download(client, data_id, headers, Range=header)
+    assert r.status_code == 206
+    assert r.content == CONTEUDO[inicio : fim + 1]
+    assert r.headers["Content-Range"] == f"bytes {inicio}-{fim}/{TAMANHO}"
+    assert r.headers["Content-Length"] == str(fim - inicio + 1)
+
+
+def test_multiple_ranges_send_whole_file(client, arquivo):
+    data_id, _, headers = arquivo
+    r = _download(client, data_id, headers, Range="bytes=0-9,20-29")
+    assert r.status_code == 200
+    assert r.content == CONTEUDO
+
+
+def test_if_range(client, arquivo):
+    data_id, _, headers = arquivo
+    etag = _download(client, data_id, headers).headers["ETag"]
+
+    r = _download(client, data_id, headers, Range="bytes=10-19", **{"If-Range": etag})
+    assert r.status_code == 206
+    assert r.content == CONTEUDO[10:20]
+
+    # Conteúdo mudou desde o ETag do cliente: recebe o arquivo inteiro
+    r = _download(
+        client, data_id, headers, Range="bytes=10-19", **{"If-Range": '"velho"'}
+    )
+    assert r.status_code == 200
+    assert r.content == CONTEUDO
+
+
+def test_range_not_satisfiable(client, arquivo):
+    data_id, _, headers = arquivo
+    r = _download(client, data_id, headers, Range=f"bytes={TAMANHO}-")
+    assert r.status_code == 416
+    assert r.headers["Content-Range"] == f"bytes */{TAMANHO}"
+
+
+def test_view_logged_once_per_download(client, arquivo):
+    data_id, _, headers = arquivo
+    antes = _views(data_id)
+
+    # Primeira parte (começa no byte 0) e continuação: só a primeira registra
+    _download(client, data_id, headers, Range="bytes=0-99")
+    assert _views(data_id) == antes + 1
+    _download(client, data_id, headers, Range="bytes=100-")
+    _download(client, data_id, headers, Range="bytes=-10")
+    _download(client, data_id, headers, Range=f"bytes={TAMANHO}-")
+    assert _views(data_id) == antes + 1
+
+    # Arquivo inteiro registra
+    _download(client, data_id, headers)
+    assert _views(data_id) == antes + 2
+
+
+@pytest.mark.parametrize(
+    "offset, length",
+    [(0, TAMANHO), (5, 30), (TAMANHO - 3, 3), (TAMANHO - 3, 100), (TAMANHO, 10)],
+)
+def test_iter_blob_range_windows(arquivo, offset, length):
+    data_id, blob_ref, _ = arquivo
+    # Pedaços pequenos: a janela atravessa vários SUBSTRING / leituras do arquivo
+    pedacos = list(
+        storage.iter_blob_range(
+            models.Arquivo, data_id, blob_ref, offset, length, chunk_size=7
+        )
+    )
+    assert all(0 < len(p) <= 7 for p in pedacos)
+    assert b"".join(pedacos) == CONTEUDO[offset : offset + length]
@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException, Request
+
+from app.core import settings
+from app.routers.router_internal import require_internal_access
+
+TOKEN = "token-interno"
+
+
+def _request(host: str, token: str | None = None) -> Request:
+    headers = [(b"x-internal-token", token.encode())] if token else []
+    return Request({"type": "http", "client": (host, 50000), "headers": headers})
+
+
+def _allowed(request: Request) -> bool:
+    try:
+        require_internal_access(request)
+    except HTTPException as e:
+        assert e.status_code == 403
+        return False
+    return True
+
+
+@pytest.fixture
+def internal_token(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", TOKEN)
+
+
+def test_loopback_needs_token_by_default(internal_token):
+    # Atrás de um proxy reverso local, toda requisição externa chega de 127.0.0.1
+    assert not _allowed(_request("127.0.0.1"))
+    assert not _allowed(_request("::1", token="errado"))
+    assert _allowed(_request("127.0.0.1", token=TOKEN))
+    assert _allowed(_request("203.0.113.7", token=TOKEN))
+
+
+def test_loopback_opt_in(internal_token, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ALLOW_LOOPBACK", True)
+    assert _allowed(_request("127.0.0.1"))
+    assert _allowed(_request("::1"))
+    assert not _allowed(_request("203.0.113.7"))
+
+
+def test_closed_without_token(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", None)
+    assert not _allowed(_request("127.0.0.1"))
+    assert not _allowed(_request("203.0.113.7", token="qualquer"))
+
+
+def test_metrics_route(client, internal_token):
+    assert client.get("/internal/metrics").status_code == 403
+    r = client.get("/internal/metrics", headers={"X-Internal-Token": TOKEN})
+    assert r.status_code == 200, r.text
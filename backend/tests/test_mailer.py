@@ -0,0 +1,116 @@
+import socket
+import time
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.mailer import Mailer
+
+POOL_SIZE = 2
+
+
+class _Handler:
+    """Guarda os destinatários recebidos e as conexões (porta do cliente) usadas."""
+
+    def __init__(self):
+        self.recebidos = []
+        self.conexoes = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recebidos.append(envelope.rcpt_tos[0])
+        self.conexoes.add(session.peer)
+        return "250 OK"
+
+
+class _SmtpServer:
+    """Servidor SMTP local que pode ser reiniciado na mesma porta."""
+
+    def __init__(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.handler = _Handler()
+        self._controller = None
+
+    def start(self) -> None:
+        self._controller = Controller(
+            self.handler, hostname="127.0.0.1", port=self.port
+        )
+        self._controller.start()
+
+    def stop(self) -> None:
+        if self._controller is not None:
+            self._controller.stop()
+            self._controller = None
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+
+@pytest.fixture
+def smtp_server():
+    server = _SmtpServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def _message(destinatario: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = "Alerta"
+    msg["From"] = "krypta@localhost"
+    msg["To"] = destinatario
+    msg.set_content("corpo")
+    return msg
+
+
+def _wait_sent(mailer: Mailer, total: int, timeout: float = 10) -> None:
+    prazo = time.monotonic() + timeout
+    while mailer.snapshot()["enviados"] < total:
+        assert time.monotonic() < prazo, mailer.snapshot()
+        time.sleep(0.01)
+
+
+def test_pool_reuses_connections_and_reconnects_after_restart(smtp_server):
+    mailer = Mailer(
+        host="127.0.0.1",
+        port=smtp_server.port,
+        security="none",
+        user="",
+        password="",
+        pool_size=POOL_SIZE,
+        queue_size=100,
+        timeout_seconds=5,
+        health_check_seconds=60,
+        max_idle_seconds=60,
+    )
+    try:
+        # Rajada: os emails saem pelas conexões do pool, sem abrir uma por email
+        for i in range(20):
+            assert mailer.send_message(_message(f"u{i}@localhost"))
+        _wait_sent(mailer, 20)
+        metricas = mailer.snapshot()
+        assert len(smtp_server.handler.conexoes) <= POOL_SIZE
+        assert metricas["conexoes_criadas"] <= POOL_SIZE
+        assert metricas["conexoes_abertas"] == metricas["conexoes_criadas"]
+
+        # Servidor reiniciado: as conexões do pool caem e são refeitas no envio
+        conexoes_antes = set(smtp_server.handler.conexoes)
+        criadas_antes = metricas["conexoes_criadas"]
+        smtp_server.restart()
+        for i in range(5):
+            assert mailer.send_message(_message(f"v{i}@localhost"))
+        _wait_sent(mailer, 25)
+        metricas = mailer.snapshot()
+        assert metricas["falhas"] == 0
+        assert metricas["conexoes_criadas"] > criadas_antes
+        assert metricas["conexoes_abertas"] <= POOL_SIZE
+        assert smtp_server.handler.conexoes - conexoes_antes
+        assert sorted(smtp_server.handler.recebidos[-5:]) == [
+            f"v{i}@localhost" for i in range(5)
+        ]
+    finally:
+        mailer.shutdown()
+    assert mailer.snapshot()["conexoes_abertas"] == 0
@@ -0,0 +1,131 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app import models
+from app.database import SessionLocal
+from app.services import decode_page_cursor, encode_page_cursor
+
+# Todos os dados criados no mesmo instante: a ordem depende só do id
+MESMO_INSTANTE = datetime(2020, 1, 1, 12, 0, 0)
+
+
+def _create_credential(client, headers, nome: str, id_tags=()) -> int:
+    r = client.post(
+        "/data/credentials",
+        json={
+            "nome_aplicacao": nome,
+            "senha": {
+                "senha_cripto": "c2VuaGE=",
+                "iv_senha_cripto": "aXY=",
+                "email": "a@b.com",
+            },
+            "id_tags": list(id_tags),
+        },
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def _set_criado_em(ids, criado_em: datetime) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            update(models.Dado)
+            .filter(models.Dado.id.in_(ids))
+            .values(criado_em=criado_em)
+        )
+        db.commit()
+
+
+def _search(client, headers, **payload):
+    r = client.post(
+        "/data/search",
+        json={"page_size": 3, "resumo": True, **payload},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    return [d["id"] for d in r.json()], r.headers.get("X-Proximo-Cursor")
+
+
+def _walk(client, headers, **payload):
+    """Percorre todas as páginas seguindo o cursor."""
+    ids, cursor = _search(client, headers, **payload)
+    while cursor:
+        pagina, cursor = _search(client, headers, cursor=cursor, **payload)
+        ids += pagina
+    return ids
+
+
+@pytest.fixture
+def user_with_data(client, login):
+    headers = login()
+    r = client.post(
+        "/separators/tags", json={"nome": "filtro", "cor": "#00ff00"}, headers=headers
+    )
+    tag_id = r.json()["id"]
+    # Um dado a cada três com a tag, para a busca filtrada
+    ids = [
+        _create_credential(
+            client, headers, f"site-{i}", id_tags=[tag_id] if i % 3 == 0 else []
+        )
+        for i in range(8)
+    ]
+    _set_criado_em(ids, MESMO_INSTANTE)
+    return headers, tag_id, ids
+
+
+def test_cursor_round_trip():
+    cursor = encode_page_cursor(MESMO_INSTANTE, 42)
+    assert decode_page_cursor(cursor) == (MESMO_INSTANTE, 42)
+
+
+# Base64 inválido, sem o separador ("nope") e com data inválida ("ontem|1")
+@pytest.mark.parametrize("cursor", ["***", "bm9wZQ", "b250ZW18MQ"])
+def test_invalid_cursor(client, login, cursor):
+    with pytest.raises(ValueError):
+        decode_page_cursor(cursor)
+    r = client.post(
+        "/data/search", json={"page_size": 3, "cursor": cursor}, headers=login()
+    )
+    assert r.status_code == 400
+
+
+def test_ties_on_criado_em(client, user_with_data):
+    headers, _, ids = user_with_data
+    assert _walk(client, headers) == sorted(ids, reverse=True)
+
+
+def test_filtered_search(client, user_with_data):
+    headers, tag_id, ids = user_with_data
+    com_tag = [dado_id for i, dado_id in enumerate(ids) if i % 3 == 0]
+    assert _walk(client, headers, id_separadores=[tag_id]) == sorted(
+        com_tag, reverse=True
+    )
+
+
+def test_cursor_matches_offset_pages(client, user_with_data):
+    headers, _, ids = user_with_data
+    por_offset = []
+    for pagina in range(1, 4):
+        por_offset += _search(client, headers, page_number=pagina)[0]
+    assert por_offset == _walk(client, headers)
+
+
+def test_no_gaps_or_duplicates_with_inserts_between_pages(client, user_with_data):
+    headers, _, ids = user_with_data
+    primeira, cursor = _search(client, headers)
+
+    # Dados novos entre as páginas: um mais recente e um no mesmo instante
+    novo = _create_credential(client, headers, "novo")
+    empate = _create_credential(client, headers, "empate")
+    _set_criado_em([empate], MESMO_INSTANTE)
+
+    vistos = list(primeira)
+    while cursor:
+        pagina, cursor = _search(client, headers, cursor=cursor)
+        vistos += pagina
+    # Os dois novos ficam antes do cursor: a listagem segue sem repetir nem pular
+    assert vistos == sorted(ids, reverse=True)
+    assert _walk(client, headers)[:2] == [novo, empate]
@@ -0,0 +1,162 @@
+import uuid
+
+import fakeredis
+import pytest
+
+from app import rate_limit
+from app.exceptions import LoginThrottledError
+
+JANELA = 100
+IP = "10.0.0.1"
+
+
+class _Clock:
+    """Substitui o módulo 'time' do rate_limit: o tempo só anda quando o teste pede."""
+
+    def __init__(self):
+        self.agora = 1_000_000.0
+
+    def time(self) -> float:
+        return self.agora
+
+    def advance(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+class _BrokenBackend(rate_limit.RateLimitBackend):
+    """Backend fora do ar (ex: Redis inacessível)."""
+
+    def record(self, key, window_seconds):
+        raise ConnectionError("backend fora do ar")
+
+    def get_window(self, key, window_seconds):
+        raise ConnectionError("backend fora do ar")
+
+    def reset(self, key):
+        raise ConnectionError("backend fora do ar")
+
+
+def _redis_backend() -> rate_limit.RedisRateLimitBackend:
+    backend = rate_limit.RedisRateLimitBackend("redis://localhost:6379/0")
+    backend._redis = fakeredis.FakeRedis()
+    return backend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_FAILURE_WINDOW_SECONDS", JANELA)
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_FREE_ATTEMPTS", 3)
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_MAX_DELAY_SECONDS", 4)
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_MAX_FAILURES_PER_EMAIL", 8)
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_MAX_FAILURES_PER_IP", 12)
+    return clock
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, clock, monkeypatch):
+    backend = (
+        rate_limit.MemoryRateLimitBackend()
+        if request.param == "memory"
+        else _redis_backend()
+    )
+    monkeypatch.setattr(rate_limit, "get_backend", lambda: backend)
+    return backend
+
+
+def _retry_after(ip: str, email: str) -> int:
+    """Segundos de espera pedidos por check_login_allowed (0 se liberado)."""
+    try:
+        rate_limit.check_login_allowed(ip, email)
+    except LoginThrottledError as e:
+        return e.retry_after
+    return 0
+
+
+def test_sliding_window(backend, clock):
+    backend.record("chave", JANELA)
+    clock.advance(60)
+    backend.record("chave", JANELA)
+    assert backend.get_window("chave", JANELA) == (2, clock.agora - 60, clock.agora)
+    # A primeira falha sai da janela, a segunda continua
+    clock.advance(41)
+    antiga = clock.agora - 41
+    assert backend.get_window("chave", JANELA) == (1, antiga, antiga)
+    backend.reset("chave")
+    assert backend.get_window("chave", JANELA) == (0, None, None)
+
+
+def test_progressive_delay_per_email(backend, clock):
+    email = "alvo@teste.com"
+    for _ in range(3):
+        rate_limit.record_login_failure(IP, email)
+    # Tentativas livres esgotadas, mas ainda sem atraso
+    assert _retry_after(IP, email) == 0
+
+    # Depois delas, o atraso dobra a cada falha, até LOGIN_MAX_DELAY_SECONDS
+    for atraso in (1, 2, 4, 4):
+        rate_limit.record_login_failure(IP, email)
+        assert _retry_after(IP, email) == atraso
+        clock.advance(atraso)
+        assert _retry_after(IP, email) == 0
+
+    # O email vai como hash e não afeta outro email do mesmo IP
+    assert _retry_after(IP, "outro@teste.com") == 0
+
+
+def test_lockout_per_email(backend, clock):
+    email = "Alvo@Teste.com"
+    for _ in range(8):
+        rate_limit.record_login_failure(IP, email)
+        clock.advance(5)
+    # Bloqueado até a falha mais antiga sair da janela (não só o atraso de 4s)
+    assert _retry_after(IP, "alvo@teste.com") == JANELA - 40
+    clock.advance(JANELA - 40)
+    assert _retry_after(IP, email) == 0
+
+
+def test_lockout_per_ip(backend, clock):
+    # Muitos emails diferentes (nenhum passa das tentativas livres) do mesmo IP
+    for i in range(12):
+        rate_limit.record_login_failure(IP, f"u{i}@teste.com")
+    assert _retry_after(IP, "novo@teste.com") == JANELA
+    assert _retry_after("10.0.0.2", "novo@teste.com") == 0
+
+
+def test_success_resets_email_only(backend, clock):
+    email = "alvo@teste.com"
+    for _ in range(5):
+        rate_limit.record_login_failure(IP, email)
+    assert _retry_after(IP, email) > 0
+    rate_limit.record_login_success(email)
+    assert _retry_after(IP, email) == 0
+    assert backend.get_window(rate_limit._ip_key(IP), JANELA)[0] == 5
+
+
+def test_fails_open_when_backend_is_down(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "get_backend", lambda: _BrokenBackend())
+    # Nada é propagado: o login segue como se não houvesse limite
+    rate_limit.record_login_failure(IP, "alvo@teste.com")
+    rate_limit.record_login_success("alvo@teste.com")
+    assert _retry_after(IP, "alvo@teste.com") == 0
+
+
+def test_login_route_answers_429(client, backend, clock):
+    email = f"{uuid.uuid4().hex}@teste.com"
+    client.post("/users", json={"email": email, "nome": "T", "senha_mestre": "certa"})
+
+    def _login(senha):
+        return client.post("/login", data={"username": email, "password": senha})
+
+    for _ in range(4):
+        assert _login("errada").status_code == 401
+    r = _login("certa")
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+
+    clock.advance(1)
+    assert _login("certa").status_code == 200
+    # O login correto zerou as falhas do email
+    assert _login("errada").status_code == 401
+    assert _login("errada").status_code == 401
@@ -0,0 +1,132 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, rate_limit, replica
+from app.database import Base, _async_database_url
+from conftest import TEST_DIR
+
+
+@pytest.fixture
+def replica_db(client, monkeypatch):
+    """
+    Réplica SQLite separada do primário (sem replicação): um dado gravado só
+    num dos bancos mostra de onde a leitura veio.
+    """
+    url = f"sqlite:///{os.path.join(TEST_DIR, 'replica.sqlite')}"
+    sync_engine = create_engine(url)
+    async_engine = create_async_engine(_async_database_url(url, "teste"))
+    Base.metadata.create_all(sync_engine)
+
+    replica_session = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+    monkeypatch.setattr(replica, "replica_engine", sync_engine)
+    monkeypatch.setattr(replica, "ReplicaSessionLocal", replica_session)
+    monkeypatch.setattr(
+        replica,
+        "AsyncReplicaSessionLocal",
+        async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False),
+    )
+    yield replica_session
+    sync_engine.dispose()
+    Base.metadata.drop_all(create_engine(url))
+
+
+def _user_id(client, headers) -> int:
+    return client.get("/users/me", headers=headers).json()["id"]
+
+
+def _tag_names(client, headers) -> list:
+    r = client.get("/separators/tags", headers=headers)
+    assert r.status_code == 200, r.text
+    return [tag["nome"] for tag in r.json()]
+
+
+def _add_replica_tag(replica_session, user_id: int, nome: str) -> None:
+    with replica_session() as db:
+        db.add(
+            models.Separador(
+                usuario_id=user_id,
+                nome=nome,
+                tipo=models.TipoSeparador.TAG,
+                cor="#000000",
+            )
+        )
+        db.commit()
+
+
+def test_async_url_for_sqlite():
+    assert (
+        _async_database_url("sqlite:///replica.db", "X")
+        == "sqlite+aiosqlite:///replica.db"
+    )
+    assert _async_database_url("mysql+pymysql://u:p@h/db", "X").startswith(
+        "mysql+aiomysql://u:p@h/db"
+    )
+    with pytest.raises(Exception):
+        _async_database_url("postgresql://u@h/db", "X")
+
+
+def test_memory_backend_routes_only_with_single_worker(replica_db, monkeypatch):
+    assert replica.replica_enabled()
+    # Vários workers com a marca de escrita em memória: tudo vai para o primário
+    monkeypatch.setattr(replica.settings, "SERVER_WORKERS", 4)
+    assert not replica.replica_enabled()
+    assert replica.read_sessionmaker(1) is replica.SessionLocal
+
+
+def test_reads_go_to_replica_except_right_after_a_write(client, login, replica_db):
+    headers = login()
+    user_id = _user_id(client, headers)
+    _add_replica_tag(replica_db, user_id, "so-na-replica")
+
+    # Sem escrita recente: a leitura vem da réplica
+    assert _tag_names(client, headers) == ["so-na-replica"]
+
+    # Logo após gravar, o usuário lê o que acabou de gravar (do primário)
+    r = client.post(
+        "/separators/tags", json={"nome": "nova", "cor": "#ff0000"}, headers=headers
+    )
+    assert r.status_code == 201, r.text
+    assert _tag_names(client, headers) == ["nova"]
+
+    # Outro usuário, sem escrita, continua lendo da réplica
+    outro = login()
+    _add_replica_tag(replica_db, _user_id(client, outro), "outro-na-replica")
+    assert _tag_names(client, outro) == ["outro-na-replica"]
+
+    # Passada a janela de REPLICA_STICKY_SECONDS, volta para a réplica
+    rate_limit.get_backend().reset(replica._write_key(user_id))
+    assert _tag_names(client, headers) == ["so-na-replica"]
+
+
+def test_async_reads_follow_the_same_routing(client, login, replica_db):
+    headers = login()
+    user_id = _user_id(client, headers)
+    busca = {"page_size": 10, "page_number": 1}
+
+    r = client.post(
+        "/data/credentials",
+        json={
+            "nome_aplicacao": "site",
+            "senha": {
+                "senha_cripto": "c2VuaGE=",
+                "iv_senha_cripto": "aXY=",
+                "email": "a@b.com",
+            },
+        },
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    r = client.post("/data/search", json=busca, headers=headers)
+    assert [d["nome_aplicacao"] for d in r.json()] == ["site"]
+
+    # A réplica não recebeu o dado: sem a marca de escrita, a busca não o vê
+    rate_limit.get_backend().reset(replica._write_key(user_id))
+    r = client.post("/data/search", json=busca, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == []
+    with replica_db() as db:
+        assert db.scalars(select(models.Dado)).all() == []
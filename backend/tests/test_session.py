@@ -0,0 +1,128 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+
+from app import models, revocation, schemas
+from app.database import SessionLocal
+from app.exceptions import AuthenticationError
+from app.repository import repository_session
+from app.services import service_session
+
+
+@pytest.fixture
+def tokens(client):
+    """Login de um usuário novo: retorna o JSON com o access e o refresh token."""
+    email = f"{uuid.uuid4().hex}@teste.com"
+    client.post("/users", json={"email": email, "nome": "T", "senha_mestre": "senha"})
+    r = client.post("/login", data={"username": email, "password": "senha"})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _auth(access_token: str) -> dict:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def _refresh(client, refresh_token: str):
+    return client.post("/token/refresh", json={"refresh_token": refresh_token})
+
+
+def _sessao(refresh_token: str) -> models.Sessao:
+    """Sessão (desligada do banco) pelo refresh token atual ou pelo anterior."""
+    token_hash = service_session._hash_refresh_token(refresh_token)
+    with SessionLocal() as db:
+        sessao = repository_session.get_session_by_token_hash(
+            db, token_hash
+        ) or repository_session.get_session_by_previous_token_hash(db, token_hash)
+        db.expunge(sessao)
+        return sessao
+
+
+def test_refresh_rotates_tokens(client, tokens):
+    r = _refresh(client, tokens["refresh_token"])
+    assert r.status_code == 200, r.text
+    novos = r.json()
+    assert novos["refresh_token"] != tokens["refresh_token"]
+    r = client.get("/users/me", headers=_auth(novos["access_token"]))
+    assert r.status_code == 200
+
+    sessao = _sessao(novos["refresh_token"])
+    assert sessao.token_anterior_hash == service_session._hash_refresh_token(
+        tokens["refresh_token"]
+    )
+    assert sessao.revogada_em is None
+    # O novo refresh token também pode ser trocado
+    assert _refresh(client, novos["refresh_token"]).status_code == 200
+
+
+def test_reused_refresh_token_revokes_session(client, tokens):
+    novos = _refresh(client, tokens["refresh_token"]).json()
+
+    # O token antigo aparece de novo (ex: roubado): a sessão inteira é encerrada
+    r = _refresh(client, tokens["refresh_token"])
+    assert r.status_code == 401
+    assert _sessao(novos["refresh_token"]).revogada_em is not None
+    assert _refresh(client, novos["refresh_token"]).status_code == 401
+
+
+def test_concurrent_refresh_only_one_wins(client, tokens):
+    # Outra requisição lê a sessão antes desta trocar o token...
+    lida_antes = _sessao(tokens["refresh_token"])
+    novos = _refresh(client, tokens["refresh_token"]).json()
+
+    # ...e tenta trocar o mesmo token: o UPDATE condicional não altera nada
+    log_context = schemas.LogContext(ip="127.0.0.1", dispositivo="teste")
+    with SessionLocal() as db, pytest.MonkeyPatch.context() as mp:
+        mp.setattr(
+            repository_session,
+            "get_session_by_token_hash",
+            lambda db, token_hash: lida_antes,
+        )
+        with pytest.raises(AuthenticationError):
+            service_session.refresh_session(db, tokens["refresh_token"], log_context)
+
+    # Não é reuso: a sessão segue com o token da requisição que venceu
+    sessao = _sessao(novos["refresh_token"])
+    assert sessao.revogada_em is None
+    assert _refresh(client, novos["refresh_token"]).status_code == 200
+
+
+def test_expired_session(client, tokens):
+    sessao = _sessao(tokens["refresh_token"])
+    with SessionLocal() as db:
+        vencida = service_session._now() - timedelta(seconds=1)
+        db.get(models.Sessao, sessao.id).expira_em = vencida
+        db.commit()
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_invalid_refresh_token(client):
+    assert _refresh(client, "token-que-nunca-existiu").status_code == 401
+
+
+def test_logout(client, tokens):
+    headers = _auth(tokens["access_token"])
+    assert client.post("/logout", headers=headers).status_code == 204
+
+    # O access token usado e o refresh token da sessão deixam de valer
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+    assert _sessao(tokens["refresh_token"]).revogada_em is not None
+
+
+def test_logout_revokes_every_access_token_of_the_session(client, tokens):
+    antigo = _auth(tokens["access_token"])
+    novo = _auth(_refresh(client, tokens["refresh_token"]).json()["access_token"])
+    assert client.get("/users/me", headers=antigo).status_code == 200
+
+    assert client.post("/logout", headers=novo).status_code == 204
+    # O access token anterior da mesma sessão também deixa de valer
+    assert client.get("/users/me", headers=antigo).status_code == 401
+    r = client.post("/data/search", json={"page_size": 1}, headers=antigo)
+    assert r.status_code == 401
+
+    # Num worker que não fez o logout, a revogação vem do banco
+    revocation.clear_revocation_cache()
+    assert client.get("/users/me", headers=antigo).status_code == 401
+    assert client.get("/users/me", headers=novo).status_code == 401
@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.database import SessionLocal
+
+CONTEUDO = b"parte-criptografada" * 100
+
+
+@pytest.fixture
+def upload(client, login):
+    """Upload em partes com todas as partes enviadas, pronto para o 'complete'."""
+    headers = login()
+    r = client.post(
+        "/data/files/uploads",
+        json={
+            "nome_aplicacao": "app",
+            "iv_arquivo": "aXY=",
+            "extensao": "bin",
+            "nome_arquivo": "arquivo.bin",
+            "tamanho_total": len(CONTEUDO),
+        },
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    sessao = r.json()
+    tamanho = sessao["tamanho_chunk"]
+    for index in range(sessao["total_chunks"]):
+        r = client.put(
+            f"/data/files/uploads/{sessao['id']}/chunks/{index}",
+            content=CONTEUDO[index * tamanho : (index + 1) * tamanho],
+            headers=headers,
+        )
+        assert r.status_code == 200, r.text
+    return sessao["id"], headers
+
+
+def _complete(client, session_id, headers):
+    return client.post(f"/data/files/uploads/{session_id}/complete", headers=headers)
+
+
+def _arquivos(client, headers) -> int:
+    user_id = client.get("/users/me", headers=headers).json()["id"]
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count(models.Dado.id)).filter(models.Dado.usuario_id == user_id)
+        )
+
+
+def test_complete_twice(client, upload):
+    session_id, headers = upload
+    r = _complete(client, session_id, headers)
+    assert r.status_code == 201, r.text
+    data_id = r.json()["id"]
+    r = client.get(f"/data/files/{data_id}/content", headers=headers)
+    assert r.content == CONTEUDO
+
+    # A sessão já foi finalizada (e removida)
+    assert _complete(client, session_id, headers).status_code == 404
+    assert _arquivos(client, headers) == 1
+
+
+def test_concurrent_completes_create_one_file(client, upload):
+    session_id, headers = upload
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        respostas = list(
+            pool.map(lambda _: _complete(client, session_id, headers), range(2))
+        )
+    status_codes = sorted(r.status_code for r in respostas)
+    assert status_codes[0] == 201, [r.text for r in respostas]
+    assert status_codes[1] in (404, 409), [r.text for r in respostas]
+    assert _arquivos(client, headers) == 1
@@ -1,31 +1,64 @@
+const API_URL = "https://localhost:8000";
+
+// Compact index of the user's credential hosts, revalidated with its ETag
+let credentialIndex: { token: string | null; etag: string | null; hosts: string[] } = {
+  token: null,
+  etag: null,
+  hosts: [],
+};
+
+const refreshCredentialIndex = async (token: string) => {
+  if (credentialIndex.token !== token) {
+    credentialIndex = { token, etag: null, hosts: [] };
+  }
+
+  const headers: Record<string, string> = { Authorization: token };
+  if (credentialIndex.etag) {
+    headers["If-None-Match"] = credentialIndex.etag;
+  }
+
+  const response = await fetch(`${API_URL}/data/credentials/index`, { headers });
+  if (response.status === 304) {
+    return; // Cached index is still current
+  }
+  if (!response.ok) {
+    throw new Error(`Failed to fetch credential index: ${response.status}`);
+  }
+
+  const data = await response.json();
+  credentialIndex = {
+    token,
+    etag: response.headers.get("ETag"),
+    hosts: data.itens.map((item: any) => item.host_normalizado),
+  };
+};
+
+const hasCredentialsForHost = (hostname: string): boolean =>
+  credentialIndex.hosts.some(host => hostname === host || hostname.endsWith(`.${host}`));
+
+const fetchCredentialsForUrl = async (token: string, url: string) => {
+  await refreshCredentialIndex(token);
+
+  const tabUrl = new URL(url);
+  if (!hasCredentialsForHost(tabUrl.hostname)) {
+    return [];
+  }
+
+  const response = await fetch(
+    `${API_URL}/data/credentials/by-host?url=${encodeURIComponent(url)}`,
+    { headers: { Authorization: token } },
+  );
+  const data = await response.json();
+  return Array.isArray(data) ? data : [];
+};
+
 chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
   if (request.action === "getCredentials") {
     chrome.storage.local.get("token", (result) => {
       const token = result.token;
       if (token) {
-        fetch("https://localhost:8000/data/search", {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: token,
-          },
-          body: JSON.stringify({ page_size: 1000, page_number: 1, id_separadores: [] }),
-        })
-          .then((response) => response.json())
-          .then((data) => {
-            if (Array.isArray(data)) {
-              const matchingCredentials = data.filter(cred => {
-                try {
-                  const credentialUrl = new URL(cred.senha.host_url);
-                  const tabUrl = new URL(request.url);
-                  return credentialUrl.hostname === tabUrl.hostname;
-                } catch (e) {
-                  return false;
-                }
-              });
-              sendResponse({ credentials: matchingCredentials });
-            }
-          })
+        fetchCredentialsForUrl(token, request.url)
+          .then((credentials) => sendResponse({ credentials }))
           .catch(error => {
             console.error("Failed to fetch credentials:", error);
             sendResponse({ credentials: [] });
@@ -36,4 +69,4 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     });
     return true; // Indicates that the response is sent asynchronously
   }
-});
\ No newline at end of file
+});
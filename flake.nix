@@ -20,8 +20,10 @@ inputs = {
             fastapi
             uvicorn
             sqlalchemy
+            greenlet
             python-dotenv
             pymysql
+            aiomysql
             email-validator
             python-jose
             passlib
@@ -30,6 +32,8 @@ inputs = {
             argon2-cffi
 						pydantic-extra-types
 						httpx
+            tldextract
+            redis
           ]))
           
           # Frontend
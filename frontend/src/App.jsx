@@ -29,6 +29,7 @@ import Landing from './components/views/Landing';
 import { SharedItemsProvider } from './context/SharedItemsContext';
 
 import * as folderService from './services/folderService'; // corrigido
+import * as userService from './services/userService';
 
 const MainApp = ({ onLogout }) => {
   const [view, setView] = useState('cofre');
@@ -197,8 +198,10 @@ function KryptaApp() {
 
   const handleLoginSuccess = () => setIsAuthenticated(true);
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    await userService.logout().catch(() => {});
     localStorage.removeItem('authToken');
+    localStorage.removeItem('refreshToken');
     setIsAuthenticated(false);
     setCurrentView('landing');
   };
@@ -1,7 +1,9 @@
 import axios from "axios";
 
+const API_URL = "https://localhost:8000";
+
 const apiClient = axios.create({
-  baseURL: "https://localhost:8000",
+  baseURL: API_URL,
   timeout: 10000,
 });
 
@@ -11,4 +13,47 @@ apiClient.interceptors.request.use((config) => {
   return config;
 });
 
+// Renovação do access token com o refresh token (uma única renovação por vez)
+let refreshPromise = null;
+
+const refreshAccessToken = async () => {
+  const refreshToken = localStorage.getItem("refreshToken");
+  if (!refreshToken) throw new Error("Sem refresh token");
+
+  const { data } = await axios.post(`${API_URL}/token/refresh`, {
+    refresh_token: refreshToken,
+  });
+  localStorage.setItem("authToken", `${data.token_type} ${data.access_token}`);
+  localStorage.setItem("refreshToken", data.refresh_token);
+};
+
+apiClient.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const config = error.config;
+    const url = config?.url || "";
+    if (
+      error.response?.status !== 401 ||
+      !config ||
+      config._retry ||
+      url.includes("/login") ||
+      !localStorage.getItem("refreshToken")
+    ) {
+      return Promise.reject(error);
+    }
+
+    config._retry = true;
+    try {
+      refreshPromise = refreshPromise || refreshAccessToken();
+      await refreshPromise;
+    } catch {
+      localStorage.removeItem("refreshToken");
+      return Promise.reject(error);
+    } finally {
+      refreshPromise = null;
+    }
+    return apiClient(config);
+  }
+);
+
 export default apiClient;
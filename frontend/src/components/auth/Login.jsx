@@ -39,6 +39,7 @@ const Login = ({ onNavigateToSignup, onLoginSuccess, onNavigateToLanding }) => {
 
     // 2. Salvar token e usuário (igual antes)
     localStorage.setItem("authToken", `${data.token_type} ${data.access_token}`);
+    localStorage.setItem("refreshToken", data.refresh_token);
     localStorage.setItem(
       "user",
       JSON.stringify({
@@ -21,6 +21,11 @@ export const login = async (email, password) => {
   return data;
 };
 
+// Encerra a sessão atual no backend (o refresh token deixa de valer)
+export const logout = async () => {
+  await apiClient.post("/logout");
+};
+
 // Retorna os dados do usuário logado atualmente
 export const getUserMe = async () => {
   const { data } = await apiClient.get("/users/me");